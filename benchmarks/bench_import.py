@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Import time benchmark for the overlap tool.  The core modules are imported
+    in a fresh interpreter without the fake scene, so any Maya, PyMEL or Qt
+    import fails the check outright.  The fastest of several runs has to stay
+    under the import budget.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --budget 0.25
+
+@applications:
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE_MODULES = [
+	'overlap_tool',
+	'overlap_tool.cache',
+	'overlap_tool.jointcache',
+	'overlap_tool.naming',
+	'overlap_tool.orient',
+	'overlap_tool.prefs',
+	'overlap_tool.reduction',
+	'overlap_tool.resample',
+	'overlap_tool.solver',
+	'overlap_tool.topology',
+]
+# Packages the core must never pull in
+FORBIDDEN_PACKAGES = ['maya', 'pymel', 'PyQt4', 'PySide', 'PySide2', 'shiboken']
+# Seconds
+IMPORT_BUDGET = 0.5
+REPEATS = 5
+
+# Run in the fresh interpreter, prints the import time and loaded modules
+PROBE = """
+import json, sys, timeit
+start = timeit.default_timer()
+for name in {modules!r}:
+    __import__(name)
+seconds = timeit.default_timer() - start
+print(json.dumps({{'seconds' : seconds, 'modules' : sorted(sys.modules)}}))
+"""
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def time_import(modules=CORE_MODULES):
+	""" Import modules in a fresh interpreter.
+	Returns:
+		seconds, loaded : (float, list)
+			Time spent importing and every module loaded afterwards
+	"""
+	output = subprocess.check_output(
+	        [sys.executable, '-c', PROBE.format(modules=list(modules))],
+	        cwd=ROOT
+	)
+	result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+	return result['seconds'], result['modules']
+
+def find_forbidden(loaded):
+	""" Loaded modules that belong to a forbidden package. """
+	return sorted(
+	        name for name in loaded
+	        if name.split('.')[0] in FORBIDDEN_PACKAGES
+	)
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Overlap tool core import time.")
+	parser.add_argument('--budget', type=float, default=IMPORT_BUDGET, help="Seconds the core import may take")
+	parser.add_argument('--repeats', type=int, default=REPEATS, help="Fresh interpreters to time")
+	args = parser.parse_args(argv)
+
+	timings = []
+	forbidden = []
+	for _ in range(max(1, args.repeats)):
+		seconds, loaded = time_import()
+		timings.append(seconds)
+		forbidden = find_forbidden(loaded)
+	best = min(timings)
+	print("core import {0:.4f}s best of {1}, budget {2:.4f}s".format(best, len(timings), args.budget))
+	failed = False
+	if forbidden:
+		print("FORBIDDEN imports: {0}".format(', '.join(forbidden)))
+		failed = True
+	if best > args.budget:
+		print("OVER BUDGET by {0:.4f}s".format(best - args.budget))
+		failed = True
+	return 1 if failed else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,689 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Benchmark suite for the overlap tool.  Builds synthetic FK rigs in the
+    headless fake scene and times the setup, bake and teardown stages of the
+    tool on rigs of 1 to 1000 chains and 2 to 500 joints.  Every scenario is
+    run a few times and each stage keeps its median time and the spread of
+    its runs.  A stage is reported as a regression when its median gets
+    slower than its baseline by more than the tolerance, or by more than a
+    few spreads when the timings, now or when the baseline was stored, were
+    noisier than that.
+
+    python benchmarks/bench_overlap.py                    # full suite
+    python benchmarks/bench_overlap.py --quick            # small rigs only
+    python benchmarks/bench_overlap.py --update-baselines # store new baselines
+    python benchmarks/bench_overlap.py --repeats 5        # runs per scenario
+    python benchmarks/bench_overlap.py --profile-dir DIR  # stage reports per call
+    python benchmarks/bench_overlap.py --goal-binding skinCluster
+    python benchmarks/bench_overlap.py --drive-mode matrix
+    python benchmarks/bench_overlap.py --orient-mode analytic
+    python benchmarks/bench_overlap.py --resolution 8
+
+@applications:
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+# External
+import numpy
+
+# The fake modules have to be in place before the scene module is imported
+import fakescene
+SCENE = fakescene.install()
+from overlap_tool import cache as overlap_cache
+from overlap_tool import jointcache
+from overlap_tool import orient
+from overlap_tool import profiling
+from overlap_tool import resample
+from overlap_tool import scene as overlap_scene
+from overlap_tool import solver
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+BASELINE_FILE = os.path.join(HERE, 'baselines.json')
+
+# (chains, joints per chain)
+SCENARIOS = [
+	(1, 2),
+	(1, 50),
+	(1, 500),
+	(10, 20),
+	(50, 20),
+	(200, 5),
+	(1000, 2),
+]
+QUICK_SCENARIOS = [
+	(1, 2),
+	(1, 50),
+	(10, 20),
+]
+STAGES = ['setup', 'save_prefs', 'bake', 'solver_bake', 'scrub_cache', 'sharded_bake', 'reduce_keys', 'joint_cache', 'teardown', 'load_prefs']
+
+START_FRAME = 1
+END_FRAME = 100
+TOLERANCE = 0.5
+# Differences below this many seconds are timer noise, never regressions
+MIN_DELTA = 0.05
+# Runs of every scenario, stages keep the median
+REPEATS = 3
+# Spreads a median may move by before it is a regression, on noisy timings
+NOISE_SCALE = 3.0
+# Shard layout of the sharded bake, small enough to split the benchmark range.
+# The warm-up is sized from the chain parameters
+SHARD_FRAMES = 25
+CROSSFADE_FRAMES = 5
+# Largest distance a sharded bake may drift from the serial solve
+MAX_SHARD_DEVIATION = 1e-3
+# Degrees and units
+KEY_TOLERANCE = 0.01
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def scenario_name(num_chains, num_joints):
+	return '{0}x{1}'.format(num_chains, num_joints)
+
+def build_rig(scene, num_chains, num_joints):
+	""" Build a character of FK chains, control > joint > control > joint ...,
+	with a few keys on every control.  The whole character walks forward and
+	turns so world space sampling has to follow the parents' rotation.
+	Returns:
+		chains : (list)
+			(base control, end control) of every chain
+	"""
+	root = scene.create(fakescene.Transform, 'character_GRP')
+	middle = (START_FRAME + END_FRAME) // 2
+	for attr, values in (('translateX', (0.0, 2.0, 10.0)), ('rotateY', (0.0, 30.0, 90.0))):
+		root.keys[attr] = dict(zip((float(START_FRAME), float(middle), float(END_FRAME)), values))
+	chains = []
+	for c in range(num_chains):
+		parent = scene.create(fakescene.Transform, 'chain{0}_GRP'.format(c), root)
+		parent.attrs['translateZ'] = float(c)
+		controls = []
+		for i in range(num_joints):
+			control = scene.create(fakescene.Transform, 'chain{0}_{1}_CON'.format(c, i), parent)
+			# Parenting keeps the world position, place the control relative to its parent
+			control.attrs.update({'translateX' : 1.0 if i else 0.0, 'translateY' : 0.0, 'translateZ' : 0.0})
+			for frame, value in ((START_FRAME, 0.0), (END_FRAME, 45.0)):
+				control.keys.setdefault('rotateZ', {})[float(frame)] = value
+			parent = scene.create(fakescene.Joint, 'chain{0}_{1}_JNT'.format(c, i), control)
+			# and put the joint on its control
+			for attr in ('translateX', 'translateY', 'translateZ'):
+				parent.attrs[attr] = 0.0
+			controls.append(control)
+		chains.append((controls[0], controls[-1]))
+	return chains
+
+def get_chain_controls(scene):
+	return [str(node) for node in scene.ls('*' + overlap_scene.CTRL_SUFFIX, recursive=True)]
+
+def check_blend_matching(scene):
+	""" Every blend joint has to sit under the duplicate of the control its
+	source joint hangs from.  Duplicates may carry the OVR_ prefix and the
+	number duplicate appends.
+	"""
+	for chainCtrl in get_chain_controls(scene):
+		for blend_name in overlap_scene.get_driver_joints(chainCtrl):
+			blend_joint = scene.node(blend_name)
+			parent = blend_joint.getParent()
+			source = blend_name[:-len(overlap_scene.BLND_SUFFIX)].rsplit('_', 1)[0]
+			expected = source.replace('_JNT', '_CON')
+			found = str(parent).replace('OVR_', '', 1).rstrip('0123456789') if parent is not None else None
+			if found != expected:
+				raise AssertionError("{0} is under {1}, expected a duplicate of {2}".format(blend_name, parent, expected))
+
+def check_posed_channels(scene, channels, index, label):
+	""" The dynamic joints have to hold the values of channels at index.  The
+	live pose is not unwrapped against the frame before, so rotations are
+	compared as matrices, any euler angles giving the same rotation match.
+	"""
+	rotations = {}
+	for plug, values in channels.items():
+		node, attr = scene.plug(plug)
+		if attr.startswith('rotate'):
+			rotations.setdefault(node, {})[attr] = values[index]
+		elif abs(node.attrs[attr] - values[index]) > 1e-6:
+			raise AssertionError("{0} is {1} {2}, expected {3}".format(plug, node.attrs[attr], label, values[index]))
+	for node, expected in rotations.items():
+		attrs = ['rotateX', 'rotateY', 'rotateZ']
+		posed = [node.attrs.get(attr, 0.0) for attr in attrs]
+		expected = [expected.get(attr, 0.0) for attr in attrs]
+		if numpy.abs(fakescene.rotation_matrix(posed) - fakescene.rotation_matrix(expected)).max() > 1e-6:
+			raise AssertionError("{0} is rotated {1} {2}, expected {3}".format(node, posed, label, expected))
+
+def check_goal_weights(scene):
+	""" Goal curves bound with a skinCluster have to be weighted so the blend
+	joints at rest give back every CV exactly, with no more joints per CV
+	than the skinCluster allows.
+	"""
+	for chain in overlap_scene.list_chains():
+		skin_name = '{0}_goalSkin'.format(chain.goal_curve)
+		if not scene.objExists(skin_name):
+			continue
+		skin = scene.node(skin_name)
+		joints = chain.blend_joints
+		weights = numpy.zeros((len(skin.attrs['weightList']), len(joints)))
+		for cv, row in skin.attrs['weightList'].items():
+			for index, value in row.items():
+				weights[cv, index] = value
+		cvs = numpy.reshape(scene.xform('{0}.cv[0:{1}]'.format(chain.goal_curve, len(weights) - 1), query=True, worldSpace=True), (-1, 3))
+		rest = numpy.array([scene.node(joint).world_position() for joint in joints])
+		error = numpy.abs(weights.dot(rest) - cvs).max()
+		if error > 1e-6 or numpy.abs(weights.sum(axis=1) - 1.0).max() > 1e-9:
+			raise AssertionError("{0} is weighted {1} away from its CVs".format(skin_name, error))
+		if numpy.count_nonzero(weights, axis=1).max() > skin.attrs['maximumInfluences']:
+			raise AssertionError("{0} weights more joints per CV than it allows".format(skin_name))
+
+def check_goal_stiffness(scene):
+	""" goalPP has to be mapped from the chain's stiffness ramp with no
+	expression, every particle landing on the entry its own jointStiffness
+	attribute feeds.
+	"""
+	for chain in overlap_scene.list_chains():
+		ramp, mapper = chain.goal_expressions
+		outputs = [dst for dst, src in scene.connections.items() if src == '{0}.outValuePP'.format(mapper)]
+		if len(outputs) != 1 or not outputs[0].endswith('.goalPP'):
+			raise AssertionError("{0} drives {1} instead of one goalPP".format(mapper, outputs))
+		shape = outputs[0].split('.', 1)[0]
+		if scene.connections.get('{0}.vCoordPP'.format(mapper)) != '{0}.stiffnessCoordPP'.format(shape):
+			raise AssertionError("{0} is not looked up at the particles' stiffness coordinates".format(mapper))
+		coords = scene.getAttr('{0}.stiffnessCoordPP0'.format(shape))
+		if coords != scene.getAttr('{0}.stiffnessCoordPP'.format(shape)) or len(coords) != len(scene.getAttr(outputs[0])):
+			raise AssertionError("{0} has {1} stiffness coordinates for its particles".format(shape, len(coords)))
+		if scene.getAttr('{0}.interpolation'.format(ramp)) != 0:
+			raise AssertionError("{0} blends between its entries".format(ramp))
+		entries = scene.node(ramp).attrs
+		positions = [(value, int(re.search(r'\[(\d+)\]', attr).group(1)))
+		             for attr, value in entries.items() if attr.endswith('.position')]
+		for particle, coord in enumerate(coords):
+			entry = max(position for position in positions if position[0] <= coord)[1]
+			for channel in 'RGB':
+				source = scene.connections.get('{0}.colorEntryList[{1}].color{2}'.format(ramp, entry, channel))
+				if source != '{0}.jointStiffness{1}'.format(chain.controller, particle):
+					raise AssertionError("Particle {0} of {1} reads {2}".format(particle, shape, source))
+
+def check_live_orient(scene):
+	""" Chains with no IK handle have to follow their curve as soon as the
+	time changes.
+	"""
+	scene.currentTime(START_FRAME)
+	for chain in overlap_scene.list_chains():
+		if not chain.analytic_orient:
+			continue
+		points, spaces = overlap_scene.sample_curve_points(
+		        [chain.soft_curve],
+		        [chain.num_points],
+		        START_FRAME,
+		        START_FRAME,
+		        [overlap_scene.get_space_plug(chain)]
+		)
+		channels = overlap_scene.get_solved_channels(chain, points, spaces[:, 0])
+		check_posed_channels(scene, channels, 0, "on a chain with no IK handle")
+
+def check_solved_world(scene):
+	""" The baked dynamic joints have to land on the solved world trajectory,
+	base on its first point and every joint aimed down its solved segment,
+	however the character above them moves.
+	"""
+	trajectories = overlap_scene.solve_character_chains(get_chain_controls(scene), START_FRAME, END_FRAME)
+	for frame in [START_FRAME, (START_FRAME + END_FRAME) // 2, END_FRAME]:
+		scene.currentTime(frame)
+		for chainCtrl, trajectory in trajectories.items():
+			dyn_joints = overlap_scene.get_chain(chainCtrl).dyn_joints
+			positions = numpy.array([scene.node(joint).world_position() for joint in dyn_joints])
+			solved = trajectory[frame - START_FRAME]
+			if len(solved) != len(dyn_joints):
+				rest = numpy.cumsum([scene.getAttr('{0}.translate'.format(joint), time=START_FRAME)[0] for joint in dyn_joints], axis=0)
+				solved = resample.map_to_joints(solved[None], resample.arc_parameters(rest))[0]
+			error = max(
+			        numpy.abs(positions[0] - solved[0]).max(),
+			        numpy.abs(orient.normalize(numpy.diff(positions, axis=0)) - orient.normalize(numpy.diff(solved, axis=0))).max()
+			)
+			if error > 1e-6:
+				raise AssertionError("{0} is {1} off its solved world trajectory at frame {2}".format(chainCtrl, error, frame))
+
+def check_animated_params(scene):
+	""" Keyed solver attributes have to reach the solver frame by frame, in
+	the batch, sharded and scrubbed solves alike.  A scrubbed chain only reads
+	its controller again once it was edited or its keys changed.
+	"""
+	chainCtrl = get_chain_controls(scene)[0]
+	attraction = '{0}.attraction'.format(chainCtrl)
+	stiffness = '{0}.jointStiffness0'.format(chainCtrl)
+	lag = '{0}.lag'.format(chainCtrl)
+	values = dict((plug, scene.getAttr(plug)) for plug in (attraction, stiffness, lag))
+	middle = (START_FRAME + END_FRAME) // 2
+	scene.setKeyframe(attraction, value=1.0, time=START_FRAME)
+	scene.setKeyframe(attraction, value=0.2, time=middle)
+	scene.setKeyframe(stiffness, value=0.1, time=START_FRAME)
+	scene.setKeyframe(stiffness, value=0.9, time=END_FRAME)
+	reads = []
+	get_chain_attrs = overlap_scene.get_chain_attrs
+	def count_reads(*args, **kwargs):
+		reads.append(args[0])
+		return get_chain_attrs(*args, **kwargs)
+	overlap_scene.get_chain_attrs = count_reads
+	try:
+		goals, params, _ = overlap_scene.sample_character_goals([chainCtrl], START_FRAME, END_FRAME)
+		frames = range(START_FRAME, END_FRAME + 1)
+		expected = [scene.getAttr(attraction, time=frame) for frame in frames]
+		if not numpy.allclose(params[0]['attraction'], expected) or params[0]['stiffness'].shape[0] != len(frames):
+			raise AssertionError("{0} was not sampled per frame".format(attraction))
+		solved = solver.solve_chain(goals[0], **params[0])
+		static = dict(params[0], attraction=expected[0], stiffness=params[0]['stiffness'][0])
+		if numpy.allclose(solved, solver.solve_chain(goals[0], **static)):
+			raise AssertionError("The keys on {0} do not change its solve".format(chainCtrl))
+		if not numpy.allclose(overlap_scene.solve_goals(goals, params)[0], solved, rtol=0.0, atol=1e-9):
+			raise AssertionError("{0} solved in a batch ignores its keys".format(chainCtrl))
+		if not numpy.allclose(overlap_scene.solve_goals(goals, params, workers=2)[0], solved, rtol=0.0, atol=1e-9):
+			raise AssertionError("{0} solved on a pool ignores its keys".format(chainCtrl))
+		sharded = overlap_scene.solve_goals(goals, params, shard_frames=SHARD_FRAMES, crossfade=CROSSFADE_FRAMES)[0]
+		if numpy.abs(sharded - solved).max() > MAX_SHARD_DEVIATION:
+			raise AssertionError("{0} solved in shards ignores its keys".format(chainCtrl))
+		overlap_scene.scrub_chains([chainCtrl], START_FRAME, END_FRAME)
+		try:
+			scrubbed = overlap_scene.SCRUB_CHAINS[chainCtrl]
+			if not numpy.array_equal(scrubbed.evaluate(END_FRAME), solved[-1]):
+				raise AssertionError("{0} scrubbed ignores its keys".format(chainCtrl))
+			del reads[:]
+			scene.currentTime(middle)
+			if reads:
+				raise AssertionError("Changing the time read {0} again".format(chainCtrl))
+			scene.setKeyframe(attraction, value=0.6, time=middle)
+			scene.currentTime(END_FRAME)
+			if reads != [chainCtrl] or scrubbed.params['attraction'][middle - START_FRAME] != 0.6:
+				raise AssertionError("Editing a key on {0} was not picked up".format(attraction))
+			scene.setAttr(lag, 2.0)
+			scene.currentTime(middle)
+			if len(reads) != 2 or scrubbed.params['lag'] != 2.0:
+				raise AssertionError("Setting {0}.lag was not picked up".format(chainCtrl))
+		finally:
+			overlap_scene.stop_scrubbing_chains([chainCtrl])
+	finally:
+		overlap_scene.get_chain_attrs = get_chain_attrs
+		scene.cutKey(chainCtrl, clear=True)
+		for plug, value in values.items():
+			scene.setAttr(plug, value)
+	if overlap_scene.SCRUB_CALLBACKS or any(scene.attr_callbacks.values()):
+		raise AssertionError("Scrubbing left attributeChanged callbacks behind")
+
+def check_build_restored(scene):
+	""" Building a character has to hand back refresh, evaluation, undo and
+	the UI's control mode the way it found them.
+	"""
+	if scene.refresh_suspended or scene.evaluation_mode != 'parallel' or scene.undo_chunks:
+		raise AssertionError("Building left refresh suspended {0}, evaluation {1}, undo chunks {2}".format(
+		        scene.refresh_suspended, scene.evaluation_mode, scene.undo_chunks))
+	if overlap_scene.USING_ALL_CONTROLS:
+		raise AssertionError("Building a character changed USING_ALL_CONTROLS")
+
+def check_locked_cache(scene, context):
+	""" Rewriting a cache another session has mapped, which Windows refuses to
+	rename over, has to write a numbered version that open_cache then reads.
+	The versions go once the cache can be replaced again, and posing from
+	the cache's path closes it straight after.
+	"""
+	chainCtrls = get_chain_controls(scene)[:1]
+	path = overlap_scene.get_cache_path(context['cache_dir'], chainCtrls[0])
+	replace_file = jointcache.replace_file
+	def refuse_cache(source, destination):
+		if destination == path:
+			raise OSError(13, "The process cannot access the file", destination)
+		replace_file(source, destination)
+	jointcache.replace_file = refuse_cache
+	try:
+		written = overlap_scene.cache_chains(chainCtrls, START_FRAME, END_FRAME, context['cache_dir'])[0]
+	finally:
+		jointcache.replace_file = replace_file
+	if written == path or not os.path.exists(written):
+		raise AssertionError("A locked cache was written to {0}".format(written))
+	with jointcache.open_cache(path) as cache:
+		if cache.path != written:
+			raise AssertionError("open_cache read {0} instead of {1}".format(cache.path, written))
+	overlap_scene.cache_chains(chainCtrls, START_FRAME, END_FRAME, context['cache_dir'])
+	if jointcache.list_versions(path):
+		raise AssertionError("Versions of {0} were left behind".format(path))
+	# Posing from a path must not leave the cache mapped, or it stays locked
+	opened = []
+	open_cache = jointcache.open_cache
+	def track_cache(cache_path):
+		opened.append(open_cache(cache_path))
+		return opened[-1]
+	jointcache.open_cache = track_cache
+	try:
+		overlap_scene.apply_cached_frame(path, END_FRAME)
+	finally:
+		jointcache.open_cache = open_cache
+	if not opened or any(cache.data is not None for cache in opened):
+		raise AssertionError("apply_cached_frame left {0} mapped".format(path))
+
+#---------------------------------------------------------------------------------#
+# Stages
+#---------------------------------------------------------------------------------#
+def stage_setup(scene, chains, context):
+	for base_ctrl, end_ctrl in chains:
+		scene.select(base_ctrl, end_ctrl)
+		overlap_scene.create_dynamic_chain()
+
+def stage_save_prefs(scene, chains, context):
+	scene.select(get_chain_controls(scene))
+	scene.ui['fileDialog2'] = [context['prefs_file']]
+	overlap_scene.save_character_to_prefs()
+
+def stage_bake(scene, chains, context):
+	scene.select(get_chain_controls(scene))
+	scene.ui['startFrame'] = START_FRAME
+	scene.ui['endFrame'] = END_FRAME
+	overlap_scene.bake_dynamic_chain()
+
+def stage_solver_bake(scene, chains, context):
+	overlap_scene.bake_solved_chains(get_chain_controls(scene), START_FRAME, END_FRAME)
+
+def stage_scrub_cache(scene, chains, context):
+	""" Scrub every chain forward and back through the state cache, each
+	frame has to be exactly the frame of a full solve, and so has the batch
+	solve the bakes use.  Then scrub the chains
+	in the scene and check the live script node poses the dynamic joints the
+	way a bake of the full solve keys them.
+	"""
+	chainCtrls = get_chain_controls(scene)
+	goals, params, spaces = overlap_scene.sample_character_goals(chainCtrls, START_FRAME, END_FRAME)
+	state_cache = overlap_cache.StateCache()
+	frames = list(range(START_FRAME, END_FRAME + 1))
+	batch = solver.solve_chains(goals, params)
+	channels = {}
+	for chainCtrl, chain_goals, chain_params, space, batched in zip(chainCtrls, goals, params, spaces, batch):
+		expected = solver.solve_chain(chain_goals, **chain_params)
+		if not numpy.allclose(batched, expected, rtol=0.0, atol=1e-9):
+			raise AssertionError("{0} solved in a batch differs from solve_chain".format(chainCtrl))
+		chain = overlap_cache.CachedChain(state_cache, chainCtrl, chain_goals, chain_params, START_FRAME)
+		for frame in frames + frames[::-1]:
+			if not numpy.array_equal(chain.evaluate(frame), expected[frame - START_FRAME]):
+				raise AssertionError("{0} scrubbed to frame {1} differs from the full solve".format(chainCtrl, frame))
+		channels.update(overlap_scene.get_solved_channels(chainCtrl, expected, space))
+	overlap_scene.scrub_chains(chainCtrls, START_FRAME, END_FRAME)
+	try:
+		for frame in [END_FRAME, START_FRAME, (START_FRAME + END_FRAME) // 2]:
+			scene.currentTime(frame)
+			check_posed_channels(scene, channels, frame - START_FRAME, "while scrubbing frame {0}".format(frame))
+	finally:
+		overlap_scene.stop_scrubbing_chains()
+
+def stage_sharded_bake(scene, chains, context):
+	stats = overlap_scene.bake_solved_chains(
+	        get_chain_controls(scene),
+	        START_FRAME,
+	        END_FRAME,
+	        shard_frames=SHARD_FRAMES,
+	        crossfade=CROSSFADE_FRAMES,
+	        check_deviation=True
+	)
+	if stats['maxDeviation'] > MAX_SHARD_DEVIATION:
+		raise AssertionError("Sharded bake is {0} away from the serial solve".format(stats['maxDeviation']))
+	if stats['seamDeviation'] > MAX_SHARD_DEVIATION:
+		raise AssertionError("Sharded bake shards meet {0} apart".format(stats['seamDeviation']))
+
+def stage_reduce_keys(scene, chains, context):
+	stats = overlap_scene.reduce_chain_keys(get_chain_controls(scene), START_FRAME, END_FRAME, KEY_TOLERANCE)
+	if stats['maxError'] > KEY_TOLERANCE or stats['keysAfter'] > stats['keysBefore']:
+		raise AssertionError("Key reduction went wrong: {0}".format(stats))
+
+def stage_joint_cache(scene, chains, context):
+	paths = overlap_scene.cache_chains(get_chain_controls(scene), START_FRAME, END_FRAME, context['cache_dir'])
+	# Spot check the last frame of every cache against the scene
+	for path in paths:
+		with jointcache.open_cache(path) as cache:
+			values = cache.frame(END_FRAME)
+			for n, joint in enumerate(cache.joints):
+				expected = scene.getAttr('{0}.translateX'.format(joint), time=END_FRAME)
+				if abs(values[n, 0] - expected) > 1e-5:
+					raise AssertionError("{0} cached translateX {1}, expected {2}".format(joint, values[n, 0], expected))
+
+def stage_teardown(scene, chains, context):
+	scene.select(get_chain_controls(scene))
+	overlap_scene.delete_dynamic_chain()
+
+def stage_load_prefs(scene, chains, context):
+	scene.ui['fileDialog'] = context['prefs_file']
+	overlap_scene.create_character_from_prefs()
+
+def prepare_load_prefs(scene, num_chains, num_joints):
+	""" Loading prefs starts from a fresh copy of the rig. """
+	scene.reset()
+	build_rig(scene, num_chains, num_joints)
+
+STAGE_FUNCTIONS = {
+	'setup' : stage_setup,
+	'save_prefs' : stage_save_prefs,
+	'bake' : stage_bake,
+	'solver_bake' : stage_solver_bake,
+	'scrub_cache' : stage_scrub_cache,
+	'sharded_bake' : stage_sharded_bake,
+	'reduce_keys' : stage_reduce_keys,
+	'joint_cache' : stage_joint_cache,
+	'teardown' : stage_teardown,
+	'load_prefs' : stage_load_prefs,
+}
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def run_scenario(num_chains, num_joints, stages=STAGES):
+	""" Time every stage on a freshly built rig.
+	Returns:
+		results : (dict)
+			Stage name to seconds, scene calls and nodes created
+	"""
+	SCENE.reset()
+	overlap_scene.USING_ALL_CONTROLS = False
+	chains = build_rig(SCENE, num_chains, num_joints)
+	handle, prefs_file = tempfile.mkstemp(suffix='.xml')
+	os.close(handle)
+	context = {'prefs_file' : prefs_file, 'cache_dir' : tempfile.mkdtemp()}
+	results = {}
+	try:
+		for stage in stages:
+			if stage == 'load_prefs':
+				prepare_load_prefs(SCENE, num_chains, num_joints)
+			calls = sum(SCENE.calls.values())
+			nodes = SCENE.nodes_created
+			start = timeit.default_timer()
+			STAGE_FUNCTIONS[stage](SCENE, chains, context)
+			seconds = timeit.default_timer() - start
+			results[stage] = {
+				'seconds' : seconds,
+				'calls' : sum(SCENE.calls.values()) - calls,
+				'nodes' : SCENE.nodes_created - nodes,
+			}
+			if stage == 'setup':
+				check_blend_matching(SCENE)
+				check_goal_weights(SCENE)
+				check_goal_stiffness(SCENE)
+				check_live_orient(SCENE)
+			elif stage == 'solver_bake':
+				check_solved_world(SCENE)
+			elif stage == 'scrub_cache':
+				check_animated_params(SCENE)
+			elif stage == 'joint_cache':
+				check_locked_cache(SCENE, context)
+			elif stage == 'load_prefs':
+				check_build_restored(SCENE)
+	finally:
+		os.remove(prefs_file)
+		shutil.rmtree(context['cache_dir'])
+	return results
+
+def get_spread(timings):
+	""" Median absolute deviation of timings as a fraction of their median. """
+	median = numpy.median(timings)
+	if median <= 0.0:
+		return 0.0
+	return float(numpy.median(numpy.abs(numpy.asarray(timings) - median)) / median)
+
+def run_scenarios(scenarios, repeats=REPEATS):
+	""" Run every scenario repeats times, the repeats interleaved so a slow
+	patch on the machine doesn't land on one scenario only.
+	Returns:
+		results : (dict)
+			Scenario name to stage results, seconds being the median of the
+			runs and spread their get_spread
+	"""
+	runs = {}
+	for _ in range(max(1, int(repeats))):
+		for num_chains, num_joints in scenarios:
+			runs.setdefault(scenario_name(num_chains, num_joints), []).append(run_scenario(num_chains, num_joints))
+	results = {}
+	for scenario, scenario_runs in runs.items():
+		results[scenario] = {}
+		for stage, result in scenario_runs[0].items():
+			timings = [run[stage]['seconds'] for run in scenario_runs]
+			results[scenario][stage] = dict(
+			        result,
+			        seconds=float(numpy.median(timings)),
+			        spread=get_spread(timings),
+			        runs=len(timings)
+			)
+	return results
+
+def get_baseline(baselines, scenario, stage):
+	""" Baseline seconds and spread of a stage, None when it has none.
+	Baselines stored before spreads were recorded have a spread of 0.
+	"""
+	baseline = baselines.get(scenario, {}).get(stage)
+	if baseline is None:
+		return None
+	if isinstance(baseline, dict):
+		return baseline['seconds'], baseline.get('spread', 0.0)
+	return baseline, 0.0
+
+def get_allowed_slowdown(result, baseline, tolerance=TOLERANCE):
+	""" Fraction a stage may get slower than its baseline by, the tolerance or
+	NOISE_SCALE spreads of the noisier of the two timings.
+	"""
+	return max(tolerance, NOISE_SCALE * max(result.get('spread', 0.0), baseline[1]))
+
+def compare(results, baselines, tolerance=TOLERANCE):
+	""" Find the stages slower than their baseline by more than they are
+	allowed, see get_allowed_slowdown.
+	Returns:
+		regressions : (list)
+			(scenario, stage, seconds, baseline, allowed) of every regression
+	"""
+	regressions = []
+	for scenario, stages in sorted(results.items()):
+		for stage, result in sorted(stages.items()):
+			baseline = get_baseline(baselines, scenario, stage)
+			if baseline is None:
+				continue
+			seconds = result['seconds']
+			allowed = get_allowed_slowdown(result, baseline, tolerance)
+			if seconds > baseline[0] * (1.0 + allowed) and seconds - baseline[0] > MIN_DELTA:
+				regressions.append((scenario, stage, seconds, baseline[0], allowed))
+	return regressions
+
+def format_report(results, baselines):
+	lines = ['{0:<10} {1:<12} {2:>10} {3:>7} {4:>10} {5:>7} {6:>9} {7:>8}'.format(
+	        'scenario', 'stage', 'seconds', 'spread', 'baseline', 'ratio', 'calls', 'nodes')]
+	for scenario in sorted(results, key=lambda name: [int(part) for part in name.split('x')]):
+		for stage in STAGES:
+			if stage not in results[scenario]:
+				continue
+			result = results[scenario][stage]
+			baseline = get_baseline(baselines, scenario, stage)
+			lines.append('{0:<10} {1:<12} {2:>10.4f} {3:>7.2f} {4:>10} {5:>7} {6:>9} {7:>8}'.format(
+			        scenario,
+			        stage,
+			        result['seconds'],
+			        result.get('spread', 0.0),
+			        '{0:.4f}'.format(baseline[0]) if baseline is not None else '-',
+			        '{0:.2f}'.format(result['seconds'] / baseline[0]) if baseline and baseline[0] else '-',
+			        result['calls'],
+			        result['nodes'],
+			))
+	return '\n'.join(lines)
+
+def load_baselines(path=BASELINE_FILE):
+	if not os.path.exists(path):
+		return {}
+	with open(path) as handle:
+		return json.load(handle)
+
+def save_baselines(results, path=BASELINE_FILE):
+	baselines = load_baselines(path)
+	for scenario, stages in results.items():
+		baselines[scenario] = dict(
+		        (stage, {'seconds' : round(result['seconds'], 4), 'spread' : round(result.get('spread', 0.0), 4)})
+		        for stage, result in stages.items()
+		)
+	with open(path, 'w') as handle:
+		json.dump(baselines, handle, indent=2, sort_keys=True)
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Overlap tool benchmarks on the headless fake scene.")
+	parser.add_argument('--quick', action='store_true', help="Only run the small rigs")
+	parser.add_argument('--scenario', action='append', help="Run a single CHAINSxJOINTS scenario, may repeat")
+	parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Allowed slowdown before a regression")
+	parser.add_argument('--repeats', type=int, default=REPEATS, help="Runs of every scenario, stages keep the median")
+	parser.add_argument('--update-baselines', action='store_true', help="Store the results as the new baselines")
+	parser.add_argument('--output', help="Write the raw results to a JSON file")
+	parser.add_argument('--profile-dir', help="Write a profiling report of every tool call to this directory")
+	parser.add_argument('--goal-binding', choices=overlap_scene.GOAL_BINDINGS, help="How chains bind their goal curve")
+	parser.add_argument('--drive-mode', choices=overlap_scene.DRIVE_MODES, help="How chains drive the original controls")
+	parser.add_argument('--orient-mode', choices=overlap_scene.ORIENT_MODES, help="How chains orient their dynamic joints")
+	parser.add_argument('--resolution', type=int, help="Points chains are simulated on, 0 for every joint")
+	args = parser.parse_args(argv)
+	if args.profile_dir:
+		profiling.configure(enabled=True, report_dir=args.profile_dir)
+	if args.goal_binding:
+		overlap_scene.GOAL_BINDING = args.goal_binding
+	if args.drive_mode:
+		overlap_scene.DRIVE_MODE = args.drive_mode
+	if args.orient_mode:
+		overlap_scene.ORIENT_MODE = args.orient_mode
+	if args.resolution is not None:
+		overlap_scene.SIM_RESOLUTION = args.resolution
+
+	if args.scenario:
+		scenarios = [tuple(int(part) for part in name.split('x')) for name in args.scenario]
+	else:
+		scenarios = QUICK_SCENARIOS if args.quick else SCENARIOS
+	results = run_scenarios(scenarios, args.repeats)
+
+	baselines = load_baselines()
+	print(format_report(results, baselines))
+	if args.output:
+		with open(args.output, 'w') as handle:
+			json.dump(results, handle, indent=2, sort_keys=True)
+	if args.update_baselines:
+		save_baselines(results)
+		print("Baselines written to {0}".format(BASELINE_FILE))
+		return 0
+	regressions = compare(results, baselines, args.tolerance)
+	for scenario, stage, seconds, baseline, allowed in regressions:
+		print("REGRESSION {0} {1}: {2:.4f}s against a baseline of {3:.4f}s, {4:.0%} slower allowed".format(
+		        scenario, stage, seconds, baseline, allowed))
+	return 1 if regressions else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
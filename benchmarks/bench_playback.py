@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Playback benchmark for the overlap tool, run with mayapy.  bench_overlap
+    times the tool's own commands in the fake scene, this times what the
+    chains it builds cost the scene afterwards.  For every setup mode the same
+    FK rig is built in a new scene and every chain of it is made dynamic.  The
+    scene is then stepped through the frame range from the first frame, as
+    playback does, evaluating the world matrix of every original control.  The
+    node count and frames per second of every mode are reported side by side.
+
+    mayapy benchmarks/bench_playback.py
+    mayapy benchmarks/bench_playback.py --chains 50 --joints 20 --frames 200
+    mayapy benchmarks/bench_playback.py --mode cluster --mode skinCluster
+    mayapy benchmarks/bench_playback.py --mode cluster --mode matrix
+
+@applications:
+    - Maya
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+import argparse
+import json
+import os
+import sys
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+# Maya has to be running before the scene module is imported
+import maya.standalone
+maya.standalone.initialize(name='python')
+import maya.cmds as mc
+from overlap_tool import scene as overlap_scene
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+CHAINS = 50
+JOINTS = 20
+FRAMES = 200
+
+# Mode name -> overlap_tool.scene globals the chains are built with, in report order
+MODES = [
+	('cluster', {'GOAL_BINDING' : overlap_scene.CLUSTER_BINDING}),
+	('skinCluster', {'GOAL_BINDING' : overlap_scene.SKIN_BINDING}),
+	('matrix', {'DRIVE_MODE' : overlap_scene.MATRIX_DRIVE}),
+	('skin+matrix', {
+		'GOAL_BINDING' : overlap_scene.SKIN_BINDING,
+		'DRIVE_MODE' : overlap_scene.MATRIX_DRIVE,
+	}),
+]
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def build_rig(num_chains, num_joints, frames):
+	""" Build a character of FK chains, control > joint > control > joint ...,
+	laid out like the bench_overlap rig and keyed to swing over the frame range.
+	Returns:
+		chains : (list)
+			(base control, end control) of every chain
+	"""
+	root = mc.createNode('transform', name='character_GRP', skipSelect=True)
+	chains = []
+	for c in range(num_chains):
+		parent = mc.createNode('transform', name='chain{0}_GRP'.format(c), parent=root, skipSelect=True)
+		mc.setAttr('{0}.translateZ'.format(parent), float(c))
+		controls = []
+		for i in range(num_joints):
+			control = mc.createNode('transform', name='chain{0}_{1}_CON'.format(c, i), parent=parent, skipSelect=True)
+			mc.setAttr('{0}.translateX'.format(control), 1.0 if i else 0.0)
+			for frame, value in ((1, 0.0), (frames // 2, 45.0), (frames, 0.0)):
+				mc.setKeyframe(control, attribute='rotateZ', time=frame, value=value)
+			parent = mc.createNode('joint', name='chain{0}_{1}_JNT'.format(c, i), parent=control, skipSelect=True)
+			controls.append(control)
+		chains.append((controls[0], controls[-1]))
+	return chains
+
+def time_playback(plugs, frames):
+	""" Step through the frame range from the first frame, evaluating plugs on
+	every frame.
+	Returns:
+		seconds : (float)
+	"""
+	mc.currentTime(1, update=True)
+	start = timeit.default_timer()
+	for frame in range(1, frames + 1):
+		mc.currentTime(frame, update=True)
+		mc.dgeval(plugs)
+	return timeit.default_timer() - start
+
+def run_mode(settings, num_chains, num_joints, frames):
+	""" Build the rig and its chains in a new scene with settings and time playback.
+	Returns:
+		result : (dict)
+			nodes added by the chains, setup and playback seconds and fps
+	"""
+	mc.file(new=True, force=True)
+	mc.playbackOptions(minTime=1, maxTime=frames)
+	chains = build_rig(num_chains, num_joints, frames)
+	originals = dict((name, getattr(overlap_scene, name)) for name in settings)
+	nodes = len(mc.ls())
+	try:
+		for name, value in settings.items():
+			setattr(overlap_scene, name, value)
+		start = timeit.default_timer()
+		for base_ctrl, end_ctrl in chains:
+			overlap_scene.create_chain([base_ctrl, end_ctrl])
+		setup = timeit.default_timer() - start
+	finally:
+		for name, value in originals.items():
+			setattr(overlap_scene, name, value)
+	nodes = len(mc.ls()) - nodes
+	plugs = ['{0}.worldMatrix[0]'.format(control) for control in mc.ls('chain*_*_CON', type='transform')]
+	seconds = time_playback(plugs, frames)
+	return {
+		'nodes' : nodes,
+		'nodesPerChain' : nodes / float(num_chains),
+		'setup' : setup,
+		'seconds' : seconds,
+		'fps' : frames / seconds,
+	}
+
+def format_report(results, modes):
+	lines = ['{0:<14} {1:>8} {2:>10} {3:>9} {4:>10} {5:>8} {6:>7}'.format(
+	        'mode', 'nodes', 'per chain', 'setup', 'playback', 'fps', 'speed')]
+	reference = results[modes[0]]['fps']
+	for mode in modes:
+		result = results[mode]
+		lines.append('{0:<14} {1:>8} {2:>10.1f} {3:>8.2f}s {4:>9.2f}s {5:>8.1f} {6:>6.2f}x'.format(
+		        mode,
+		        result['nodes'],
+		        result['nodesPerChain'],
+		        result['setup'],
+		        result['seconds'],
+		        result['fps'],
+		        result['fps'] / reference,
+		))
+	return '\n'.join(lines)
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def main(argv=None):
+	mode_names = [name for name, _ in MODES]
+	parser = argparse.ArgumentParser(description="Overlap tool playback speed in Maya.")
+	parser.add_argument('--chains', type=int, default=CHAINS, help="Chains in the rig")
+	parser.add_argument('--joints', type=int, default=JOINTS, help="Joints per chain")
+	parser.add_argument('--frames', type=int, default=FRAMES, help="Frames to play")
+	parser.add_argument('--mode', action='append', choices=mode_names, help="Only run this mode, may repeat")
+	parser.add_argument('--output', help="Write the raw results to a JSON file")
+	args = parser.parse_args(argv)
+
+	modes = args.mode or mode_names
+	settings = dict(MODES)
+	results = {}
+	for mode in modes:
+		results[mode] = run_mode(settings[mode], args.chains, args.joints, args.frames)
+	print("{0} chains of {1} joints over {2} frames, evaluation manager {3}".format(
+	        args.chains,
+	        args.joints,
+	        args.frames,
+	        mc.evaluationManager(query=True, mode=True)[0]
+	))
+	print(format_report(results, modes))
+	if args.output:
+		with open(args.output, 'w') as handle:
+			json.dump(results, handle, indent=2, sort_keys=True)
+	return 0
+
+if __name__ == '__main__':
+	try:
+		code = main()
+	finally:
+		maya.standalone.uninitialize()
+	sys.exit(code)
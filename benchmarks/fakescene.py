@@ -0,0 +1,1424 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Headless stand-in for the parts of Maya and PyMEL the overlap tool uses.  An in-memory scene holds transforms, joints, attributes,
+    keys, connections and the selection, and the subset of maya.cmds, maya.mel,
+    maya.api and pymel.core calls made by create_dynamic_chain,
+    delete_dynamic_chain, bake_dynamic_chain and the prefs functions is
+    implemented on top of it.  Every command call and created node is counted.
+
+    install() registers the fake modules in sys.modules, so it has to run before
+    overlap_tool.scene is imported:
+
+        import fakescene
+        scene = fakescene.install()
+        from overlap_tool import scene
+
+    Dynamics and constraints are not evaluated.  Keyed channels are read at the
+    current time, or the time getAttr is given, and world space comes from the
+    translate, rotate (xyz order) and scale of every parent, so moving
+    characters sample the way they would in Maya.  The scene only needs to
+    behave well enough for the tool's own code paths to run and cost roughly
+    what they would in Maya.
+
+@applications:
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+import bisect
+import fnmatch
+import math
+import re
+import sys
+import types
+
+# External
+import numpy
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+MODULE_NAMES = [
+	'maya',
+	'maya.cmds',
+	'maya.mel',
+	'maya.api',
+	'maya.api.OpenMaya',
+	'maya.api.OpenMayaAnim',
+	'pymel',
+	'pymel.core',
+]
+
+SHORT_ATTRS = {
+	'tx' : 'translateX', 'ty' : 'translateY', 'tz' : 'translateZ',
+	'rx' : 'rotateX', 'ry' : 'rotateY', 'rz' : 'rotateZ',
+	'sx' : 'scaleX', 'sy' : 'scaleY', 'sz' : 'scaleZ',
+	'v' : 'visibility',
+}
+TRANSFORM_DEFAULTS = {
+	'translateX' : 0.0, 'translateY' : 0.0, 'translateZ' : 0.0,
+	'rotateX' : 0.0, 'rotateY' : 0.0, 'rotateZ' : 0.0,
+	'scaleX' : 1.0, 'scaleY' : 1.0, 'scaleZ' : 1.0,
+	'visibility' : True, 'lodVisibility' : True,
+}
+COMPOUND_ATTRS = {
+	'translate' : ('translateX', 'translateY', 'translateZ'),
+	'rotate' : ('rotateX', 'rotateY', 'rotateZ'),
+	'scale' : ('scaleX', 'scaleY', 'scaleZ'),
+}
+# Channels a DAG node's own matrix is built from, in order
+LOCAL_CHANNELS = COMPOUND_ATTRS['translate'] + COMPOUND_ATTRS['rotate'] + COMPOUND_ATTRS['scale']
+# Matrix plugs of DAG nodes, row vector convention like Maya
+MATRIX_ATTRS = set([
+	'matrix', 'inverseMatrix',
+	'worldMatrix[0]', 'worldInverseMatrix[0]',
+	'parentMatrix[0]', 'parentInverseMatrix[0]',
+	'offsetParentMatrix',
+])
+BAKE_CHANNELS = [
+	'translateX', 'translateY', 'translateZ',
+	'rotateX', 'rotateY', 'rotateZ',
+	'scaleX', 'scaleY', 'scaleZ',
+	'visibility',
+]
+IDENTITY = numpy.identity(4)
+# MNodeMessage.AttributeMessage flags passed to attributeChanged callbacks
+CONNECTION_MADE = 1
+CONNECTION_BROKEN = 2
+ATTRIBUTE_SET = 8
+# Commands that never edit the scene and keep the world matrix cache
+QUERY_COMMANDS = set([
+	'attributeExists',
+	'currentTime',
+	'getAttr',
+	'listAttr',
+	'ls',
+	'objExists',
+	'xform',
+])
+UI_DEFAULTS = {
+	'sliderLag' : 3.0,
+	'startFrame' : 0,
+	'endFrame' : 400,
+	'bakeWorkers' : 1,
+	'bakeShardFrames' : 0,
+	'bakeKeyTolerance' : 0.0,
+}
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def rotation_matrix(angles):
+	""" Row vector rotation of xyz rotate order angles in degrees. """
+	x, y, z = [math.radians(angle) for angle in angles]
+	rotate_x = numpy.array([[1.0, 0.0, 0.0], [0.0, math.cos(x), math.sin(x)], [0.0, -math.sin(x), math.cos(x)]])
+	rotate_y = numpy.array([[math.cos(y), 0.0, -math.sin(y)], [0.0, 1.0, 0.0], [math.sin(y), 0.0, math.cos(y)]])
+	rotate_z = numpy.array([[math.cos(z), math.sin(z), 0.0], [-math.sin(z), math.cos(z), 0.0], [0.0, 0.0, 1.0]])
+	return rotate_x.dot(rotate_y).dot(rotate_z)
+
+def compose_matrix(translate, rotate, scale):
+	""" Row vector matrix scaling, then rotating, then translating. """
+	matrix = IDENTITY.copy()
+	# Most nodes only translate, skip the trigonometry for them
+	if any(rotate):
+		matrix[:3, :3] = rotation_matrix(rotate)
+	if any(value != 1.0 for value in scale):
+		matrix[:3, :3] *= numpy.asarray(scale, dtype=numpy.float64)[:, None]
+	matrix[3, :3] = translate
+	return matrix
+
+def decompose_matrix(matrix):
+	""" Translate, xyz rotate in degrees and scale of a matrix with no shear. """
+	scale = numpy.linalg.norm(matrix[:3, :3], axis=1)
+	rotation = matrix[:3, :3] / numpy.where(scale > 0.0, scale, 1.0)[:, None]
+	rotate = [
+		math.degrees(math.atan2(rotation[1, 2], rotation[2, 2])),
+		math.degrees(math.asin(max(-1.0, min(1.0, -rotation[0, 2])))),
+		math.degrees(math.atan2(rotation[0, 1], rotation[0, 0])),
+	]
+	return [float(value) for value in matrix[3, :3]], rotate, [float(value) for value in scale]
+
+def inverse_matrix(matrix):
+	""" Inverse of an affine row vector matrix.  Pure translations invert exactly. """
+	inverse = numpy.identity(4)
+	inverse[:3, :3] = numpy.linalg.inv(matrix[:3, :3])
+	inverse[3, :3] = -matrix[3, :3].dot(inverse[:3, :3])
+	return inverse
+
+def evaluate_keys(keys, time):
+	""" Value of a curve at a time, linear between keys and flat past the ends.
+	Boolean keys are stepped.
+	"""
+	value = keys.get(time)
+	if value is not None:
+		return value
+	times = sorted(keys)
+	index = bisect.bisect_left(times, time)
+	if index == 0:
+		return keys[times[0]]
+	if index == len(times):
+		return keys[times[-1]]
+	before, after = times[index - 1], times[index]
+	start, end = keys[before], keys[after]
+	if isinstance(start, bool):
+		return start
+	return start + (end - start) * (time - before) / (after - before)
+
+#---------------------------------------------------------------------------------#
+# Nodes
+#---------------------------------------------------------------------------------#
+class MayaNodeError(RuntimeError):
+	""" Raised where Maya would fail on a missing node or attribute. """
+
+class DependNode(object):
+	""" Stand-in for a PyNode.  Converts to its name like a PyNode does. """
+	node_type = 'dependNode'
+	dag = False
+
+	def __init__(self, scene, name, node_type=None):
+		self.scene = scene
+		self.name = name
+		if node_type:
+			self.node_type = node_type
+		self.attrs = {}
+		self.user_attrs = []
+		self.locked = set()
+		self.keys = {}
+		# Message attr -> {index: source node}, held by node so renames keep them
+		self.links = {}
+		# Deformer nodes feeding the node, deleted along with it
+		self.history = []
+
+	def __str__(self):
+		return self.name
+
+	def __repr__(self):
+		return "{0}('{1}')".format(type(self).__name__, self.name)
+
+	def __add__(self, other):
+		return self.name + other
+
+	def __radd__(self, other):
+		return other + self.name
+
+	def nodeType(self):
+		return self.node_type
+
+	def has_attr(self, attr):
+		return attr in self.attrs
+
+class Ramp(DependNode):
+	""" Ramp texture, made with Maya's three default color entries.  Further
+	entries exist as soon as they are set.
+	"""
+	node_type = 'ramp'
+	ENTRY_ATTR = re.compile(r'colorEntryList\[\d+\]\.(position|color[RGB]?)$')
+
+	def __init__(self, scene, name, node_type=None):
+		DependNode.__init__(self, scene, name, node_type)
+		self.attrs.update({'type' : 0, 'interpolation' : 1})
+		for i, color in enumerate([(1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)]):
+			self.attrs['colorEntryList[{0}].position'.format(i)] = i * 0.5
+			for channel, value in zip('RGB', color):
+				self.attrs['colorEntryList[{0}].color{1}'.format(i, channel)] = value
+
+	def has_attr(self, attr):
+		return attr in self.attrs or bool(self.ENTRY_ATTR.match(attr))
+
+class AnimCurve(DependNode):
+	""" Anim curve node.  Its keys are the same dict a driven node holds in
+	keys, so reconnecting the curve moves the animation without copying it.
+	"""
+	node_type = 'animCurve'
+
+	def __init__(self, scene, name, node_type=None):
+		DependNode.__init__(self, scene, name, node_type)
+		self.data = {}
+		# (node name, attr) of every plug the curve drives
+		self.outputs = set()
+
+class DagNode(DependNode):
+	dag = True
+
+	def __init__(self, scene, name, node_type=None):
+		DependNode.__init__(self, scene, name, node_type)
+		self.parent = None
+		self.children = []
+
+	def getChildren(self):
+		return list(self.children)
+
+	def getParent(self):
+		return self.parent
+
+	def has_attr(self, attr):
+		return attr in self.attrs or attr in TRANSFORM_DEFAULTS or attr in COMPOUND_ATTRS
+
+	def world_position(self):
+		return self.scene.world_position(self)
+
+class Transform(DagNode):
+	node_type = 'transform'
+
+class Joint(Transform):
+	node_type = 'joint'
+
+class Shape(DagNode):
+	node_type = 'shape'
+
+#---------------------------------------------------------------------------------#
+# Scene
+#---------------------------------------------------------------------------------#
+class FakeScene(object):
+	""" In-memory scene and the commands that operate on it. """
+	def __init__(self):
+		self.reset()
+
+	def reset(self):
+		self.nodes = {}
+		self.selection = []
+		self.connections = {}
+		# Node name -> destination plugs of the connections touching it
+		self._node_connections = {}
+		self.clipboard = {}
+		self.current_time = 1.0
+		self.ui = dict(UI_DEFAULTS)
+		self.messages = []
+		self.calls = {}
+		self.nodes_created = 0
+		self._name_counters = {}
+		self._cluster_count = 0
+		self.undo_chunks = []
+		self.refresh_suspended = False
+		self.evaluation_mode = 'parallel'
+		# World matrices per time, reused until a command that may edit the scene runs
+		self._world_cache = {}
+		# id of a node.keys[attr] dict -> the AnimCurve node holding it
+		self._curve_nodes = {}
+		# Node -> {callback id : (function, client data)} of attributeChanged callbacks
+		self.attr_callbacks = {}
+		self._callback_ids = 0
+		self._script_nodes = []
+
+	#-------------------------------------------------------------------------#
+	# Bookkeeping
+
+	def message(self, text):
+		self.messages.append(text)
+
+	def count(self, command):
+		self.calls[command] = self.calls.get(command, 0) + 1
+		if command not in QUERY_COMMANDS:
+			self._world_cache.clear()
+
+	def local_matrix(self, node, time=None):
+		""" Matrix of a node's own channels. """
+		time = self.current_time if time is None else float(time)
+		values = []
+		for attr in LOCAL_CHANNELS:
+			keys = node.keys.get(attr)
+			values.append(float(evaluate_keys(keys, time) if keys else node.attrs.get(attr, TRANSFORM_DEFAULTS[attr])))
+		return compose_matrix(values[:3], values[3:6], values[6:])
+
+	def offset_parent_matrix(self, node):
+		matrix = node.attrs.get('offsetParentMatrix')
+		return IDENTITY if matrix is None else numpy.reshape(matrix, (4, 4))
+
+	def world_matrix(self, node, time=None):
+		""" World matrix of a DAG node, None for the world.  Matrices are
+		cached per time.
+		"""
+		if node is None:
+			return IDENTITY
+		time = self.current_time if time is None else float(time)
+		cache = self._world_cache.setdefault(time, {})
+		# Walk up to the nearest cached ancestor, then fill the cache back down
+		path = []
+		current = node
+		while current is not None and current.name not in cache:
+			path.append(current)
+			current = current.parent
+		matrix = cache[current.name] if current is not None else IDENTITY
+		for current in reversed(path):
+			local = self.local_matrix(current, time)
+			if 'offsetParentMatrix' in current.attrs:
+				local = local.dot(self.offset_parent_matrix(current))
+			matrix = local.dot(matrix)
+			cache[current.name] = matrix
+		return matrix
+
+	def world_position(self, node, time=None):
+		return [float(value) for value in self.world_matrix(node, time)[3, :3]]
+
+	def unique_name(self, name):
+		""" Maya style unique naming, trailing digits are incremented. """
+		if name not in self.nodes:
+			return name
+		base = name.rstrip('0123456789')
+		number = self._name_counters.get(base, 0)
+		while True:
+			number += 1
+			candidate = '{0}{1}'.format(base, number)
+			if candidate not in self.nodes:
+				self._name_counters[base] = number
+				return candidate
+
+	def create(self, cls, name, parent=None, node_type=None):
+		node = cls(self, self.unique_name(name), node_type)
+		self.nodes[node.name] = node
+		self.nodes_created += 1
+		if parent is not None:
+			self.reparent(node, parent)
+		return node
+
+	def node(self, name):
+		""" Resolve a node, node name, DAG path or plug to its node. """
+		if isinstance(name, DependNode):
+			if name.name not in self.nodes:
+				raise MayaNodeError("No object matches name: {0}".format(name))
+			return name
+		name = str(name).split('.', 1)[0].rsplit('|', 1)[-1]
+		try:
+			return self.nodes[name]
+		except KeyError:
+			raise MayaNodeError("No object matches name: {0}".format(name))
+
+	def plug(self, plug):
+		""" Split a node.attr plug into its node and long attribute name. """
+		node_name, attr = str(plug).split('.', 1)
+		attr = SHORT_ATTRS.get(attr, attr)
+		return self.node(node_name), attr
+
+	def flatten(self, items):
+		flat = []
+		for item in items:
+			if isinstance(item, (list, tuple)):
+				flat.extend(self.flatten(item))
+			elif item is not None:
+				flat.append(item)
+		return flat
+
+	def reparent(self, node, parent):
+		""" Move a DAG node under parent (None for world) keeping its world transform. """
+		world = self.world_matrix(node)
+		if node.parent is not None:
+			node.parent.children.remove(node)
+		node.parent = parent
+		if parent is not None:
+			parent.children.append(node)
+		above = self.world_matrix(parent)
+		if 'offsetParentMatrix' in node.attrs:
+			above = self.offset_parent_matrix(node).dot(above)
+		# Identity rotations and scales are only written where the node has them
+		translate, rotate, scale = decompose_matrix(world.dot(inverse_matrix(above)))
+		for attr, values, default in (('translate', translate, None), ('rotate', rotate, 0.0), ('scale', scale, 1.0)):
+			for child, value in zip(COMPOUND_ATTRS[attr], values):
+				if child in node.attrs or default is None or abs(value - default) > 1e-12:
+					node.attrs[child] = value
+		self._world_cache.clear()
+
+	def anim_curve(self, node, attr):
+		""" The curve node driving node.attr, made the first time it is asked for. """
+		data = node.keys[attr]
+		curve = self._curve_nodes.get(id(data))
+		if curve is None or curve.name not in self.nodes:
+			curve = self.create(AnimCurve, '{0}_{1}'.format(node.name, attr))
+			curve.data = data
+			self._curve_nodes[id(data)] = curve
+		curve.outputs.add((node.name, attr))
+		return curve
+
+	def add_attr_callback(self, node, function, client_data=None):
+		self._callback_ids += 1
+		self.attr_callbacks.setdefault(node, {})[self._callback_ids] = (function, client_data)
+		return self._callback_ids
+
+	def remove_callback(self, callback_id):
+		for callbacks in self.attr_callbacks.values():
+			callbacks.pop(callback_id, None)
+
+	def attr_changed(self, node, attr, message):
+		""" Run the attributeChanged callbacks of node, as Maya does after
+		node.attr is set, connected or disconnected.
+		"""
+		for function, client_data in list(self.attr_callbacks.get(node, {}).values()):
+			function(message, FakePlug(node, attr), None, client_data)
+
+	def _release_curves(self, node):
+		""" Delete the curves left driving nothing once node is gone, as Maya does. """
+		for attr, data in list(node.keys.items()):
+			curve = self._curve_nodes.get(id(data))
+			if curve is None:
+				continue
+			curve.outputs.discard((node.name, attr))
+			if not curve.outputs:
+				self.remove(curve)
+
+	def remove(self, node):
+		if node.name not in self.nodes:
+			return
+		if isinstance(node, AnimCurve):
+			for name, attr in node.outputs:
+				driven = self.nodes.get(name)
+				if driven is not None and driven.keys.get(attr) is node.data:
+					del driven.keys[attr]
+			self._curve_nodes.pop(id(node.data), None)
+		if node.dag and node.parent is not None:
+			node.parent.children.remove(node)
+		stack = [node]
+		while stack:
+			node = stack.pop()
+			if self.nodes.get(node.name) is not node:
+				continue
+			if node.dag:
+				stack.extend(node.children)
+			stack.extend(node.history)
+			del self.nodes[node.name]
+			self._release_curves(node)
+			if node in self.selection:
+				self.selection.remove(node)
+			for dst in self._node_connections.pop(node.name, ()):
+				self.connections.pop(dst, None)
+
+	#-------------------------------------------------------------------------#
+	# Selection and listing
+
+	def ls(self, *args, **kwargs):
+		self.count('ls')
+		if kwargs.get('selection') or kwargs.get('sl'):
+			return list(self.selection)
+		patterns = self.flatten(args)
+		if not patterns:
+			return list(self.nodes.values())
+		# Wildcards stay in the root namespace unless recursive, like Maya
+		recursive = kwargs.get('recursive') or kwargs.get('r')
+		found = []
+		for pattern in patterns:
+			pattern = str(pattern)
+			if '*' not in pattern and '?' not in pattern:
+				if pattern.rsplit('|', 1)[-1] in self.nodes:
+					found.append(self.node(pattern))
+				continue
+			if pattern.startswith('*') and not any(c in pattern[1:] for c in '*?[:'):
+				# A suffix ends the full name whenever it ends the name in its namespace
+				suffix = pattern[1:]
+				found.extend([
+				        node for name, node in self.nodes.items()
+				        if name.endswith(suffix) and (recursive or ':' not in name)
+				])
+				continue
+			if ':' in pattern:
+				candidates = list(self.nodes.items())
+			elif recursive:
+				candidates = [(name.rpartition(':')[2], node) for name, node in self.nodes.items()]
+			else:
+				candidates = [(name, node) for name, node in self.nodes.items() if ':' not in name]
+			found.extend([node for name, node in candidates if fnmatch.fnmatchcase(name, pattern)])
+		return found
+
+	def select(self, *args, **kwargs):
+		self.count('select')
+		if kwargs.get('deselect') or kwargs.get('d') or kwargs.get('clear') or kwargs.get('cl'):
+			if not args:
+				self.selection = []
+			else:
+				for node in self.flatten(args):
+					node = self.node(node)
+					if node in self.selection:
+						self.selection.remove(node)
+			return
+		nodes = [self.node(item) for item in self.flatten(args)]
+		if kwargs.get('add'):
+			self.selection.extend([node for node in nodes if node not in self.selection])
+		else:
+			self.selection = nodes
+
+	def listRelatives(self, *args, **kwargs):
+		self.count('listRelatives')
+		node = self.node(self.flatten(args)[0])
+		if kwargs.get('parent') or kwargs.get('p'):
+			return [node.parent] if node.dag and node.parent is not None else None
+		return list(node.children) if node.dag and node.children else None
+
+	def pickWalk(self, d='down', direction=None):
+		self.count('pickWalk')
+		direction = direction or d
+		walked = []
+		for node in self.selection:
+			if direction == 'up' and node.dag and node.parent is not None:
+				walked.append(node.parent)
+			elif direction == 'down' and node.dag and node.children:
+				walked.append(node.children[0])
+			else:
+				walked.append(node)
+		self.selection = walked
+		return list(walked)
+
+	def objExists(self, name):
+		self.count('objExists')
+		return str(name).split('.', 1)[0].rsplit('|', 1)[-1] in self.nodes
+
+	#-------------------------------------------------------------------------#
+	# Attributes
+
+	def getAttr(self, plug, time=None, **kwargs):
+		self.count('getAttr')
+		node, attr = self.plug(plug)
+		if attr in COMPOUND_ATTRS:
+			return [tuple(self._get_value(node, child, time) for child in COMPOUND_ATTRS[attr])]
+		return self._get_value(node, attr, time)
+
+	def _get_value(self, node, attr, time=None):
+		keys = node.keys.get(attr)
+		if keys:
+			return evaluate_keys(keys, self.current_time if time is None else float(time))
+		if attr in node.attrs:
+			value = node.attrs[attr]
+			return list(value) if isinstance(value, list) else value
+		if node.dag and attr in TRANSFORM_DEFAULTS:
+			return TRANSFORM_DEFAULTS[attr]
+		if node.dag and attr in MATRIX_ATTRS:
+			return self._get_matrix(node, attr, time)
+		raise MayaNodeError("{0}.{1} does not exist".format(node, attr))
+
+	def _get_matrix(self, node, attr, time=None):
+		""" Row major matrix of a DAG node. """
+		if attr == 'offsetParentMatrix':
+			matrix = IDENTITY
+		elif attr.startswith('world'):
+			matrix = self.world_matrix(node, time)
+		elif attr.startswith('parent'):
+			matrix = self.world_matrix(node.parent, time)
+		else:
+			matrix = self.local_matrix(node, time)
+		if 'nverse' in attr:
+			matrix = inverse_matrix(matrix)
+		return [float(value) for value in numpy.ravel(matrix)]
+
+	def setAttr(self, plug, *values, **kwargs):
+		self.count('setAttr')
+		node, attr = self.plug(plug)
+		if kwargs.get('type') == 'matrix':
+			node.attrs[attr] = [float(value) for value in (values[0] if len(values) == 1 else values)]
+			return
+		if not node.has_attr(attr):
+			raise MayaNodeError("{0}.{1} does not exist".format(node, attr))
+		if values:
+			if attr in node.locked:
+				raise MayaNodeError("The attribute '{0}.{1}' is locked".format(node, attr))
+			attr_type = kwargs.get('type')
+			if attr_type == 'doubleArray':
+				node.attrs[attr] = [float(value) for value in values[1:]]
+			elif attr_type == 'string':
+				node.attrs[attr] = str(values[0])
+			elif attr in COMPOUND_ATTRS:
+				values = values[0] if len(values) == 1 else values
+				for child, value in zip(COMPOUND_ATTRS[attr], values):
+					node.attrs[child] = value
+			else:
+				node.attrs[attr] = values[0]
+			self.attr_changed(node, attr, ATTRIBUTE_SET)
+		if kwargs.get('lock') or kwargs.get('l'):
+			node.locked.add(attr)
+		elif kwargs.get('lock') is False:
+			node.locked.discard(attr)
+
+	def addAttr(self, node, **kwargs):
+		self.count('addAttr')
+		node = self.node(node)
+		name = kwargs.get('ln') or kwargs.get('longName')
+		if node.has_attr(name) and name in node.attrs:
+			raise MayaNodeError("Found more than one attribute named {0}".format(name))
+		if kwargs.get('dt') or kwargs.get('dataType'):
+			node.attrs[name] = ''
+		elif kwargs.get('at', kwargs.get('attributeType')) == 'message':
+			node.attrs[name] = None
+		elif kwargs.get('at', kwargs.get('attributeType')) == 'matrix':
+			node.attrs[name] = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+		else:
+			node.attrs[name] = kwargs.get('dv', kwargs.get('defaultValue', 0.0))
+		node.user_attrs.append(name)
+
+	def deleteAttr(self, node, attribute=None, **kwargs):
+		self.count('deleteAttr')
+		node = self.node(node)
+		attr = attribute or kwargs.get('at')
+		if attr not in node.user_attrs:
+			raise MayaNodeError("{0}.{1} is not a dynamic attribute".format(node, attr))
+		node.user_attrs.remove(attr)
+		node.attrs.pop(attr, None)
+		node.links.pop(attr, None)
+		node.locked.discard(attr)
+
+	def listAttr(self, node, string=None, **kwargs):
+		self.count('listAttr')
+		node = self.node(node)
+		if kwargs.get('userDefined') or kwargs.get('ud'):
+			return list(node.user_attrs) or None
+		attrs = list(node.attrs)
+		if node.dag:
+			attrs.extend([attr for attr in TRANSFORM_DEFAULTS if attr not in node.attrs])
+		if string:
+			attrs = [attr for attr in attrs if fnmatch.fnmatchcase(attr, string)]
+		return attrs
+
+	def attributeExists(self, attr, node):
+		self.count('attributeExists')
+		if not self.objExists(node):
+			return False
+		return self.node(node).has_attr(attr)
+
+	def get_links(self, plug):
+		""" Live source nodes of a message plug in index order. """
+		node, attr = self.plug(plug)
+		links = node.links.get(attr, {})
+		return [links[index] for index in sorted(links) if self.nodes.get(links[index].name) is links[index]]
+
+	def listConnections(self, *args, **kwargs):
+		""" Only the sources of message plugs and the anim curves feeding nodes
+		are supported.
+		"""
+		self.count('listConnections')
+		source = kwargs.get('source', kwargs.get('s', True))
+		destination = kwargs.get('destination', kwargs.get('d', True))
+		if not source or destination:
+			raise NotImplementedError("The fake scene only lists the sources of connections")
+		node_type = kwargs.get('type', kwargs.get('t'))
+		if node_type is None:
+			result = []
+			for plug in self.flatten(args):
+				if '.' not in str(plug):
+					raise NotImplementedError("The fake scene only lists the connections of message plugs")
+				result.extend(self.get_links(plug))
+			return result or None
+		if node_type != 'animCurve':
+			raise NotImplementedError("The fake scene only lists the anim curves feeding nodes")
+		connections = kwargs.get('connections', kwargs.get('c'))
+		plugs = kwargs.get('plugs', kwargs.get('p'))
+		result = []
+		for node in [self.node(item) for item in self.flatten(args)]:
+			for attr in sorted(node.keys):
+				curve = self.anim_curve(node, attr)
+				if connections:
+					result.append('{0}.{1}'.format(node, attr))
+				result.append('{0}.output'.format(curve) if plugs else curve.name)
+		return result or None
+
+	def disconnectAttr(self, src, dst, **kwargs):
+		self.count('disconnectAttr')
+		src_node = self.plug(src)[0]
+		dst_node, attr = self.plug(dst)
+		if isinstance(src_node, AnimCurve):
+			if dst_node.keys.get(attr) is src_node.data:
+				del dst_node.keys[attr]
+			src_node.outputs.discard((dst_node.name, attr))
+		self.connections.pop(str(dst), None)
+		self.attr_changed(dst_node, attr, CONNECTION_BROKEN)
+
+	def connectAttr(self, src, dst, **kwargs):
+		self.count('connectAttr')
+		src_node = self.plug(src)[0]
+		dst_node = self.plug(dst)[0]
+		if isinstance(src_node, AnimCurve):
+			attr = self.plug(dst)[1]
+			dst_node.keys[attr] = src_node.data
+			src_node.outputs.add((dst_node.name, attr))
+			self.attr_changed(dst_node, attr, CONNECTION_MADE)
+		if self.plug(src)[1] == 'message':
+			attr, index = re.match(r'(\w+)(?:\[(\d+)\])?$', self.plug(dst)[1]).groups()
+			if not dst_node.has_attr(attr):
+				raise MayaNodeError("{0}.{1} does not exist".format(dst_node, attr))
+			links = dst_node.links.setdefault(attr, {})
+			if index is None:
+				# A single message attribute holds one connection
+				index = max(links) + 1 if links and (kwargs.get('nextAvailable') or kwargs.get('na')) else 0
+			links[int(index)] = src_node
+			return
+		self.connections[str(dst)] = str(src)
+		for node in (src_node, dst_node):
+			self._node_connections.setdefault(node.name, set()).add(str(dst))
+
+	#-------------------------------------------------------------------------#
+	# Creation
+
+	def joint(self, *args, **kwargs):
+		self.count('joint')
+		if kwargs.get('q') or kwargs.get('query'):
+			return self.node(args[0]).world_position()
+		parent = None
+		if self.selection and isinstance(self.selection[-1], Joint):
+			parent = self.selection[-1]
+		new_joint = self.create(Joint, kwargs.get('name') or kwargs.get('n') or 'joint1', parent)
+		position = kwargs.get('p') or kwargs.get('position') or (0.0, 0.0, 0.0)
+		local = numpy.append(numpy.asarray(position, dtype=numpy.float64), 1.0).dot(inverse_matrix(self.world_matrix(parent)))
+		for axis, attr in enumerate(COMPOUND_ATTRS['translate']):
+			new_joint.attrs[attr] = float(local[axis])
+		self.selection = [new_joint]
+		return new_joint
+
+	def createNode(self, node_type, name=None, parent=None, **kwargs):
+		self.count('createNode')
+		if node_type in ('transform', 'joint'):
+			cls = Joint if node_type == 'joint' else Transform
+			node = self.create(cls, name or '{0}1'.format(node_type), parent and self.node(parent))
+		elif node_type in ('implicitSphere', 'locator', 'nurbsCurve', 'particle'):
+			transform = parent and self.node(parent)
+			if transform is None:
+				transform = self.create(Transform, 'transform1')
+			node = self.create(Shape, name or '{0}1'.format(node_type), transform, node_type)
+		elif node_type == 'ramp':
+			node = self.create(Ramp, name or 'ramp1')
+		else:
+			node = self.create(DependNode, name or '{0}1'.format(node_type), node_type=node_type)
+		if not (kwargs.get('skipSelect') or kwargs.get('ss')):
+			self.selection = [node]
+		return node
+
+	def group(self, *args, **kwargs):
+		self.count('group')
+		members = [self.node(item) for item in self.flatten(args)]
+		if not members and not kwargs.get('empty') and not kwargs.get('em'):
+			members = [node for node in self.selection if node.dag]
+		parent = members[0].parent if members else None
+		new_group = self.create(Transform, kwargs.get('name') or kwargs.get('n') or 'group1', parent)
+		for member in members:
+			self.reparent(member, new_group)
+		self.selection = [new_group]
+		return new_group
+
+	def parent(self, *args, **kwargs):
+		self.count('parent')
+		items = self.flatten(args)
+		if kwargs.get('world') or kwargs.get('w') or (args and args[-1] is None):
+			children, target = items, None
+		else:
+			children, target = items[:-1], self.node(items[-1]) if items else None
+		children = [self.node(child) for child in children]
+		for child in children:
+			self.reparent(child, target)
+		return children
+
+	def rename(self, node, new_name):
+		self.count('rename')
+		node = self.node(node)
+		del self.nodes[node.name]
+		node.name = self.unique_name(str(new_name))
+		self.nodes[node.name] = node
+		return node
+
+	def duplicate(self, *args, **kwargs):
+		self.count('duplicate')
+		rename_children = kwargs.get('renameChildren') or kwargs.get('rc')
+		new_roots = []
+		for node in [self.node(item) for item in self.flatten(args)]:
+			if isinstance(node, AnimCurve):
+				copy = self.create(AnimCurve, node.name)
+				copy.data = dict(node.data)
+				self._curve_nodes[id(copy.data)] = copy
+				new_roots.append(copy)
+				continue
+			new_roots.append(self._copy(node, node.parent, rename_children))
+		self.selection = list(new_roots)
+		return new_roots
+
+	def _copy(self, node, parent, rename_children):
+		root = None
+		stack = [(node, parent)]
+		while stack:
+			source, parent = stack.pop()
+			copy = self.create(type(source), source.name, node_type=source.node_type)
+			copy.attrs = dict(source.attrs)
+			copy.user_attrs = list(source.user_attrs)
+			copy.locked = set(source.locked)
+			if root is None:
+				root = copy
+			if source.dag:
+				copy.parent = parent
+				if parent is not None:
+					parent.children.append(copy)
+				for child in reversed(source.children):
+					stack.append((child, copy))
+		return root
+
+	def delete(self, *args, **kwargs):
+		self.count('delete')
+		items = self.flatten(args) if args else list(self.selection)
+		# Like Maya, every node is looked up before any is deleted, so a node
+		# under another one in the list is fine
+		for node in [self.node(item) for item in items]:
+			self.remove(node)
+
+	def expression(self, s='', n='expression1', **kwargs):
+		self.count('expression')
+		node = self.create(DependNode, kwargs.get('name', n), node_type='expression')
+		node.attrs['expression'] = s
+		return node
+
+	def arrayMapper(self, **kwargs):
+		""" arrayMapper writing a per particle attribute of target from a ramp
+		looked up at another per particle attribute.
+		"""
+		self.count('arrayMapper')
+		target = self.node(kwargs.get('target') or kwargs.get('t'))
+		ramp = self.node(kwargs.get('mapTo') or kwargs.get('mt'))
+		mapper = self.create(DependNode, 'arrayMapper1', node_type='arrayMapper')
+		mapper.attrs.update({'minValue' : 0.0, 'maxValue' : 1.0})
+		self.connectAttr('{0}.outColor'.format(ramp), '{0}.computeNodeColor'.format(mapper))
+		self.connectAttr('{0}.{1}'.format(target, kwargs.get('inputV') or kwargs.get('iv')), '{0}.vCoordPP'.format(mapper))
+		self.connectAttr('{0}.outValuePP'.format(mapper), '{0}.{1}'.format(target, kwargs.get('destAttr') or kwargs.get('da')))
+		return [mapper]
+
+	def scriptNode(self, **kwargs):
+		""" Script node.  Python scripts of scriptType 7 run when the time changes. """
+		self.count('scriptNode')
+		node = self.create(DependNode, kwargs.get('name') or kwargs.get('n') or 'script1', node_type='script')
+		node.attrs['before'] = kwargs.get('beforeScript') or kwargs.get('bs') or ''
+		node.attrs['scriptType'] = kwargs.get('scriptType', kwargs.get('st', 0))
+		node.attrs['sourceType'] = kwargs.get('sourceType') or kwargs.get('stp') or 'mel'
+		self._script_nodes.append(node)
+		return node
+
+	def run_time_scripts(self):
+		self._script_nodes = [node for node in self._script_nodes if self.nodes.get(node.name) is node]
+		for node in list(self._script_nodes):
+			if node.attrs['scriptType'] == 7 and node.attrs['sourceType'] == 'python':
+				exec(compile(node.attrs['before'], node.name, 'exec'), {})
+
+	def constraint(self, constraint_type, *args, **kwargs):
+		self.count(constraint_type)
+		items = [self.node(item) for item in self.flatten(args)]
+		driven = items[-1]
+		node = self.create(
+		        Transform,
+		        '{0}_{1}1'.format(driven.name, constraint_type),
+		        driven,
+		        constraint_type
+		)
+		node.attrs['targets'] = [str(item) for item in items[:-1]]
+		return node
+
+	def ikHandle(self, **kwargs):
+		self.count('ikHandle')
+		start = kwargs.get('sj') or kwargs.get('startJoint')
+		end = kwargs.get('ee') or kwargs.get('endEffector')
+		if start is not None and end is not None:
+			start, end = self.node(start), self.node(end)
+		else:
+			start, end = self.selection[0], self.selection[1]
+		effector = self.create(Transform, 'effector1', end.parent, 'ikEffector')
+		handle = self.create(Transform, 'ikHandle1', node_type='ikHandle')
+		handle.attrs['startJoint'] = str(start)
+		handle.attrs['ikBlend'] = 1.0
+		self.selection = [handle]
+		return [handle, effector]
+
+	def curve(self, points):
+		""" Degree 1 curve through points. """
+		transform = self.create(Transform, 'curve1')
+		shape = self.create(Shape, '{0}Shape'.format(transform.name), transform, 'nurbsCurve')
+		shape.attrs['cvs'] = [list(point) for point in points]
+		transform.attrs['cvCount'] = len(points)
+		self.selection = [transform]
+		return transform
+
+	def dyn_create_soft(self):
+		""" Turn the selected curve into a soft body with a goal copy of the curve. """
+		self.count('dynCreateSoft')
+		curve = self.selection[0]
+		num_cvs = curve.attrs.get('cvCount', 0)
+		goal = self._copy(curve, curve.parent, True)
+		self.rename(goal, 'copyOf{0}'.format(curve.name))
+		particle = self.create(Transform, '{0}Particle'.format(curve.name), curve, 'particle')
+		shape = self.create(Shape, '{0}ParticleShape'.format(curve.name), particle, 'particle')
+		for node in (particle, shape):
+			node.attrs['goalPP'] = [1.0] * num_cvs
+			node.attrs['goalWeight[0]'] = 1.0
+			node.attrs['goalSmoothness'] = 3.0
+			node.attrs['conserve'] = 1.0
+		self.selection = [curve]
+
+	def create_deformer(self, node_type, name, geometry):
+		""" A deformer on geometry, with the set, groupId and groupParts nodes
+		Maya adds for every deformer.  They are all deleted with the geometry.
+		"""
+		deformer = self.create(DependNode, name, node_type=node_type)
+		geometry.history.append(deformer)
+		for suffix, set_type in (('Set', 'objectSet'), ('GroupId', 'groupId'), ('GroupParts', 'groupParts')):
+			geometry.history.append(self.create(DependNode, '{0}{1}'.format(deformer.name, suffix), node_type=set_type))
+		return deformer
+
+	def cluster(self, *args, **kwargs):
+		""" Cluster on the given components, the handle is selected. """
+		self.count('cluster')
+		geometry = [self.node(str(item).split('.', 1)[0]) for item in self.flatten(args)]
+		self._cluster_count += 1
+		deformer = self.create_deformer('cluster', 'cluster{0}'.format(self._cluster_count), geometry[0])
+		handle = self.create(Transform, 'cluster{0}Handle'.format(self._cluster_count), node_type='clusterHandle')
+		# Deleting the handle deletes the cluster
+		handle.history.append(deformer)
+		self.selection = [handle]
+		return [deformer, handle]
+
+	def skinCluster(self, *args, **kwargs):
+		""" Skin the last item to the influences before it. """
+		self.count('skinCluster')
+		items = [self.node(item) for item in self.flatten(args)]
+		name = kwargs.get('name') or kwargs.get('n') or 'skinCluster1'
+		skin = self.create_deformer('skinCluster', name, items[-1])
+		skin.attrs['influences'] = [str(item) for item in items[:-1]]
+		skin.attrs['maximumInfluences'] = kwargs.get('maximumInfluences', kwargs.get('mi', 5))
+		# Weights per CV index, as set through weightList[i].weights
+		skin.attrs['weightList'] = {}
+		return [skin]
+
+	#-------------------------------------------------------------------------#
+	# Keys
+
+	def copyKey(self, *args, **kwargs):
+		self.count('copyKey')
+		node = self.node(self.flatten(args)[0])
+		if not node.keys:
+			return 0
+		self.clipboard = dict((attr, dict(keys)) for attr, keys in node.keys.items())
+		return len(self.clipboard)
+
+	def pasteKey(self, *args, **kwargs):
+		self.count('pasteKey')
+		node = self.node(self.flatten(args)[0])
+		for attr, keys in self.clipboard.items():
+			node.keys.setdefault(attr, {}).update(keys)
+		return len(self.clipboard)
+
+	def cutKey(self, *args, **kwargs):
+		self.count('cutKey')
+		node = self.node(self.flatten(args)[0])
+		count = len(node.keys)
+		if not kwargs.get('clear'):
+			self.clipboard = dict(node.keys)
+		attrs = list(node.keys)
+		node.keys = {}
+		for attr in attrs:
+			self.attr_changed(node, attr, CONNECTION_BROKEN)
+		return count
+
+	def setKeyframe(self, plug, value=None, time=None, **kwargs):
+		self.count('setKeyframe')
+		node, attr = self.plug(plug)
+		time = self.current_time if time is None else time
+		value = self._get_value(node, attr) if value is None else value
+		if attr in node.keys:
+			node.keys[attr][float(time)] = value
+			self.attr_changed(self.anim_curve(node, attr), 'keyTimeValue', ATTRIBUTE_SET)
+		else:
+			# Keying an attribute the first time connects a new curve to it
+			node.keys[attr] = {float(time) : value}
+			self.attr_changed(node, attr, CONNECTION_MADE)
+
+	def currentTime(self, *args, **kwargs):
+		self.count('currentTime')
+		if kwargs.get('query') or kwargs.get('q'):
+			return self.current_time
+		if args:
+			self.current_time = float(args[0])
+			self.run_time_scripts()
+		return self.current_time
+
+	def xform(self, node, **kwargs):
+		self.count('xform')
+		component = re.match(r'(.+)\.cv\[(\d+)(?::(\d+))?\]$', str(node))
+		if component:
+			# Curve CVs, placed where the curve was built, flattened like Maya
+			transform = self.node(component.group(1))
+			shape = [child for child in transform.children if child.node_type == 'nurbsCurve'][0]
+			first = int(component.group(2))
+			last = int(component.group(3) or first)
+			points = numpy.array(shape.attrs['cvs'][first:last + 1], dtype=numpy.float64)
+			if kwargs.get('worldSpace') or kwargs.get('ws'):
+				matrix = self.world_matrix(transform)
+				points = points.dot(matrix[:3, :3]) + matrix[3, :3]
+			return [float(value) for value in points.ravel()]
+		node = self.node(node)
+		if kwargs.get('worldSpace') or kwargs.get('ws'):
+			return self.world_position(node)
+		return [node.attrs.get(attr, 0.0) for attr in COMPOUND_ATTRS['translate']]
+
+	def bake_results(self, joints, start, end):
+		""" Step time across the range keying every channel of every joint. """
+		self.count('bakeResults')
+		nodes = [self.node(joint) for joint in joints]
+		frame = start
+		while frame <= end:
+			self.current_time = frame
+			for node in nodes:
+				for attr in BAKE_CHANNELS:
+					node.keys.setdefault(attr, {})[frame] = self._get_value(node, attr)
+			frame += 1.0
+		self._world_cache.clear()
+
+	#-------------------------------------------------------------------------#
+	# Undo and refresh
+
+	def undoInfo(self, **kwargs):
+		self.count('undoInfo')
+		if kwargs.get('openChunk'):
+			self.undo_chunks.append(kwargs.get('chunkName', ''))
+		elif kwargs.get('closeChunk'):
+			if not self.undo_chunks:
+				raise MayaNodeError("No undo chunk is open")
+			self.undo_chunks.pop()
+
+	def refresh(self, **kwargs):
+		self.count('refresh')
+		if 'suspend' in kwargs:
+			self.refresh_suspended = bool(kwargs['suspend'])
+
+	def evaluationManager(self, **kwargs):
+		self.count('evaluationManager')
+		if kwargs.get('query'):
+			return [self.evaluation_mode]
+		if 'mode' in kwargs:
+			if kwargs['mode'] not in ('off', 'serial', 'parallel'):
+				raise MayaNodeError("Unknown evaluation mode {0}".format(kwargs['mode']))
+			self.evaluation_mode = kwargs['mode']
+
+	#-------------------------------------------------------------------------#
+	# MEL
+
+	def mel_eval(self, command):
+		self.count('mel.eval')
+		command = command.strip()
+		if command.startswith('curve '):
+			points = re.findall(r'-p\s+(\S+)\s+(\S+)\s+(\S+?)(?=\s|;|$)', command)
+			return str(self.curve([[float(value) for value in point] for point in points]))
+		if command.startswith('dynCreateSoft'):
+			return self.dyn_create_soft()
+		if command.startswith('setAttr ') and '.weightList[' in command:
+			# A batch of skinCluster weight rows
+			for name, index, first, last, values in re.findall(
+			        r'setAttr\s+"([^".]+)\.weightList\[(\d+)\]\.weights\[(\d+):(\d+)\]"\s+([^;]+);', command):
+				values = [float(value) for value in values.split()]
+				if len(values) != int(last) - int(first) + 1:
+					raise MayaNodeError("Expected {0} weights, got {1}".format(int(last) - int(first) + 1, len(values)))
+				weights = self.node(name).attrs['weightList'].setdefault(int(index), {})
+				weights.update(zip(range(int(first), int(last) + 1), values))
+			return None
+		if command.startswith('setAttr ') and '-type doubleArray' in command:
+			# A batch of per particle arrays
+			for plug, count, values in re.findall(r'setAttr\s+"([^"]+)"\s+-type\s+doubleArray\s+(\d+)\s*([^;]*);', command):
+				values = [float(value) for value in values.split()]
+				if len(values) != int(count):
+					raise MayaNodeError("Expected {0} values, got {1}".format(count, len(values)))
+				self.setAttr(plug, int(count), *values, type='doubleArray')
+			return None
+		if command.startswith('setAttr ') and '-type "matrix"' in command:
+			# A batch of matrix setAttr statements
+			for plug, values in re.findall(r'setAttr\s+"([^"]+)"\s+-type\s+"matrix"\s+([^;]+);', command):
+				self.setAttr(plug, [float(value) for value in values.split()], type='matrix')
+			return None
+		if command.startswith('setAttr '):
+			# A batch of numeric setAttr statements
+			for plug, value in re.findall(r'setAttr\s+"([^"]+)"\s+([^;\s]+)\s*;', command):
+				self.setAttr(plug, float(value))
+			return None
+		if command.startswith(('connectAttr ', 'disconnectAttr ')):
+			# A batch of connections
+			for name, src, dst in re.findall(r'(disconnectAttr|connectAttr)(?:\s+-f)?\s+"([^"]+)"\s+"([^"]+)"\s*;', command):
+				getattr(self, name)(src, dst)
+			return None
+		if command.startswith('bakeResults'):
+			start, end = re.search(r'-t\s+"([^:"]+):([^"]+)"', command).groups()
+			joints = re.findall(r'"([^"]+)"', command[command.index('{'):])
+			return self.bake_results(joints, float(start), float(end))
+		raise NotImplementedError("The fake scene cannot evaluate: {0}".format(command))
+
+	#-------------------------------------------------------------------------#
+	# UI
+
+	def ui_control(self, name=None, *args, **kwargs):
+		""" Generic UI control: remembers a value, answers queries from it. """
+		if kwargs.get('exists') or kwargs.get('ex'):
+			return name in self.ui
+		if kwargs.get('query') or kwargs.get('q'):
+			return self.ui.get(name)
+		if name is not None and 'value' in kwargs:
+			self.ui[name] = kwargs['value']
+		return name
+
+#---------------------------------------------------------------------------------#
+# Maya API
+#---------------------------------------------------------------------------------#
+class FakePlug(object):
+	def __init__(self, node, attr):
+		self.node = node
+		self.attr = attr
+
+	def partialName(self, *args, **kwargs):
+		return self.attr
+
+class FakeApi(object):
+	""" Builds the maya.api.OpenMaya and OpenMayaAnim stand-ins for a scene. """
+	def __init__(self, scene):
+		self.scene = scene
+
+	def open_maya(self):
+		scene = self.scene
+		module = types.ModuleType('maya.api.OpenMaya')
+
+		class MSelectionList(object):
+			def __init__(self):
+				self.items = []
+
+			def add(self, name):
+				self.items.append(str(name))
+
+			def getPlug(self, index):
+				node, attr = scene.plug(self.items[index])
+				return FakePlug(node, attr)
+
+			def getDependNode(self, index):
+				return scene.node(self.items[index])
+
+		class MNodeMessage(object):
+			kConnectionMade = CONNECTION_MADE
+			kConnectionBroken = CONNECTION_BROKEN
+			kAttributeSet = ATTRIBUTE_SET
+
+			@staticmethod
+			def addAttributeChangedCallback(node, function, clientData=None):
+				return scene.add_attr_callback(node, function, clientData)
+
+		class MMessage(object):
+			@staticmethod
+			def removeCallback(callback_id):
+				scene.remove_callback(callback_id)
+
+		class MTime(object):
+			def __init__(self, value=0.0, unit=None):
+				self.value = float(value)
+
+			@staticmethod
+			def uiUnit():
+				return 'film'
+
+			def asUnits(self, unit):
+				return self.value
+
+		module.MSelectionList = MSelectionList
+		module.MNodeMessage = MNodeMessage
+		module.MMessage = MMessage
+		module.MTime = MTime
+		module.MTimeArray = list
+		module.MDoubleArray = list
+		return module
+
+	def open_maya_anim(self):
+		scene = self.scene
+		module = types.ModuleType('maya.api.OpenMayaAnim')
+
+		class MAnimUtil(object):
+			@staticmethod
+			def findAnimation(plug):
+				return [plug] if plug.attr in plug.node.keys else []
+
+		class MFnAnimCurve(object):
+			kAnimCurveTA = 0
+			kAnimCurveTL = 1
+			kAnimCurveTU = 3
+			kTangentLinear = 2
+
+			def __init__(self, plug=None):
+				self.plug = plug
+				self._times = []
+
+			def create(self, plug, *args):
+				scene.count('MFnAnimCurve.create')
+				scene.nodes_created += 1
+				self.plug = plug
+				plug.node.keys.setdefault(plug.attr, {})
+
+			@property
+			def animCurveType(self):
+				if self.plug.attr.startswith('rotate'):
+					return self.kAnimCurveTA
+				if self.plug.attr.startswith('translate'):
+					return self.kAnimCurveTL
+				return self.kAnimCurveTU
+
+			def _keys(self):
+				return self.plug.node.keys.setdefault(self.plug.attr, {})
+
+			def _from_internal(self, value):
+				# Keys are stored in UI units, as maya.cmds sees them
+				if self.animCurveType == self.kAnimCurveTA:
+					return math.degrees(value)
+				return value
+
+			@property
+			def numKeys(self):
+				# Key times in order, reading a curve asks for numKeys first
+				self._times = sorted(self._keys())
+				return len(self._times)
+
+			def input(self, index):
+				return KeyTime(self._times[index])
+
+			def value(self, index):
+				scene.count('MFnAnimCurve.value')
+				value = self._keys()[self._times[index]]
+				if self.animCurveType == self.kAnimCurveTA:
+					return math.radians(value)
+				return value
+
+			def addKeys(self, times, values, tangent_in=None, tangent_out=None, keep_existing=False, *args):
+				scene.count('MFnAnimCurve.addKeys')
+				keys = self._keys()
+				if not keep_existing:
+					keys.clear()
+				keys.update(zip([time.value for time in times], [self._from_internal(value) for value in values]))
+
+		class KeyTime(object):
+			def __init__(self, value):
+				self.value = value
+
+			def asUnits(self, unit):
+				return self.value
+
+		module.MAnimUtil = MAnimUtil
+		module.MFnAnimCurve = MFnAnimCurve
+		return module
+
+#---------------------------------------------------------------------------------#
+# Modules
+#---------------------------------------------------------------------------------#
+def counted(scene, name, function):
+	def command(*args, **kwargs):
+		scene.count(name)
+		return function(*args, **kwargs)
+	command.__name__ = name
+	return command
+
+def to_names(value):
+	""" Convert command results to the strings maya.cmds would return. """
+	if isinstance(value, DependNode):
+		return value.name
+	if isinstance(value, list):
+		return [to_names(item) for item in value]
+	return value
+
+def build_modules(scene):
+	""" Build every stand-in module for a scene.
+	Returns:
+		modules : (dict)
+			Module name to module
+	"""
+	modules = dict((name, types.ModuleType(name)) for name in MODULE_NAMES)
+	ui = scene.ui_control
+	mel = types.SimpleNamespace() if hasattr(types, 'SimpleNamespace') else types.ModuleType('mel')
+	mel.eval = scene.mel_eval
+	mel.attributeExists = scene.attributeExists
+	mel.warning = counted(scene, 'warning', scene.message)
+
+	# PyMEL
+	commands = {
+		'ls' : scene.ls,
+		'select' : scene.select,
+		'pickWalk' : scene.pickWalk,
+		'listRelatives' : scene.listRelatives,
+		'cluster' : scene.cluster,
+		'skinCluster' : scene.skinCluster,
+		'objExists' : scene.objExists,
+		'getAttr' : scene.getAttr,
+		'setAttr' : scene.setAttr,
+		'addAttr' : scene.addAttr,
+		'listAttr' : scene.listAttr,
+		'connectAttr' : scene.connectAttr,
+		'disconnectAttr' : scene.disconnectAttr,
+		'deleteAttr' : scene.deleteAttr,
+		'listConnections' : scene.listConnections,
+		'joint' : scene.joint,
+		'createNode' : scene.createNode,
+		'group' : scene.group,
+		'parent' : scene.parent,
+		'rename' : scene.rename,
+		'duplicate' : scene.duplicate,
+		'delete' : scene.delete,
+		'expression' : scene.expression,
+		'arrayMapper' : scene.arrayMapper,
+		'scriptNode' : scene.scriptNode,
+		'ikHandle' : scene.ikHandle,
+		'copyKey' : scene.copyKey,
+		'pasteKey' : scene.pasteKey,
+		'cutKey' : scene.cutKey,
+		'setKeyframe' : scene.setKeyframe,
+		'currentTime' : scene.currentTime,
+		'xform' : scene.xform,
+		'parentConstraint' : lambda *args, **kwargs: scene.constraint('parentConstraint', *args, **kwargs),
+		'pointConstraint' : lambda *args, **kwargs: scene.constraint('pointConstraint', *args, **kwargs),
+		'scaleConstraint' : lambda *args, **kwargs: scene.constraint('scaleConstraint', *args, **kwargs),
+		'warning' : counted(scene, 'warning', scene.message),
+		'displayInfo' : counted(scene, 'displayInfo', scene.message),
+		'fileDialog' : lambda *args, **kwargs: scene.ui.get('fileDialog'),
+		'fileDialog2' : lambda *args, **kwargs: scene.ui.get('fileDialog2'),
+		'progressWindow' : lambda *args, **kwargs: False,
+		'undoInfo' : scene.undoInfo,
+		'refresh' : scene.refresh,
+		'evaluationManager' : scene.evaluationManager,
+	}
+	for name in ['floatField', 'floatSliderGrp', 'intField', 'checkBox', 'window', 'deleteUI', 'scrollLayout',
+	             'columnLayout', 'frameLayout', 'separator', 'setParent', 'text',
+	             'rowColumnLayout', 'button', 'showWindow']:
+		commands[name] = ui
+	pymel_core = modules['pymel.core']
+	for name, function in commands.items():
+		setattr(pymel_core, name, function)
+	pymel_core.mel = mel
+	pymel_core.Joint = Joint
+	pymel_core.Transform = Transform
+	pymel_core.DependNode = DependNode
+	pymel_core.__all__ = sorted(commands) + ['mel', 'Joint', 'Transform', 'DependNode']
+	modules['pymel'].core = pymel_core
+
+	# maya.cmds returns names rather than nodes
+	cmds = modules['maya.cmds']
+	for name, function in commands.items():
+		setattr(cmds, name, (lambda function: lambda *args, **kwargs: to_names(function(*args, **kwargs)))(function))
+	modules['maya.mel'].eval = scene.mel_eval
+	api = FakeApi(scene)
+	modules['maya.api.OpenMaya'] = api.open_maya()
+	modules['maya.api.OpenMayaAnim'] = api.open_maya_anim()
+	modules['maya'].cmds = cmds
+	modules['maya'].mel = modules['maya.mel']
+	modules['maya'].api = modules['maya.api']
+	modules['maya.api'].OpenMaya = modules['maya.api.OpenMaya']
+	modules['maya.api'].OpenMayaAnim = modules['maya.api.OpenMayaAnim']
+
+	return modules
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def install(scene=None):
+	""" Register the stand-in modules in sys.modules.
+	Args:
+		scene : (FakeScene)
+			Scene to operate on.  A new scene is created if not given
+	Returns:
+		scene : (FakeScene)
+	"""
+	scene = scene or FakeScene()
+	sys.modules.update(build_modules(scene))
+	return scene
+
+def uninstall():
+	""" Remove the stand-in modules and anything imported on top of them. """
+	for name in MODULE_NAMES:
+		sys.modules.pop(name, None)
+	for name in [name for name in sys.modules if name == 'overlap_tool' or name.startswith('overlap_tool.')]:
+		del sys.modules[name]
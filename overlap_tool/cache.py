@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Checkpointed solver state for the overlap tool.  The positions and
+    velocities of each chain are stored at regular frame intervals so scrubbing
+    resumes from the nearest checkpoint instead of the start frame, and a
+    parameter edit keyed at frame N only re-simulates from the checkpoint
+    before N.  Checkpoints of every chain share one memory budget and the least
+    recently used are evicted first.
+
+@applications:
+    - Maya
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+import bisect
+from collections import OrderedDict
+
+# External
+import numpy
+
+# Internal
+from overlap_tool import solver
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+CHECKPOINT_INTERVAL = 10
+MEMORY_BUDGET = 256 * 1024 * 1024
+
+#---------------------------------------------------------------------------------#
+# State Cache
+#---------------------------------------------------------------------------------#
+class StateCache(object):
+	""" Least recently used store of solver checkpoints keyed by chain and frame.
+	Args:
+		interval : (int)
+			Frames between checkpoints
+		budget : (int)
+			Maximum bytes of checkpoint data held across every chain
+	"""
+	def __init__(self, interval=CHECKPOINT_INTERVAL, budget=MEMORY_BUDGET):
+		self.interval = max(1, int(interval))
+		self.budget = int(budget)
+		self.nbytes = 0
+		self._entries = OrderedDict()
+		# Sorted checkpoint frames per chain for nearest lookups
+		self._frames = {}
+
+	def __len__(self):
+		return len(self._entries)
+
+	def is_checkpoint(self, frame, start_frame=0):
+		return (frame - start_frame) % self.interval == 0
+
+	def store(self, chain, frame, positions, velocities):
+		""" Store the state of a chain at a frame, evicting old checkpoints to
+		stay within the memory budget.
+		"""
+		key = (chain, frame)
+		if key in self._entries:
+			self._remove(key)
+		state = (positions.copy(), velocities.copy())
+		self._entries[key] = state
+		bisect.insort(self._frames.setdefault(chain, []), frame)
+		self.nbytes += state[0].nbytes + state[1].nbytes
+		while self.nbytes > self.budget and len(self._entries) > 1:
+			self._remove(next(iter(self._entries)))
+
+	def nearest(self, chain, frame):
+		""" Latest checkpoint of a chain at or before a frame.
+		Returns:
+			checkpoint : (tuple)
+				frame, positions and velocities, or None when there is no checkpoint
+		"""
+		frames = self._frames.get(chain, [])
+		index = bisect.bisect_right(frames, frame)
+		if index == 0:
+			return None
+		best = frames[index - 1]
+		key = (chain, best)
+		self._entries[key] = self._entries.pop(key)
+		positions, velocities = self._entries[key]
+		return best, positions, velocities
+
+	def invalidate(self, chain, from_frame=None):
+		""" Drop the checkpoints of a chain from a frame onwards, or all of them. """
+		frames = self._frames.get(chain, [])
+		index = 0 if from_frame is None else bisect.bisect_left(frames, from_frame)
+		for frame in frames[index:]:
+			self._remove((chain, frame))
+
+	def clear(self):
+		self._entries.clear()
+		self._frames.clear()
+		self.nbytes = 0
+
+	def _remove(self, key):
+		positions, velocities = self._entries.pop(key)
+		self.nbytes -= positions.nbytes + velocities.nbytes
+		frames = self._frames[key[0]]
+		del frames[bisect.bisect_left(frames, key[1])]
+		if not frames:
+			del self._frames[key[0]]
+
+#---------------------------------------------------------------------------------#
+# Cached Chain
+#---------------------------------------------------------------------------------#
+class CachedChain(object):
+	""" A single chain evaluated on demand through a StateCache.  Every frame
+	goes through the same steps as solver.solve_chain, length constraint and
+	pins included, so a scrub lands on the positions a full solve gives.
+	Parameters may be animated: attraction, lag and easeIn can be given per
+	frame and stiffness per frame and joint.
+	Args:
+		cache : (StateCache)
+			Shared checkpoint store
+		key : (str)
+			Name of the chain in the cache, usually the chain controller
+		goals : (numpy.ndarray)
+			Goal positions (frames, joints, 3) starting at start_frame
+		params : (dict)
+			Solver parameters as returned by solver.chain_parameters, with
+			pin_targets (frames, joints, 3) and rest_lengths as solve_chain
+			takes them
+		start_frame : (int)
+			Frame the goals and parameters start at
+	"""
+	def __init__(self, cache, key, goals, params, start_frame=0):
+		self.cache = cache
+		self.key = key
+		self.start_frame = int(start_frame)
+		self.goals = numpy.asarray(goals, dtype=numpy.float64)
+		self.params = params
+		self.blend, self.conserve = self._per_frame(params)
+		self.pin_weights, self.pin_targets = self._pins(params)
+		self.constraint = self._constraint(params, self.pin_weights)
+		self._last = None
+		# Anything cached under this key belongs to an older setup of the chain
+		self.cache.invalidate(self.key)
+
+	@property
+	def end_frame(self):
+		return self.start_frame + len(self.goals) - 1
+
+	def _per_frame(self, params):
+		""" Expand the solver parameters to a blend per frame and joint and a
+		conserve per frame.
+		"""
+		num_frames, num_joints = self.goals.shape[:2]
+		blend, conserve = solver.chain_blend(
+		        params.get('stiffness'),
+		        params.get('attraction', solver.MAGNETISM),
+		        params.get('lag', solver.DYN_SMOOTHNESS),
+		        params.get('ease_in', solver.EASE_IN)
+		)
+		blend = numpy.broadcast_to(blend, (num_frames, num_joints))
+		return blend, numpy.array(numpy.broadcast_to(conserve, (num_frames,)))
+
+	def _pins(self, params):
+		""" Pin weights and targets per frame, None when nothing is pinned. """
+		weights = params.get('pin_weights')
+		targets = params.get('pin_targets')
+		if weights is None or targets is None or not numpy.any(weights):
+			return None, None
+		targets = numpy.asarray(targets, dtype=numpy.float64)
+		if targets.shape != self.goals.shape:
+			raise ValueError("Pin targets must be shaped like the goal positions {0}.".format(self.goals.shape))
+		return numpy.clip(numpy.asarray(weights, dtype=numpy.float64), 0.0, 1.0), targets
+
+	def _constraint(self, params, pin_weights):
+		""" The length constraint solve_chain would build, None without iterations. """
+		iterations = int(params.get('iterations', solver.ITERATIONS))
+		if iterations <= 0:
+			return None
+		rest_lengths = params.get('rest_lengths')
+		if rest_lengths is None:
+			rest_lengths = solver.segment_lengths(self.goals[0])
+		return solver.LengthConstraint(rest_lengths, params.get('stretch', 0.0), iterations, pin_weights=pin_weights)
+
+	def _constraint_changed(self, constraint, pin_weights):
+		""" Whether a constraint and pin weights solve differently from the current ones. """
+		if (constraint is None) != (self.constraint is None) or (pin_weights is None) != (self.pin_weights is None):
+			return True
+		if pin_weights is not None and not numpy.array_equal(pin_weights, self.pin_weights):
+			return True
+		if constraint is None:
+			return False
+		return not (
+		        constraint.iterations == self.constraint.iterations
+		        and numpy.array_equal(constraint.min_lengths, self.constraint.min_lengths)
+		        and numpy.array_equal(constraint.max_lengths, self.constraint.max_lengths)
+		)
+
+	def _first_difference(self, old, new):
+		changed = numpy.any((old != new).reshape(len(old), -1), axis=1)
+		if not numpy.any(changed):
+			return None
+		return self.start_frame + int(numpy.argmax(changed))
+
+	def _invalidate(self, frame):
+		if frame is None:
+			return
+		self.cache.invalidate(self.key, frame)
+		if self._last is not None and self._last[0] >= frame:
+			self._last = None
+
+	def set_parameters(self, params):
+		""" Update the parameters.  Only checkpoints from the first frame whose
+		parameters changed onwards are dropped.  A change to the length
+		constraint or the pin weights drops every checkpoint.
+		Returns:
+			frame : (int)
+				First frame that needs re-simulating, or None when nothing changed
+		"""
+		blend, conserve = self._per_frame(params)
+		pin_weights, pin_targets = self._pins(params)
+		constraint = self._constraint(params, pin_weights)
+		frame = self._first_difference(
+		        numpy.column_stack([self.blend, self.conserve]),
+		        numpy.column_stack([blend, conserve])
+		)
+		if self._constraint_changed(constraint, pin_weights):
+			frame = self.start_frame
+		elif pin_targets is not None:
+			target_frame = self._first_difference(self.pin_targets, pin_targets)
+			if target_frame is not None:
+				frame = target_frame if frame is None else min(frame, target_frame)
+		self.params = params
+		self.blend, self.conserve = blend, conserve
+		self.pin_weights, self.pin_targets = pin_weights, pin_targets
+		self.constraint = constraint
+		self._invalidate(frame)
+		return frame
+
+	def set_goals(self, goals):
+		""" Update the goal motion, dropping checkpoints from the first changed frame. """
+		goals = numpy.asarray(goals, dtype=numpy.float64)
+		if goals.shape != self.goals.shape:
+			self.goals = goals
+			self.blend, self.conserve = self._per_frame(self.params)
+			self.pin_weights, self.pin_targets = self._pins(self.params)
+			self.constraint = self._constraint(self.params, self.pin_weights)
+			self.cache.invalidate(self.key)
+			self._last = None
+			return self.start_frame
+		frame = self._first_difference(self.goals, goals)
+		self.goals = goals
+		if frame == self.start_frame:
+			# The rest lengths may come from the first frame
+			self.constraint = self._constraint(self.params, self.pin_weights)
+		self._invalidate(frame)
+		return frame
+
+	def evaluate(self, frame):
+		""" Solved positions at a frame, resuming from the closest known state.
+		Args:
+			frame : (int)
+				Frame to evaluate, clamped to the cached range
+		Returns:
+			positions : (numpy.ndarray)
+				Solved positions (joints, 3), a copy the caller may change
+		"""
+		frame = min(max(int(frame), self.start_frame), self.end_frame)
+		state = self.cache.nearest(self.key, frame)
+		# Playing forward resumes from the last evaluated frame
+		if self._last is not None and self._last[0] <= frame and (state is None or self._last[0] > state[0]):
+			state = self._last
+		if state is None:
+			positions = self.goals[0].copy()
+			if self.pin_targets is not None:
+				solver.apply_pins(positions, self.pin_targets[0], self.pin_weights)
+			velocities = numpy.zeros_like(positions)
+			self.cache.store(self.key, self.start_frame, positions, velocities)
+			state = (self.start_frame, positions, velocities)
+		current, positions, velocities = state
+		while current < frame:
+			current += 1
+			index = current - self.start_frame
+			positions, velocities = solver.advance(
+			        positions,
+			        velocities,
+			        self.goals[index],
+			        self.blend[index],
+			        self.conserve[index],
+			        self.constraint,
+			        None if self.pin_targets is None else self.pin_targets[index],
+			        self.pin_weights
+			)
+			if self.cache.is_checkpoint(current, self.start_frame):
+				self.cache.store(self.key, current, positions, velocities)
+		self._last = (current, positions, velocities)
+		return positions.copy()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Binary joint caches for the overlap tool.  A chain's baked motion is
+    written as one float32 value per channel, joint and frame in a fixed
+    layout instead of as anim curve keys, so downstream departments can play
+    it back by memory-mapping the file and only the frames they read are ever
+    loaded.  Maps are read only, so every session on a host that opens the
+    same cache shares the operating system's pages of it.
+
+    Layout, little endian:
+        header   HEADER_FORMAT - magic, version, frames, joints, channels,
+                 start frame and the size of the metadata
+        metadata UTF-8 JSON - joint names, channel names and the chain
+        padding  up to the next DATA_ALIGNMENT bytes
+        data     float32 values shaped (frames, joints, channels)
+
+    Translations are in scene units and rotations in degrees, as on the
+    joints' channels.  Caches are written to a temporary file and renamed
+    into place, so a session reading the old cache is never handed a half
+    written one.  Windows refuses to rename over a file another session has
+    mapped, so the new cache is then written next to it as <name>.v<N><ext>
+    instead.  open_cache always opens the newest of a cache and its versions,
+    and the versions are removed once the cache itself can be replaced again.
+
+@applications:
+    - Maya
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+import json
+import os
+import re
+import struct
+
+# External
+import numpy
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+MAGIC = b'OVRJ'
+VERSION = 1
+# magic, version, frames, joints, channels, start frame, metadata bytes
+HEADER_FORMAT = '<4sIIIIdI'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+# Page aligned so the data maps straight onto whole pages
+DATA_ALIGNMENT = 4096
+DTYPE = numpy.dtype('<f4')
+
+CACHE_EXTENSION = '.ovrcache'
+# Written beside a cache that could not be replaced, <name>.v<N><ext>
+VERSION_SUFFIX = '.v{0}'
+CHANNELS = [
+	'translateX', 'translateY', 'translateZ',
+	'rotateX', 'rotateY', 'rotateZ',
+]
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def get_data_offset(metadata_size):
+	""" Byte offset of the data block after a header and metadata. """
+	end = HEADER_SIZE + metadata_size
+	return (end + DATA_ALIGNMENT - 1) // DATA_ALIGNMENT * DATA_ALIGNMENT
+
+def read_header(path):
+	""" Read the header and metadata of a cache file.
+	Returns:
+		header : (dict)
+			frames, joints, channels, startFrame, chain and dataOffset
+	Raises:
+		ValueError : The file is not a joint cache this version can read
+
+	"""
+	with open(path, 'rb') as handle:
+		prefix = handle.read(HEADER_SIZE)
+		if len(prefix) != HEADER_SIZE:
+			raise ValueError("{0} is too short to be a joint cache.".format(path))
+		magic, version, num_frames, num_joints, num_channels, start_frame, metadata_size = struct.unpack(
+		        HEADER_FORMAT, prefix)
+		if magic != MAGIC:
+			raise ValueError("{0} is not a joint cache.".format(path))
+		if version != VERSION:
+			raise ValueError("{0} is a version {1} joint cache, expected {2}.".format(path, version, VERSION))
+		metadata = json.loads(handle.read(metadata_size).decode('utf-8'))
+	if len(metadata['joints']) != num_joints or len(metadata['channels']) != num_channels:
+		raise ValueError("{0} has a corrupt header.".format(path))
+	return {
+		'frames' : num_frames,
+		'joints' : metadata['joints'],
+		'channels' : metadata['channels'],
+		'startFrame' : start_frame,
+		'chain' : metadata.get('chain'),
+		'dataOffset' : get_data_offset(metadata_size),
+	}
+
+def replace_file(source, destination):
+	""" Rename source over destination. """
+	try:
+		os.replace(source, destination)
+	except AttributeError:
+		# Python 2 can't rename over an existing file on Windows
+		if os.name == 'nt' and os.path.exists(destination):
+			os.remove(destination)
+		os.rename(source, destination)
+
+def get_version_path(path, version):
+	""" Path of a numbered version of a cache file. """
+	root, extension = os.path.splitext(path)
+	return root + VERSION_SUFFIX.format(int(version)) + extension
+
+def list_versions(path):
+	""" Numbered versions of a cache file on disk.
+	Returns:
+		versions : (list)
+			(version, path) sorted by version
+	"""
+	directory, name = os.path.split(path)
+	root, extension = os.path.splitext(name)
+	pattern = re.compile(re.escape(root) + r'\.v(\d+)' + re.escape(extension) + '$')
+	if not os.path.isdir(directory or os.curdir):
+		return []
+	versions = []
+	for candidate in os.listdir(directory or os.curdir):
+		match = pattern.match(candidate)
+		if match:
+			versions.append((int(match.group(1)), os.path.join(directory, candidate)))
+	return sorted(versions)
+
+def find_latest(path):
+	""" Newest of a cache file and its numbered versions, by modification
+	time then version.  path itself when none of them exist.
+	"""
+	candidates = [(0, path)] if os.path.exists(path) else []
+	candidates += list_versions(path)
+	if not candidates:
+		return path
+	return max(candidates, key=lambda candidate: (os.path.getmtime(candidate[1]), candidate[0]))[1]
+
+def remove_versions(path):
+	""" Remove the numbered versions of a cache file that nothing has mapped.
+	Returns:
+		removed : (list)
+			Paths removed
+	"""
+	removed = []
+	for version, version_path in list_versions(path):
+		try:
+			os.remove(version_path)
+		except OSError:
+			# Still mapped by another session on Windows, left for next time
+			continue
+		removed.append(version_path)
+	return removed
+
+#---------------------------------------------------------------------------------#
+# Joint Cache
+#---------------------------------------------------------------------------------#
+class JointCache(object):
+	""" Read only, memory-mapped view of a joint cache file.
+	Args:
+		path : (str)
+			Cache file
+	"""
+	def __init__(self, path):
+		self.path = path
+		header = read_header(path)
+		self.start_frame = header['startFrame']
+		self.joints = header['joints']
+		self.channels = header['channels']
+		self.chain = header['chain']
+		self.data = numpy.memmap(
+		        path,
+		        dtype=DTYPE,
+		        mode='r',
+		        offset=header['dataOffset'],
+		        shape=(header['frames'], len(self.joints), len(self.channels))
+		)
+		self._joint_index = dict((joint, i) for i, joint in enumerate(self.joints))
+		self._channel_index = dict((channel, i) for i, channel in enumerate(self.channels))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def __len__(self):
+		return len(self.data)
+
+	@property
+	def end_frame(self):
+		return self.start_frame + len(self.data) - 1
+
+	def frame_index(self, frame):
+		""" Row of a frame in the data.
+		Raises:
+			IndexError : The frame is outside the cache
+		"""
+		index = int(round(frame - self.start_frame))
+		if index < 0 or index >= len(self.data):
+			raise IndexError("Frame {0} is outside the cached range {1} to {2}.".format(
+			        frame, self.start_frame, self.end_frame))
+		return index
+
+	def frame(self, frame):
+		""" Every joint's channels at a frame (joints, channels).  Only that
+		frame is read from the file.
+		"""
+		return self.data[self.frame_index(frame)]
+
+	def frame_range(self, startFrame, endFrame):
+		""" Every joint's channels over an inclusive frame range (frames, joints, channels). """
+		return self.data[self.frame_index(startFrame):self.frame_index(endFrame) + 1]
+
+	def channel(self, joint, channel):
+		""" One channel of one joint over every frame (frames,). """
+		return self.data[:, self._joint_index[joint], self._channel_index[channel]]
+
+	def close(self):
+		""" Drop the map.  Views handed out keep it alive until they are freed. """
+		self.data = None
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def write_cache(path, values, joints, start_frame, channels=CHANNELS, chain=None):
+	""" Write a joint cache file.
+	Args:
+		path : (str)
+			Cache file, replaced if it exists.  When it can't be replaced
+			the cache is written to its next numbered version instead
+		values : (array like)
+			Channel values shaped (frames, joints, channels)
+		joints : (list)
+			Joint names in data order
+		start_frame : (float)
+			Frame of the first row
+		channels : (list)
+			Channel names in data order
+		chain : (str)
+			Dynamic chain controller the joints belong to
+	Returns:
+		path : (str)
+			File written, path or one of its numbered versions
+
+	"""
+	values = numpy.ascontiguousarray(values, dtype=DTYPE)
+	if values.ndim != 3 or values.shape[1:] != (len(joints), len(channels)):
+		raise ValueError("Expected values shaped (frames, {0}, {1}), got {2}.".format(
+		        len(joints), len(channels), values.shape))
+	metadata = json.dumps({
+	        'joints' : [str(joint) for joint in joints],
+	        'channels' : [str(channel) for channel in channels],
+	        'chain' : str(chain) if chain is not None else None,
+	}).encode('utf-8')
+	header = struct.pack(
+	        HEADER_FORMAT,
+	        MAGIC,
+	        VERSION,
+	        values.shape[0],
+	        len(joints),
+	        len(channels),
+	        float(start_frame),
+	        len(metadata)
+	)
+	temp_path = path + '.tmp'
+	try:
+		with open(temp_path, 'wb') as handle:
+			handle.write(header)
+			handle.write(metadata)
+			handle.write(b'\0' * (get_data_offset(len(metadata)) - HEADER_SIZE - len(metadata)))
+			handle.write(values.tobytes())
+		try:
+			replace_file(temp_path, path)
+		except OSError:
+			# Mapped by another session on Windows, keep theirs and write beside it
+			if not os.path.exists(path):
+				raise
+			versions = list_versions(path)
+			path = get_version_path(path, versions[-1][0] + 1 if versions else 1)
+			replace_file(temp_path, path)
+		else:
+			remove_versions(path)
+	except Exception:
+		if os.path.exists(temp_path):
+			os.remove(temp_path)
+		raise
+	return path
+
+def open_cache(path):
+	""" Memory-map the newest of a joint cache and its numbered versions for
+	reading, see JointCache and find_latest.
+	"""
+	return JointCache(find_latest(path))
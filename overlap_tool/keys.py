@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Bulk keyframe reading and writing for the overlap tool.  Once a chain's
+    motion has been solved offline every channel is written as a whole array
+    of keys with a single MFnAnimCurve.addKeys call, instead of letting
+    bakeResults step time and sample each channel through the DG.  Baked
+    curves are read back the same way so they can be reduced and rewritten.
+
+@applications:
+    - Maya
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+import math
+import timeit
+
+# External
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+TANGENT_TYPE = oma.MFnAnimCurve.kTangentLinear
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def get_plug(plug_name):
+	""" Get the MPlug for a node.attr name. """
+	sel = om.MSelectionList()
+	sel.add(plug_name)
+	return sel.getPlug(0)
+
+def find_anim_curve(plug):
+	""" Get the anim curve driving a plug, None if it has none. """
+	curves = oma.MAnimUtil.findAnimation(plug)
+	if curves:
+		return oma.MFnAnimCurve(curves[0])
+	return None
+
+def get_anim_curve(plug):
+	""" Get the anim curve driving a plug, creating one if it has none.
+	Args:
+		plug : (MPlug)
+			Plug to find or create the anim curve for
+	Returns:
+		anim_curve : (MFnAnimCurve)
+
+	"""
+	anim_curve = find_anim_curve(plug)
+	if anim_curve is not None:
+		return anim_curve
+	anim_curve = oma.MFnAnimCurve()
+	anim_curve.create(plug)
+	return anim_curve
+
+def to_curve_values(anim_curve, values):
+	""" Convert values to the curve's internal units, degrees to radians on angular curves. """
+	values = [float(value) for value in values]
+	if anim_curve.animCurveType == oma.MFnAnimCurve.kAnimCurveTA:
+		values = [math.radians(value) for value in values]
+	return values
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def read_channel_keys(plug_names):
+	""" Read every key of each channel's anim curve.  Angular channels are
+	returned in degrees.
+	Args:
+		plug_names : (list)
+			node.attr names.  Channels without an anim curve are left out
+	Returns:
+		channels : (dict)
+			node.attr names mapped to (frames, values)
+
+	"""
+	unit = om.MTime.uiUnit()
+	channels = {}
+	for plug_name in plug_names:
+		anim_curve = find_anim_curve(get_plug(plug_name))
+		if anim_curve is None:
+			continue
+		num_keys = anim_curve.numKeys
+		frames = [anim_curve.input(i).asUnits(unit) for i in range(num_keys)]
+		values = [anim_curve.value(i) for i in range(num_keys)]
+		if anim_curve.animCurveType == oma.MFnAnimCurve.kAnimCurveTA:
+			values = [math.degrees(value) for value in values]
+		channels[plug_name] = (frames, values)
+	return channels
+
+def replace_channel_keys(channels):
+	""" Replace every key of each channel's anim curve, one addKeys call per
+	curve.  Angular channels are given in degrees.
+	Args:
+		channels : (dict)
+			node.attr names mapped to (frames, values)
+	Returns:
+		stats : (dict)
+			curves, keys, seconds and keysPerSecond written
+
+	"""
+	start = timeit.default_timer()
+	unit = om.MTime.uiUnit()
+	num_keys = 0
+	for plug_name, (frames, values) in channels.items():
+		anim_curve = get_anim_curve(get_plug(plug_name))
+		anim_curve.addKeys(
+		        om.MTimeArray([om.MTime(float(frame), unit) for frame in frames]),
+		        om.MDoubleArray(to_curve_values(anim_curve, values)),
+		        TANGENT_TYPE,
+		        TANGENT_TYPE,
+		        False
+		)
+		num_keys += len(values)
+	seconds = timeit.default_timer() - start
+	return {
+		'curves' : len(channels),
+		'keys' : num_keys,
+		'seconds' : seconds,
+		'keysPerSecond' : num_keys / seconds if seconds > 0 else float(num_keys),
+	}
+
+def write_channel_keys(channels, frames, keep_existing=False):
+	""" Write whole arrays of keys onto each channel, one addKeys call per curve.
+	Angular channels are given in degrees and converted to the curve's radians.
+	Args:
+		channels : (dict)
+			node.attr names mapped to a value per frame
+		frames : (list)
+			Frame numbers the values belong to
+		keep_existing : (bool)
+			Keep keys already on the curves outside of the written frames
+	Returns:
+		stats : (dict)
+			curves, keys, seconds and keysPerSecond written
+
+	"""
+	start = timeit.default_timer()
+	unit = om.MTime.uiUnit()
+	times = om.MTimeArray([om.MTime(float(frame), unit) for frame in frames])
+	num_keys = 0
+	for plug_name, values in channels.items():
+		anim_curve = get_anim_curve(get_plug(plug_name))
+		values = to_curve_values(anim_curve, values)
+		anim_curve.addKeys(
+		        times,
+		        om.MDoubleArray(values),
+		        TANGENT_TYPE,
+		        TANGENT_TYPE,
+		        keep_existing
+		)
+		num_keys += len(values)
+	seconds = timeit.default_timer() - start
+	return {
+		'curves' : len(channels),
+		'keys' : num_keys,
+		'seconds' : seconds,
+		'keysPerSecond' : num_keys / seconds if seconds > 0 else float(num_keys),
+	}
+
+def format_stats(stats):
+	""" Human readable summary of write_channel_keys stats. """
+	return "Wrote {keys} keys on {curves} curves in {seconds:.3f}s ({keysPerSecond:.0f} keys/sec)".format(**stats)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Name allocation for the overlap tool.  The scene's existing names are
+    scanned once into a prefix -> highest instance index per suffix, and new
+    names are handed out from the index instead of probing objExists with
+    instance 0, 1, 2, ... until one is free.  One allocator can be shared by
+    several create_dynamic_chain calls so a batch never hands out a name twice.
+
+@applications:
+    - Maya
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+import re
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+INSTANCE_PATTERN = re.compile(r'^(.*?)(\d+)$')
+
+#---------------------------------------------------------------------------------#
+# Name Allocator
+#---------------------------------------------------------------------------------#
+class NameAllocator(object):
+	""" Hands out <prefix><instance><suffix> names that are not in use.
+	Args:
+		suffixes : (list)
+			Suffixes the allocator tracks, e.g. ['_DYN', '_BLND']
+		names : (list)
+			Existing names to index
+	"""
+	def __init__(self, suffixes, names=()):
+		self.suffixes = sorted(set(suffixes), key=len, reverse=True)
+		# (prefix, suffix) -> highest instance in use
+		self._instances = {}
+		self.scan(names)
+
+	def scan(self, names):
+		""" Add existing names to the index.  DAG paths are reduced to the leaf name. """
+		for name in names:
+			name = str(name).rsplit('|', 1)[-1]
+			for suffix in self.suffixes:
+				if not name.endswith(suffix):
+					continue
+				match = INSTANCE_PATTERN.match(name[:len(name) - len(suffix)])
+				if match:
+					self._reserve(match.group(1), int(match.group(2)), suffix)
+				break
+
+	def _reserve(self, prefix, instance, suffix):
+		key = (prefix, suffix)
+		if instance > self._instances.get(key, -1):
+			self._instances[key] = instance
+
+	def instance(self, prefix='', suffix=''):
+		""" Allocate the next free instance number for a prefix and suffix. """
+		instance = self._instances.get((prefix, suffix), -1) + 1
+		self._reserve(prefix, instance, suffix)
+		return instance
+
+	def name(self, prefix='', suffix=''):
+		""" Allocate a full name for a prefix and suffix. """
+		return '{0}{1}{2}'.format(prefix, self.instance(prefix, suffix), suffix)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Convert solved chain positions back into joint channels, in place of a
+    spline IK handle.  Each joint's aim and up axes come from a parallel
+    transport frame: the frame of the first segment is swung from rest onto
+    its solved direction, and every following frame is the one before it
+    swung onto the next segment with the smallest rotation, so the up axis
+    never flips however the chain bends.  The rest pose is transported the
+    same way, and a joint's world rotation takes its rest frame onto its
+    solved frame.
+
+    The products of the swings down the chain are a prefix scan, worked out
+    by doubling.  All joints and frames are done in log2(joints) batched
+    matrix products, with no loop over either.
+
+@applications:
+    - Maya
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# External
+import numpy
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+EPSILON = 1e-9
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def normalize(vectors):
+	""" Normalize an array of vectors along the last axis.  Zero length vectors
+	are left as zero.
+	"""
+	lengths = numpy.linalg.norm(vectors, axis=-1)[..., None]
+	return numpy.where(lengths > EPSILON, vectors / numpy.maximum(lengths, EPSILON), 0.0)
+
+def minimal_rotation(a, b):
+	""" Rotation matrices that take unit vectors a onto unit vectors b with the
+	least amount of twist.
+	Args:
+		a, b : (numpy.ndarray)
+			Unit vectors shaped (..., 3)
+	Returns:
+		matrices : (numpy.ndarray)
+			Rotation matrices shaped (..., 3, 3)
+
+	"""
+	a, b = numpy.broadcast_arrays(a, b)
+	axis = numpy.cross(a, b)
+	cos = numpy.sum(a * b, axis=-1)
+	# Opposite vectors have no unique axis, rotate half way around any perpendicular
+	opposite = cos < -1.0 + 1e-6
+	if numpy.any(opposite):
+		helper = numpy.where(numpy.abs(a[..., :1]) < 0.9, [1.0, 0.0, 0.0], [0.0, 1.0, 0.0])
+		perpendicular = normalize(numpy.cross(a, helper))
+		axis = numpy.where(opposite[..., None], perpendicular, axis)
+	skew = numpy.zeros(a.shape + (3,))
+	skew[..., 0, 1] = -axis[..., 2]
+	skew[..., 0, 2] = axis[..., 1]
+	skew[..., 1, 0] = axis[..., 2]
+	skew[..., 1, 2] = -axis[..., 0]
+	skew[..., 2, 0] = -axis[..., 1]
+	skew[..., 2, 1] = axis[..., 0]
+	identity = numpy.broadcast_to(numpy.eye(3), skew.shape)
+	scale = numpy.where(opposite, 1.0, 1.0 / numpy.maximum(1.0 + cos, EPSILON))
+	matrices = identity + skew + numpy.matmul(skew, skew) * scale[..., None, None]
+	# The half turn is 2 * skew^2 for a unit axis with no skew term
+	matrices = numpy.where(opposite[..., None, None], identity + 2.0 * numpy.matmul(skew, skew), matrices)
+	return matrices
+
+def matrix_to_euler(matrices):
+	""" Convert rotation matrices to xyz rotate order euler angles in degrees.
+	Args:
+		matrices : (numpy.ndarray)
+			Rotation matrices shaped (..., 3, 3), column vector convention
+	Returns:
+		angles : (numpy.ndarray)
+			rotateX, rotateY, rotateZ shaped (..., 3)
+
+	"""
+	sin_y = numpy.clip(-matrices[..., 2, 0], -1.0, 1.0)
+	angles = numpy.empty(matrices.shape[:-2] + (3,))
+	angles[..., 0] = numpy.arctan2(matrices[..., 2, 1], matrices[..., 2, 2])
+	angles[..., 1] = numpy.arcsin(sin_y)
+	angles[..., 2] = numpy.arctan2(matrices[..., 1, 0], matrices[..., 0, 0])
+	return numpy.degrees(angles)
+
+def euler_filter(angles):
+	""" Remove the jumps matrix_to_euler leaves between frames.  Each frame
+	picks whichever of its two xyz solutions, with every angle moved by whole
+	turns, lies closest to the frame before it, so the keys interpolate the
+	short way round.
+	Args:
+		angles : (numpy.ndarray)
+			rotateX, rotateY, rotateZ in degrees shaped (frames, ..., 3)
+	Returns:
+		angles : (numpy.ndarray)
+			Shaped like angles, the first frame is left as it is
+
+	"""
+	angles = numpy.array(angles, dtype=numpy.float64)
+	for frame in range(1, len(angles)):
+		previous = angles[frame - 1]
+		current = angles[frame]
+		# (x + 180, 180 - y, z + 180) is the same rotation in xyz order
+		flipped = current * [1.0, -1.0, 1.0] + 180.0
+		best = None
+		for candidate in (current, flipped):
+			candidate = candidate + 360.0 * numpy.round((previous - candidate) / 360.0)
+			if best is None:
+				best = candidate
+			else:
+				closer = numpy.sum(numpy.abs(candidate - previous), axis=-1) < numpy.sum(numpy.abs(best - previous), axis=-1)
+				best = numpy.where(closer[..., None], candidate, best)
+		angles[frame] = best
+	return angles
+
+def transform_points(points, matrices):
+	""" Move points by Maya matrices, row vector convention like the matrices
+	getAttr returns.
+	Args:
+		points : (numpy.ndarray)
+			Points shaped (..., points, 3)
+		matrices : (numpy.ndarray)
+			4x4 matrices shaped (..., 4, 4), one per leading index of points
+	Returns:
+		points : (numpy.ndarray)
+			Shaped like points
+
+	"""
+	points = numpy.asarray(points, dtype=numpy.float64)
+	matrices = numpy.asarray(matrices, dtype=numpy.float64)
+	return numpy.matmul(points, matrices[..., :3, :3]) + matrices[..., None, 3, :3]
+
+def cumulative_matmul(matrices):
+	""" Running products down the second to last but two axis, newest on the
+	left: result[..., i, :, :] = m[i] . m[i-1] . ... . m[0].
+	Args:
+		matrices : (numpy.ndarray)
+			Matrices shaped (..., count, 3, 3)
+	Returns:
+		products : (numpy.ndarray)
+			Shaped like matrices
+
+	"""
+	products = numpy.array(matrices, dtype=numpy.float64)
+	count = products.shape[-3]
+	step = 1
+	while step < count:
+		# Every product picks up the one step places before it, which already
+		# covers the step matrices before that
+		combined = numpy.matmul(products[..., step:, :, :], products[..., :-step, :, :])
+		products[..., step:, :, :] = combined
+		step *= 2
+	return products
+
+def transport_frames(directions, first):
+	""" Parallel transport frames along segment directions.
+	Args:
+		directions : (numpy.ndarray)
+			Unit segment directions shaped (..., segments, 3)
+		first : (numpy.ndarray)
+			Rotation of the first segment's frame shaped (..., 3, 3)
+	Returns:
+		frames : (numpy.ndarray)
+			Rotation of every segment's frame shaped (..., segments, 3, 3)
+
+	"""
+	swings = numpy.empty(directions.shape + (3,))
+	swings[..., 0, :, :] = first
+	swings[..., 1:, :, :] = minimal_rotation(directions[..., :-1, :], directions[..., 1:, :])
+	return cumulative_matmul(swings)
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def chain_rotations(trajectory, rest_positions):
+	""" Local joint rotations that make a chain follow its solved positions.
+	The joints are expected to have no joint orient and no rotation at rest,
+	which is how create_joints builds the dynamic joints.  The end joint keeps
+	no rotation.
+	Args:
+		trajectory : (numpy.ndarray)
+			Solved world positions shaped (frames, joints, 3)
+		rest_positions : (numpy.ndarray)
+			Joint positions at rest shaped (joints, 3)
+	Returns:
+		rotations : (numpy.ndarray)
+			rotateX, rotateY, rotateZ in degrees shaped (frames, joints, 3)
+
+	"""
+	trajectory = numpy.asarray(trajectory, dtype=numpy.float64)
+	rest_positions = numpy.asarray(rest_positions, dtype=numpy.float64)
+	num_frames, num_joints = trajectory.shape[:2]
+	rotations = numpy.zeros((num_frames, num_joints, 3))
+	if num_joints < 2:
+		return rotations
+	rest_dirs = normalize(numpy.diff(rest_positions, axis=0))
+	solved_dirs = normalize(numpy.diff(trajectory, axis=1))
+	rest_frames = transport_frames(rest_dirs, numpy.eye(3))
+	solved_frames = transport_frames(solved_dirs, minimal_rotation(rest_dirs[0], solved_dirs[:, 0]))
+	# World rotation of every joint, rest frame onto solved frame
+	world = numpy.matmul(solved_frames, numpy.swapaxes(rest_frames, -1, -2))
+	local = world.copy()
+	local[:, 1:] = numpy.matmul(numpy.swapaxes(world[:, :-1], -1, -2), world[:, 1:])
+	rotations[:, :-1] = matrix_to_euler(local)
+	return rotations
@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Process pool solving for the overlap tool.  The chains built by
+    create_dynamic_chain never interact, so each chain's sampled driver motion
+    and controller parameters are sent to a pool of worker processes running
+    the Maya independent solver.  Results come back in the order the chains
+    were given regardless of which worker finished first.
+
+    Long shots can also be split by frame range.  Each shard starts solving a
+    warm-up window before its first frame so the goal motion has settled by
+    the time its frames are kept, and neighbouring shards overlap by a few
+    frames which are cross-faded when the shards are stitched back together.
+    The solver forgets its starting state geometrically, at a rate set by the
+    stiffness, attraction, lag and easeIn of the chains, so by default the
+    warm-up is sized from the slowest point to bring the starting state's
+    error below WARMUP_TOLERANCE.  The length constraint keeps every shard's
+    rest lengths from the first frame of the shot rather than the shard, but
+    it is not covered by that estimate: a constrained chain forgets its start
+    more slowly and not always monotonically.  Neighbouring shards both solve
+    the cross-faded frames, so how far apart they land there is measured on
+    every sharded solve as the seam deviation.  max_deviation measures how
+    close a sharded bake gets to a serial one.
+
+@applications:
+    - Maya
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+import multiprocessing
+import os
+import sys
+
+# External
+import numpy
+
+# Internal
+from overlap_tool import solver
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+# Inside an interactive session sys.executable is Maya itself, spawned workers
+# must run through mayapy instead
+MAYAPY = 'mayapy.exe' if sys.platform == 'win32' else 'mayapy'
+
+# Frame range sharding defaults, in frames
+SHARD_FRAMES = 500
+WARMUP_FRAMES = 100
+CROSSFADE_FRAMES = 10
+
+# Fraction of a shard's starting error left once its warm-up is over
+WARMUP_TOLERANCE = 1e-6
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def get_worker_count(workers=None):
+	""" Clamp a requested worker count to the machine.  None or 0 uses every core. """
+	cpu_count = multiprocessing.cpu_count()
+	if not workers:
+		return cpu_count
+	return max(1, min(int(workers), cpu_count))
+
+def get_pool_context():
+	""" Multiprocessing context that spawns fresh worker interpreters.  Forking
+	an interactive Maya would copy the whole GUI process, threads and all, and
+	ignore the mayapy executable.  Python 2 has no contexts and forks on Linux
+	and macOS.
+	"""
+	if hasattr(multiprocessing, 'get_context'):
+		return multiprocessing.get_context('spawn')
+	return multiprocessing
+
+def set_worker_executable(context=multiprocessing):
+	""" Point multiprocessing at mayapy when running inside an interactive Maya. """
+	executable = os.path.basename(sys.executable).lower()
+	if executable.startswith('maya') and not executable.startswith('mayapy'):
+		context.set_executable(os.path.join(os.path.dirname(sys.executable), MAYAPY))
+
+def map_jobs(function, jobs, workers=None):
+	""" Run function over jobs on a pool of worker processes, in job order.
+	A single worker runs everything in this process, more are spawned as
+	new interpreters, see get_pool_context.
+	Args:
+		function : (callable)
+			Module level worker entry point
+		jobs : (list)
+			One argument per call
+		workers : (int)
+			Number of worker processes.  None uses every core
+	Returns:
+		results : (list)
+
+	"""
+	workers = min(get_worker_count(workers), len(jobs))
+	if workers <= 1:
+		return [function(job) for job in jobs]
+	context = get_pool_context()
+	set_worker_executable(context)
+	pool = context.Pool(workers)
+	try:
+		# map keeps the input order, chunks keep the per task overhead down on
+		# many small jobs
+		chunksize = max(1, len(jobs) // (workers * 4))
+		return pool.map(function, jobs, chunksize)
+	finally:
+		pool.close()
+		pool.join()
+
+def solve_job(job):
+	""" Worker entry point.  Solves one chain from its packed job.
+	Args:
+		job : (tuple)
+			goal positions, solver parameters and initial positions
+	Returns:
+		trajectory : (numpy.ndarray)
+
+	"""
+	goals, params, initial_positions = job
+	return solver.solve_chain(goals, initial_positions=initial_positions, **params)
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def solve_chains_parallel(goal_positions, params, initial_positions=None, workers=None):
+	""" Solve independent chains on a pool of worker processes.
+	Args:
+		goal_positions : (list)
+			Goal positions per chain, each shaped (frames, joints, 3)
+		params : (list)
+			Solver parameters per chain as returned by solver.chain_parameters
+		initial_positions : (list)
+			Optional starting positions per chain
+		workers : (int)
+			Number of worker processes.  None uses every core
+	Returns:
+		trajectories : (list)
+			Solved positions per chain in the same order as goal_positions
+
+	"""
+	if len(goal_positions) != len(params):
+		raise ValueError("Expected parameters for each of the {0} chains.".format(len(goal_positions)))
+	if initial_positions is None:
+		initial_positions = [None] * len(goal_positions)
+	jobs = list(zip(goal_positions, params, initial_positions))
+	return map_jobs(solve_job, jobs, workers)
+
+#---------------------------------------------------------------------------------#
+# Frame Range Sharding
+#---------------------------------------------------------------------------------#
+def get_shards(num_frames, shard_frames=SHARD_FRAMES, warmup=WARMUP_FRAMES, crossfade=CROSSFADE_FRAMES):
+	""" Split a frame range into overlapping shards.
+	Args:
+		num_frames : (int)
+			Frames in the range
+		shard_frames : (int)
+			Frames each shard owns
+		warmup : (int)
+			Frames solved before a shard's first kept frame and thrown away
+		crossfade : (int)
+			Frames a shard shares with the one before it
+	Returns:
+		shards : (list)
+			(solve start, keep start, end) frame indices per shard.  The
+			first shard starts on the first frame like a serial solve
+
+	"""
+	shard_frames = max(1, int(shard_frames))
+	crossfade = max(0, min(int(crossfade), shard_frames))
+	shards = []
+	for start in range(0, num_frames, shard_frames):
+		keep = max(0, start - crossfade)
+		shards.append((max(0, keep - max(0, int(warmup))), keep, min(num_frames, start + shard_frames)))
+	return shards
+
+def get_decay_rate(params):
+	""" Slowest rate a chain forgets its starting state at, per frame.  Two
+	solves of the same goals differ by (e, v) in position and velocity, and
+	every frame maps that difference through [[a, a * c], [-b, a * c]] with b
+	the goal blend, a = 1 - b and c the easeIn.  The largest eigenvalue of
+	that map over every point is the rate.  Pins and the length constraint
+	only pull the solves closer and are left out.
+	Args:
+		params : (dict)
+			Solver parameters as returned by solver.chain_parameters
+	Returns:
+		rate : (float)
+			Between 0 and 1, 1 when the chain never forgets
+
+	"""
+	blend, conserve = solver.chain_blend(
+	        params.get('stiffness'),
+	        params.get('attraction', solver.MAGNETISM),
+	        params.get('lag', solver.DYN_SMOOTHNESS),
+	        params.get('ease_in', solver.EASE_IN)
+	)
+	# Animated parameters take the slowest frame
+	conserve = numpy.clip(conserve, 0.0, 1.0)[..., None]
+	keep = 1.0 - blend
+	# Roots of x^2 - a (1 + c) x + a c
+	trace = keep * (1.0 + conserve)
+	root = numpy.sqrt((trace * trace - 4.0 * keep * conserve).astype(numpy.complex128))
+	rate = numpy.maximum(numpy.abs(trace + root), numpy.abs(trace - root)) * 0.5
+	return float(min(1.0, rate.max())) if rate.size else 0.0
+
+def get_warmup_frames(params, tolerance=WARMUP_TOLERANCE, limit=None):
+	""" Warm-up long enough for every chain to forget its starting state.
+	Args:
+		params : (list)
+			Solver parameters per chain as returned by solver.chain_parameters
+		tolerance : (float)
+			Fraction of the starting error left at the end of the warm-up
+		limit : (int)
+			Most frames to return, e.g. the frames in the range.  A chain
+			that never forgets returns the limit
+	Returns:
+		warmup : (int)
+
+	"""
+	rate = max([get_decay_rate(param) for param in params] or [0.0])
+	if rate <= 0.0:
+		return 0
+	if rate >= 1.0:
+		return WARMUP_FRAMES if limit is None else int(limit)
+	frames = int(numpy.ceil(numpy.log(tolerance) / numpy.log(rate)))
+	return frames if limit is None else min(frames, int(limit))
+
+def slice_params(params, start, end):
+	""" Solver parameters over a frame range, for the parameters that are
+	sampled per frame like pin targets and animated attributes.
+	"""
+	sliced = dict(params)
+	if params.get('pin_targets') is not None:
+		sliced['pin_targets'] = params['pin_targets'][start:end]
+	for name in ('attraction', 'lag', 'ease_in'):
+		if numpy.ndim(params.get(name)) > 0:
+			sliced[name] = params[name][start:end]
+	if numpy.ndim(params.get('stiffness')) > 1:
+		sliced['stiffness'] = params['stiffness'][start:end]
+	return sliced
+
+def solve_shard_job(job):
+	""" Worker entry point.  Solves every chain over one shard.
+	Args:
+		job : (tuple)
+			goal positions per chain over the shard, solver parameters per
+			chain and the warm-up frames to drop
+	Returns:
+		trajectories : (list)
+			Solved positions per chain over the kept frames
+
+	"""
+	goals, params, warmup = job
+	return [trajectory[warmup:] for trajectory in solver.solve_chains(goals, params)]
+
+def crossfade_weights(length):
+	""" Weights fading a shard in over its first length frames. """
+	return (numpy.arange(length, dtype=numpy.float64) + 1.0) / (length + 1.0)
+
+def stitch_shards(shards, results, num_frames, stats=None):
+	""" Join solved shards into full trajectories, cross-fading the overlaps.
+	Args:
+		shards : (list)
+			Shards as returned by get_shards
+		results : (list)
+			solve_shard_job results per shard
+		num_frames : (int)
+			Frames in the full range
+		stats : (dict)
+			Optional, filled with seam_deviation, the largest distance between
+			neighbouring shards over the frames they share
+	Returns:
+		trajectories : (list)
+			Solved positions per chain (frames, joints, 3)
+
+	"""
+	trajectories = [numpy.empty((num_frames,) + chain.shape[1:]) for chain in results[0]]
+	seam = 0.0
+	end = 0
+	for (solve_start, keep, shard_end), chains in zip(shards, results):
+		fade = end - keep
+		weights = crossfade_weights(fade)[:, None, None]
+		if fade:
+			seam = max(seam, max_deviation([chain[:fade] for chain in chains], [t[keep:end] for t in trajectories]))
+		for trajectory, chain in zip(trajectories, chains):
+			if fade:
+				trajectory[keep:end] += (chain[:fade] - trajectory[keep:end]) * weights
+			trajectory[end:shard_end] = chain[fade:]
+		end = shard_end
+	if stats is not None:
+		stats['seam_deviation'] = seam
+	return trajectories
+
+def solve_chains_sharded(goal_positions, params, shard_frames=SHARD_FRAMES, warmup=None,
+                         crossfade=CROSSFADE_FRAMES, workers=None, stats=None):
+	""" Solve chains over a long frame range by splitting the range into shards
+	solved concurrently, every chain of a shard as one batch.
+	Args:
+		goal_positions : (list)
+			Goal positions per chain, each shaped (frames, joints, 3) over the
+			same frame range
+		params : (list)
+			Solver parameters per chain as returned by solver.chain_parameters
+		shard_frames, warmup, crossfade : (int)
+			Shard layout, see get_shards.  A warmup of None is sized by
+			get_warmup_frames
+		workers : (int)
+			Number of worker processes.  None uses every core
+		stats : (dict)
+			Optional, filled with the warmup used and the seam_deviation of
+			stitch_shards
+	Returns:
+		trajectories : (list)
+			Solved positions per chain in the same order as goal_positions
+
+	"""
+	if len(goal_positions) != len(params):
+		raise ValueError("Expected parameters for each of the {0} chains.".format(len(goal_positions)))
+	if not goal_positions:
+		return []
+	goal_positions = [numpy.asarray(goals, dtype=numpy.float64) for goals in goal_positions]
+	num_frames = goal_positions[0].shape[0]
+	if warmup is None:
+		warmup = get_warmup_frames(params, limit=num_frames)
+	if stats is not None:
+		stats['warmup'] = warmup
+	# Shards start part way through the shot, their rest lengths must still
+	# come from its first frame
+	params = [
+	        param if param.get('rest_lengths') is not None
+	        else dict(param, rest_lengths=solver.segment_lengths(goals[0]))
+	        for goals, param in zip(goal_positions, params)
+	]
+	shards = get_shards(num_frames, shard_frames, warmup, crossfade)
+	jobs = [
+	        (
+	                [goals[solve_start:end] for goals in goal_positions],
+	                [slice_params(param, solve_start, end) for param in params],
+	                keep - solve_start
+	        )
+	        for solve_start, keep, end in shards
+	]
+	return stitch_shards(shards, map_jobs(solve_shard_job, jobs, workers), num_frames, stats)
+
+def max_deviation(trajectories, reference):
+	""" Largest distance between matching points of two sets of trajectories,
+	e.g. a sharded solve and a serial reference.
+	Returns:
+		deviation : (float)
+
+	"""
+	deviation = 0.0
+	for trajectory, expected in zip(trajectories, reference):
+		if len(trajectory):
+			deviation = max(deviation, float(numpy.sqrt(((trajectory - expected) ** 2).sum(axis=-1)).max()))
+	return deviation
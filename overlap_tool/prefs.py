@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Character prefs for the overlap tool.  A prefs file records how every
+    dynamic chain of a character was picked, base and end control or the full
+    list of controls, and the values of the chain controller's attributes, so
+    the chains can be rebuilt on another scene.  Only the standard library is
+    used so prefs can be read and written outside Maya.
+
+    <data>
+        <joints>  one <joint name base end/> or <joint name controls/> per chain
+        <attrs>   one <attr name lag easeIn ... jointStiffness0 .../> per chain
+        <presets> one <preset name allCtrls="True"/> per all controls chain
+
+@applications:
+    - Maya
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+from xml.etree import ElementTree
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+INDENT = '  '
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def indent(elem, level=0):
+	""" Pretty print an element in place with one INDENT per level. """
+	pad = '\n' + INDENT * level
+	if len(elem):
+		if not elem.text or not elem.text.strip():
+			elem.text = pad + INDENT
+		for child in elem:
+			indent(child, level + 1)
+		if not child.tail or not child.tail.strip():
+			child.tail = pad
+	if level and (not elem.tail or not elem.tail.strip()):
+		elem.tail = pad
+
+def chain_entry(name, base=None, end=None, controls=None, attrs=None):
+	""" Build the prefs of a single chain.
+	Args:
+		name : (str)
+			Dynamic chain controller
+		base, end : (str)
+			Base and end control of a hierarchy chain
+		controls : (list)
+			Every control of an all controls chain.  Takes precedence over base and end
+		attrs : (dict)
+			Controller attribute values
+	Returns:
+		chain : (dict)
+			name, allControls, base, end, controls and attrs
+
+	"""
+	return {
+	        'name' : str(name),
+	        'allControls' : bool(controls),
+	        'base' : str(base) if base is not None else None,
+	        'end' : str(end) if end is not None else None,
+	        'controls' : [str(control) for control in controls or []],
+	        'attrs' : dict(attrs or {}),
+	}
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def read_prefs(path):
+	""" Read the chains of a character prefs file in file order.  Attribute
+	entries are matched to their chain by name, entries without a chain are
+	ignored.
+	Args:
+		path : (str)
+			Prefs file
+	Returns:
+		chains : (list)
+			One dict per chain, see chain_entry
+	Raises:
+		SyntaxError : The file is not valid XML
+
+	"""
+	root = ElementTree.parse(path).getroot()
+	presets = set()
+	for preset in root.iter('preset'):
+		if preset.get('allCtrls') == 'True':
+			presets.add(preset.get('name'))
+	attrs = {}
+	for attr in root.iter('attr'):
+		attrs[attr.get('name')] = dict(
+		        (setting, float(value)) for setting, value in attr.attrib.items() if setting != 'name'
+		)
+	chains = []
+	for joint in root.iter('joint'):
+		name = joint.get('name')
+		if name in presets:
+			chains.append(chain_entry(name, controls=joint.get('controls').split(','), attrs=attrs.get(name)))
+		else:
+			chains.append(chain_entry(name, joint.get('base'), joint.get('end'), attrs=attrs.get(name)))
+	return chains
+
+def write_prefs(path, chains):
+	""" Write the chains of a character to a prefs file.
+	Args:
+		path : (str)
+			Prefs file
+		chains : (list)
+			One dict per chain, see chain_entry
+
+	"""
+	root = ElementTree.Element('data')
+	joints = ElementTree.SubElement(root, 'joints')
+	attrs = ElementTree.SubElement(root, 'attrs')
+	presets = ElementTree.SubElement(root, 'presets')
+	for chain in chains:
+		joint_info = ElementTree.SubElement(joints, 'joint')
+		if chain['allControls']:
+			preset_info = ElementTree.SubElement(presets, 'preset')
+			preset_info.set('allCtrls', 'True')
+			preset_info.set('name', chain['name'])
+			joint_info.set('controls', ','.join(chain['controls']))
+		else:
+			joint_info.set('base', chain['base'])
+			joint_info.set('end', chain['end'])
+		joint_info.set('name', chain['name'])
+		attr_info = ElementTree.SubElement(attrs, 'attr')
+		attr_info.set('name', chain['name'])
+		for attr_name, attr_val in sorted(chain['attrs'].items()):
+			attr_info.set(attr_name, str(attr_val))
+	indent(root)
+	ElementTree.ElementTree(root).write(path)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Timing instrumentation for the overlap tool.  An entry point such as
+    create_dynamic_chain is timed as a run, and the stages inside it as named
+    spans.  A span entered many times, once per chain say, is reported once
+    with its call count and total time.  A run also counts the scene commands it
+    makes and can measure gauges, e.g. the number of nodes in the scene, before
+    and after.  A cProfile capture of the run can be switched on as well.
+
+    Nothing is recorded unless profiling is enabled, either with configure() or
+    with the environment:
+
+        OVERLAP_PROFILE=1              enable spans and counters
+        OVERLAP_PROFILE_CPROFILE=1     also capture cProfile stats
+        OVERLAP_PROFILE_DIR=<dir>      write a .json and .txt report per run
+
+    The report of the last run is kept in last_report().
+
+@applications:
+    - Maya
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import pstats
+import time
+import timeit
+try:
+	from StringIO import StringIO
+except ImportError:
+	from io import StringIO
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+SETTINGS = {
+	'enabled' : os.environ.get('OVERLAP_PROFILE', '') not in ('', '0'),
+	'cprofile' : os.environ.get('OVERLAP_PROFILE_CPROFILE', '') not in ('', '0'),
+	'report_dir' : os.environ.get('OVERLAP_PROFILE_DIR') or None,
+	# Print the text report at the end of every run
+	'echo' : False,
+}
+# Functions listed in a cProfile text report
+PROFILE_LINES = 25
+
+_ACTIVE = None
+_LAST_REPORT = None
+
+#---------------------------------------------------------------------------------#
+# Run
+#---------------------------------------------------------------------------------#
+class Run(object):
+	""" Spans and counters recorded by one timed entry point.
+	Args:
+		name : (str)
+			Name of the entry point
+		cprofile : (bool)
+			Capture cProfile stats for the whole run
+	"""
+	def __init__(self, name, cprofile=False):
+		self.name = name
+		self.started = time.time()
+		self.seconds = 0.0
+		# Span path -> [calls, seconds], in the order spans were first entered
+		self.spans = {}
+		self.order = []
+		self.counters = {}
+		self.profile = cProfile.Profile() if cprofile else None
+		self._stack = []
+
+	@contextlib.contextmanager
+	def span(self, name):
+		self._stack.append(name)
+		path = tuple(self._stack)
+		start = timeit.default_timer()
+		try:
+			yield
+		finally:
+			seconds = timeit.default_timer() - start
+			if path not in self.spans:
+				self.spans[path] = [0, 0.0]
+				self.order.append(path)
+			self.spans[path][0] += 1
+			self.spans[path][1] += seconds
+			self._stack.pop()
+
+	def count(self, name, amount=1):
+		self.counters[name] = self.counters.get(name, 0) + amount
+
+	def report(self):
+		""" The run as a JSON friendly dict. """
+		report = {
+		        'name' : self.name,
+		        'started' : self.started,
+		        'seconds' : self.seconds,
+		        'spans' : [
+		                {
+		                        'name' : path[-1],
+		                        'path' : '/'.join(path),
+		                        'depth' : len(path) - 1,
+		                        'calls' : self.spans[path][0],
+		                        'seconds' : self.spans[path][1],
+		                }
+		                for path in self.order
+		        ],
+		        'counters' : dict(self.counters),
+		}
+		if self.profile is not None:
+			stream = StringIO()
+			stats = pstats.Stats(self.profile, stream=stream)
+			stats.sort_stats('cumulative').print_stats(PROFILE_LINES)
+			report['profile'] = stream.getvalue()
+		return report
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+class _NullSpan(object):
+	""" Span used outside a run, records nothing. """
+	def __enter__(self):
+		return None
+
+	def __exit__(self, *args):
+		return False
+
+_NULL_SPAN = _NullSpan()
+
+class _CountingProxy(object):
+	""" Stands in for a command module, counting every command called through it. """
+	def __init__(self, module, prefix, run):
+		self._module = module
+		self._prefix = prefix
+		self._run = run
+
+	def __getattr__(self, name):
+		attr = getattr(self._module, name)
+		if not callable(attr):
+			return attr
+		return _counting(attr, '{0}.{1}'.format(self._prefix, name), self._run)
+
+def _counting(function, name, run):
+	@functools.wraps(function)
+	def call(*args, **kwargs):
+		run.count('sceneCalls')
+		run.count('calls.{0}'.format(name))
+		return function(*args, **kwargs)
+	return call
+
+def _patch_commands(namespace, commands, run):
+	""" Swap the commands in a module namespace for counting wrappers.
+	Returns:
+		originals : (dict)
+			Name to the original object, for _restore_commands
+	"""
+	originals = {}
+	for name in commands:
+		if name not in namespace:
+			continue
+		original = namespace[name]
+		originals[name] = original
+		if callable(original):
+			namespace[name] = _counting(original, name, run)
+		else:
+			namespace[name] = _CountingProxy(original, name, run)
+	return originals
+
+def _restore_commands(namespace, originals):
+	namespace.update(originals)
+
+def configure(enabled=None, cprofile=None, report_dir=None, echo=None):
+	""" Change the profiling settings.  Arguments left as None are unchanged. """
+	for key, value in (('enabled', enabled), ('cprofile', cprofile), ('report_dir', report_dir), ('echo', echo)):
+		if value is not None:
+			SETTINGS[key] = value
+
+def is_enabled():
+	return bool(SETTINGS['enabled'])
+
+def last_report():
+	""" Report of the last finished run, or None. """
+	return _LAST_REPORT
+
+def format_report(report):
+	""" Text version of a run report. """
+	lines = ['{0:<40} {1:>10.4f}s'.format(report['name'], report['seconds'])]
+	for span in report['spans']:
+		lines.append('{0:<40} {1:>10.4f}s {2:>6}x'.format(
+		        '  ' * (span['depth'] + 1) + span['name'],
+		        span['seconds'],
+		        span['calls'],
+		))
+	if report['counters']:
+		lines.append('counters')
+		for name, value in sorted(report['counters'].items()):
+			lines.append('  {0:<38} {1:>10}'.format(name, value))
+	if 'profile' in report:
+		lines.append(report['profile'])
+	return '\n'.join(lines)
+
+def write_report(report, report_dir):
+	""" Write a run report as <name>_<time>.json and .txt in report_dir.
+	Returns:
+		path : (str)
+			Path of the JSON report
+	"""
+	if not os.path.isdir(report_dir):
+		os.makedirs(report_dir)
+	stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(report['started']))
+	base = os.path.join(report_dir, '{0}_{1}_{2:03d}'.format(
+	        report['name'],
+	        stamp,
+	        int(report['started'] * 1000) % 1000
+	))
+	with open(base + '.json', 'w') as handle:
+		json.dump(report, handle, indent=2, sort_keys=True)
+	with open(base + '.txt', 'w') as handle:
+		handle.write(format_report(report) + '\n')
+	return base + '.json'
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def span(name):
+	""" Time a stage of the active run.  Does nothing outside a run. """
+	if _ACTIVE is None:
+		return _NULL_SPAN
+	return _ACTIVE.span(name)
+
+def count(name, amount=1):
+	""" Add to a counter of the active run. """
+	if _ACTIVE is not None:
+		_ACTIVE.count(name, amount)
+
+@contextlib.contextmanager
+def run(name, namespace=None, commands=(), gauges=None):
+	""" Time an entry point.  Inside another run this is just a span.
+	Args:
+		name : (str)
+			Name of the entry point
+		namespace : (dict)
+			Module globals whose commands are counted during the run
+		commands : (list)
+			Names in namespace to count.  Command modules such as maya.cmds are
+			counted per command
+		gauges : (dict)
+			Name to a callable returning a number.  The change over the run is
+			stored as a counter
+	"""
+	global _ACTIVE, _LAST_REPORT
+	if not is_enabled():
+		yield None
+		return
+	if _ACTIVE is not None:
+		with _ACTIVE.span(name):
+			yield _ACTIVE
+		return
+	current = Run(name, cprofile=SETTINGS['cprofile'])
+	gauges = gauges or {}
+	before = dict((gauge, function()) for gauge, function in gauges.items())
+	originals = _patch_commands(namespace, commands, current) if namespace is not None else {}
+	_ACTIVE = current
+	start = timeit.default_timer()
+	if current.profile is not None:
+		current.profile.enable()
+	try:
+		yield current
+	finally:
+		if current.profile is not None:
+			current.profile.disable()
+		current.seconds = timeit.default_timer() - start
+		_ACTIVE = None
+		if namespace is not None:
+			_restore_commands(namespace, originals)
+		for gauge, function in gauges.items():
+			current.count(gauge, function() - before[gauge])
+		_LAST_REPORT = current.report()
+		if SETTINGS['report_dir']:
+			write_report(_LAST_REPORT, SETTINGS['report_dir'])
+		if SETTINGS['echo']:
+			print(format_report(_LAST_REPORT))
+
+def profiled(name=None, namespace=None, commands=(), gauges=None):
+	""" Decorator running a function as a profiling run, see run(). """
+	def decorator(function):
+		@functools.wraps(function)
+		def call(*args, **kwargs):
+			with run(name or function.__name__, namespace, commands, gauges):
+				return function(*args, **kwargs)
+		return call
+	return decorator
+
+def timed(name=None):
+	""" Decorator timing every call of a function as a span. """
+	def decorator(function):
+		@functools.wraps(function)
+		def call(*args, **kwargs):
+			with span(name or function.__name__):
+				return function(*args, **kwargs)
+		return call
+	return decorator
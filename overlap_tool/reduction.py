@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Keyframe reduction for the overlap tool.  A bake keys every channel on
+    every frame.  Reduction keeps the fewest of those keys that, joined by
+    linear tangents, stay within a tolerance of the baked values, in degrees
+    for rotations and scene units for translations.
+
+    The keys are picked Douglas-Peucker style.  Every channel starts with its
+    first and last key, and each pass adds the worst fitting frame of every
+    segment that is still out of tolerance.  Segments whose worst frame sits
+    near an end are halved too, so the number of passes grows with the log of
+    the frame count.  A last pass drops any key the channel can do without.
+    All channels sharing the same frames are worked on as one (channels,
+    frames) array, so a pass is a handful of NumPy operations however many
+    channels a character has.
+
+@applications:
+    - Maya
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# External
+import numpy
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+# Degrees for rotations, scene units for translations
+TOLERANCE = 0.01
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def as_channels(values, times=None):
+	""" Channel values as a float (channels, frames) array and their times. """
+	values = numpy.atleast_2d(numpy.asarray(values, dtype=numpy.float64))
+	if times is None:
+		times = numpy.arange(values.shape[1], dtype=numpy.float64)
+	times = numpy.asarray(times, dtype=numpy.float64)
+	if times.shape != (values.shape[1],):
+		raise ValueError("Expected {0} frame times, got {1}.".format(values.shape[1], times.size))
+	return values, times
+
+def interpolate_kept(values, keep, times):
+	""" Evaluate every channel from its kept keys with linear interpolation.
+	Args:
+		values : (numpy.ndarray)
+			Channel values (channels, frames)
+		keep : (numpy.ndarray)
+			True for the kept keys (channels, frames).  The first and last
+			frame must be kept
+		times : (numpy.ndarray)
+			Frame times (frames,)
+	Returns:
+		approx : (numpy.ndarray)
+			Interpolated values (channels, frames)
+
+	"""
+	num_channels, num_frames = values.shape
+	# Index of the key at or before and at or after every frame, counted over
+	# the flattened array so the lookups are plain takes
+	index = numpy.arange(num_channels * num_frames).reshape(num_channels, num_frames)
+	prev_key = numpy.maximum.accumulate(numpy.where(keep, index, 0), axis=1)
+	next_key = numpy.minimum.accumulate(numpy.where(keep, index, index.size)[:, ::-1], axis=1)[:, ::-1]
+	flat_values = values.ravel()
+	prev_value = flat_values.take(prev_key)
+	flat_times = numpy.tile(times, num_channels)
+	prev_time = flat_times.take(prev_key)
+	span = flat_times.take(next_key) - prev_time
+	span[span == 0.0] = numpy.inf
+	approx = flat_values.take(next_key)
+	approx -= prev_value
+	approx *= (times - prev_time) / span
+	approx += prev_value
+	return approx
+
+def get_errors(values, keep, times):
+	""" Absolute error of every frame against the kept keys (channels, frames). """
+	return numpy.abs(values - interpolate_kept(values, keep, times))
+
+def split_segments(values, keep, times, tolerance):
+	""" Add keys to every segment that is out of tolerance, in place.
+	Returns:
+		split : (numpy.ndarray)
+			True for the channels that got new keys (channels,)
+
+	"""
+	flat_keep = keep.ravel()
+	errors = get_errors(values, keep, times)
+	errors[keep] = 0.0
+	errors = numpy.where(errors > tolerance, errors, -1.0)
+	split = errors.max(axis=1) >= 0.0
+	errors = errors.ravel()
+	# Every key starts a segment running to the next key, across channels
+	# too since each channel starts with a key
+	starts = numpy.flatnonzero(flat_keep)
+	segment = numpy.cumsum(flat_keep) - 1
+	worst = numpy.maximum.reduceat(errors, starts)
+	worst_frames = numpy.flatnonzero((errors >= 0.0) & (errors == worst[segment]))
+	# A worst frame next to a segment end only peels a little off the segment.
+	# Halving it as well keeps the passes to the log of the frame count
+	worst_segments = segment[worst_frames]
+	start = starts[worst_segments]
+	length = numpy.append(starts[1:], flat_keep.size - 1)[worst_segments] - start
+	offset = worst_frames - start
+	unbalanced = (offset * 4 < length) | (offset * 4 > length * 3)
+	flat_keep[worst_frames] = True
+	flat_keep[start[unbalanced] + length[unbalanced] // 2] = True
+	return split
+
+def remove_redundant(values, keep, times, tolerance):
+	""" Drop keys the channel can do without, in place.  Every other key is
+	tried at once so no two removed keys share a segment.
+	"""
+	flat_keep = keep.ravel()
+	for parity in (0, 1):
+		rank = numpy.cumsum(keep, axis=1)
+		candidates = keep & (rank % 2 == parity)
+		# The first and last key always stay
+		candidates[:, 0] = False
+		candidates[:, -1] = False
+		if not candidates.any():
+			continue
+		trial = keep & ~candidates
+		errors = get_errors(values, trial, times)
+		flat_trial = trial.ravel()
+		starts = numpy.flatnonzero(flat_trial)
+		segment = numpy.cumsum(flat_trial) - 1
+		worst = numpy.maximum.reduceat((errors - tolerance).ravel(), starts)
+		flat_keep[candidates.ravel() & (worst[segment] > 0.0)] = True
+		flat_keep[candidates.ravel() & (worst[segment] <= 0.0)] = False
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def simplify(values, tolerance=TOLERANCE, times=None):
+	""" Pick the keys to keep on each channel.
+	Args:
+		values : (array like)
+			Channel values (channels, frames), or a single channel (frames,)
+		tolerance : (float or array like)
+			Largest allowed error.  An array gives one tolerance per channel
+		times : (array like)
+			Frame times (frames,).  Defaults to 0, 1, 2...
+	Returns:
+		keep : (numpy.ndarray)
+			True for the keys to keep (channels, frames)
+
+	"""
+	values, times = as_channels(values, times)
+	num_channels, num_frames = values.shape
+	keep = numpy.zeros((num_channels, num_frames), dtype=bool)
+	if not num_frames:
+		return keep
+	keep[:, 0] = True
+	keep[:, -1] = True
+	tolerance = numpy.broadcast_to(numpy.asarray(tolerance, dtype=numpy.float64), (num_channels,))[:, None]
+	# Only the channels still out of tolerance take part in the next pass
+	active = numpy.arange(num_channels)
+	while active.size:
+		active_keep = keep[active]
+		split = split_segments(values[active], active_keep, times, tolerance[active])
+		keep[active] = active_keep
+		active = active[split]
+	remove_redundant(values, keep, times, tolerance)
+	return keep
+
+def max_errors(values, keep, times=None):
+	""" Largest error of each channel against its kept keys (channels,). """
+	values, times = as_channels(values, times)
+	if not values.shape[1]:
+		return numpy.zeros(values.shape[0])
+	return get_errors(values, keep, times).max(axis=1)
+
+def format_stats(stats):
+	""" Human readable summary of keyframe reduction stats. """
+	return "Reduced {keysBefore} keys to {keysAfter} on {curves} curves in {seconds:.3f}s, max error {maxError:.4f}".format(**stats)
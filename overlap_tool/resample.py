@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Arc length resampling for the overlap tool.  A dense chain can be
+    simulated on fewer points than it has joints: the chain is resampled to a
+    fixed number of points spaced evenly along its length, those are solved,
+    and the solved shape is laid back onto every joint by interpolating it at
+    the arc length each joint sits at on the rest chain.
+
+    Detail finer than the spacing of the points is lost, so a bend between
+    two points is straightened.  round_trip_error measures how far the joints
+    of a pose move when it goes through a resolution and back.
+
+@applications:
+    - Maya
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# External
+import numpy
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+# Fewest points a chain can be simulated on, its two ends
+MIN_RESOLUTION = 2
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def arc_parameters(points):
+	""" Normalized arc length of every point along a chain, 0 at the first
+	point and 1 at the last.  Chains of zero length are spaced evenly.
+	Args:
+		points : (numpy.ndarray)
+			Positions shaped (..., points, 3)
+	Returns:
+		params : (numpy.ndarray)
+			Shaped (..., points)
+
+	"""
+	points = numpy.asarray(points, dtype=numpy.float64)
+	lengths = numpy.linalg.norm(numpy.diff(points, axis=-2), axis=-1)
+	params = numpy.zeros(points.shape[:-1])
+	numpy.cumsum(lengths, axis=-1, out=params[..., 1:])
+	total = params[..., -1:]
+	even = numpy.broadcast_to(numpy.linspace(0.0, 1.0, points.shape[-2]), params.shape)
+	return numpy.where(total > 0.0, params / numpy.where(total > 0.0, total, 1.0), even)
+
+def sample_polyline(points, params, targets):
+	""" Positions along chains at given arc length parameters, by linear
+	interpolation between the points either side.
+	Args:
+		points : (numpy.ndarray)
+			Positions shaped (..., points, 3)
+		params : (numpy.ndarray)
+			Increasing parameter of every point shaped (..., points)
+		targets : (numpy.ndarray)
+			Parameters to sample at shaped (samples,) or (..., samples)
+	Returns:
+		samples : (numpy.ndarray)
+			Shaped (..., samples, 3)
+
+	"""
+	points = numpy.asarray(points, dtype=numpy.float64)
+	params = numpy.asarray(params, dtype=numpy.float64)
+	targets = numpy.broadcast_to(numpy.asarray(targets, dtype=numpy.float64), params.shape[:-1] + numpy.shape(targets)[-1:])
+	# Segment each target falls in, counted for every chain at once
+	segment = numpy.sum(params[..., None, 1:-1] <= targets[..., :, None], axis=-1)
+	start = numpy.take_along_axis(params, segment, axis=-1)
+	end = numpy.take_along_axis(params, segment + 1, axis=-1)
+	span = end - start
+	weight = numpy.where(span > 0.0, (targets - start) / numpy.where(span > 0.0, span, 1.0), 0.0)
+	weight = numpy.clip(weight, 0.0, 1.0)[..., None]
+	first = numpy.take_along_axis(points, segment[..., None], axis=-2)
+	second = numpy.take_along_axis(points, segment[..., None] + 1, axis=-2)
+	return first + (second - first) * weight
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def resample_chain(points, count):
+	""" Resample chains to count points spaced evenly along their length.  The
+	first and last points are kept where they are.
+	Args:
+		points : (array like)
+			Positions shaped (..., points, 3), every frame of a chain at once
+		count : (int)
+			Points to resample to
+	Returns:
+		samples : (numpy.ndarray)
+			Shaped (..., count, 3)
+
+	"""
+	if count < MIN_RESOLUTION:
+		raise ValueError("Cannot resample a chain to fewer than {0} points.".format(MIN_RESOLUTION))
+	points = numpy.asarray(points, dtype=numpy.float64)
+	return sample_polyline(points, arc_parameters(points), numpy.linspace(0.0, 1.0, count))
+
+def map_to_joints(samples, joint_params):
+	""" Lay evenly spaced samples back onto a chain's joints.
+	Args:
+		samples : (array like)
+			Solved positions shaped (..., count, 3), spaced as resample_chain
+			spaces them
+		joint_params : (array like)
+			Arc length parameter of every joint on the rest chain shaped
+			(joints,), see arc_parameters
+	Returns:
+		positions : (numpy.ndarray)
+			Shaped (..., joints, 3)
+
+	"""
+	samples = numpy.asarray(samples, dtype=numpy.float64)
+	sample_params = numpy.broadcast_to(numpy.linspace(0.0, 1.0, samples.shape[-2]), samples.shape[:-1])
+	return sample_polyline(samples, sample_params, joint_params)
+
+def sample_weights(joint_params, count):
+	""" Weight of every joint in each of count points spaced evenly along a
+	chain, the linear interpolation resample_chain does as a matrix.
+	Args:
+		joint_params : (array like)
+			Arc length parameter of every joint on the rest chain shaped
+			(joints,), see arc_parameters
+		count : (int)
+			Points spaced evenly along the chain
+	Returns:
+		weights : (numpy.ndarray)
+			Shaped (count, joints), every row sums to 1 and has at most two
+			joints weighted
+
+	"""
+	if count < MIN_RESOLUTION:
+		raise ValueError("Cannot resample a chain to fewer than {0} points.".format(MIN_RESOLUTION))
+	joint_params = numpy.asarray(joint_params, dtype=numpy.float64)
+	# Interpolating the identity gives each point's share of every joint
+	return sample_polyline(numpy.identity(len(joint_params)), joint_params, numpy.linspace(0.0, 1.0, count))
+
+def round_trip_error(points, count):
+	""" Largest distance a joint moves when its chain is resampled to count
+	points and mapped back, the accuracy given up for simulating on count
+	points.
+	Args:
+		points : (array like)
+			Joint positions shaped (..., joints, 3)
+		count : (int)
+			Resolution
+	Returns:
+		error : (float)
+
+	"""
+	points = numpy.asarray(points, dtype=numpy.float64)
+	mapped = map_to_joints(resample_chain(points, count), arc_parameters(points))
+	return float(numpy.linalg.norm(mapped - points, axis=-1).max())
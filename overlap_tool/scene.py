@@ -0,0 +1,2796 @@
+#!/usr/bin/env python
+
+"""
+
+@author:
+    slu
+
+@description:
+    Scene side of the overlap tool.  Builds, bakes and removes the dynamic
+    chains in the Maya scene and reads and writes character prefs from the
+    selection.  The hierarchy, naming, solver and prefs logic lives in the
+    core modules, which import nothing from Maya.
+
+@departments:
+    - Animation
+
+@applications:
+    - Maya
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# Built-in
+import contextlib
+try:
+	from itertools import izip
+except ImportError:
+	izip = zip
+import os
+import timeit
+import maya.cmds as mc
+import maya.mel as mm
+import maya.api.OpenMaya as om
+from pymel.core import *
+
+# External
+import numpy
+
+# Internal
+from overlap_tool import cache
+from overlap_tool import jointcache
+from overlap_tool import keys
+from overlap_tool import naming
+from overlap_tool import orient
+from overlap_tool import parallel
+from overlap_tool import prefs
+from overlap_tool import profiling
+from overlap_tool import reduction
+from overlap_tool import resample
+from overlap_tool import solver
+from overlap_tool import topology
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+DYN_CONTROLLER_SIZE = 5
+MAGNETISM = 1
+
+DYN_SUFFIX = '_DYN'
+BLND_SUFFIX = '_BLND'
+CTRL_SUFFIX = 'DynChainControl'
+
+# Length constraint passes per frame of the offline solver, see solver.LengthConstraint
+ITERATIONS = 10
+
+DYN_SMOOTHNESS = 1.0
+USING_ALL_CONTROLS = False
+# Pin the tip of new chains to their last blend joint in the offline solver
+HAS_TIP_CONSTRAINT = False
+ALLOW_CHAIN_STRETCH = False
+# Fraction a segment may stretch or shrink by when ALLOW_CHAIN_STRETCH is on
+MAX_CHAIN_STRETCH = 0.1
+
+NODE_SUFFIX = 'CON'
+
+# How the goal curve follows the duplicate controls.  A cluster per CV
+# constrained to its control, or one skinCluster binding every CV to the blend
+# joint it sits on
+CLUSTER_BINDING = 'cluster'
+SKIN_BINDING = 'skinCluster'
+GOAL_BINDINGS = [CLUSTER_BINDING, SKIN_BINDING]
+GOAL_BINDING = CLUSTER_BINDING
+
+# How the original controls follow the dynamic joints.  A parent and a scale
+# constraint per joint, or a multMatrix per control driving its
+# offsetParentMatrix, which needs Maya 2020 or later
+CONSTRAINT_DRIVE = 'constraint'
+MATRIX_DRIVE = 'matrix'
+DRIVE_MODES = [CONSTRAINT_DRIVE, MATRIX_DRIVE]
+DRIVE_MODE = CONSTRAINT_DRIVE
+
+# How the dynamic joints follow the simulated curve.  A spline IK handle, or
+# no handle at all with the joints oriented from the curve's points when the
+# chain is baked, see orient.chain_rotations
+IK_ORIENT = 'ikSpline'
+ANALYTIC_ORIENT = 'analytic'
+ORIENT_MODES = [IK_ORIENT, ANALYTIC_ORIENT]
+ORIENT_MODE = IK_ORIENT
+
+# Points a new chain is simulated on, spaced evenly along it whatever its
+# joint count.  0 simulates on every joint
+SIM_RESOLUTION = 0
+
+# Controller attributes the solver reads, see get_chain_attrs
+SOLVER_ATTRS = ['attraction', 'lag', 'easeIn']
+SOLVER_ATTR_PREFIXES = ('jointStiffness', 'pinWeight')
+
+# Per particle attribute placing each particle on its chain's stiffness ramp,
+# see add_goal_attrs
+STIFFNESS_COORD_ATTR = 'stiffnessCoordPP'
+
+# Stored prefs attributes a chain is built with rather than set on it afterwards
+BUILD_ATTRS = ['simResolution']
+
+# Network node every dynamic chain controller is connected to
+REGISTRY_NODE = 'overlapChainRegistry'
+# Multi message attributes on a chain controller, connected from the chain's
+# nodes in order.  Keyed by the DynamicChain property reading them
+CHAIN_MEMBER_ATTRS = {
+	'controls' : 'chainControls',
+	'joints' : 'chainJoints',
+	'dyn_joints' : 'chainDynJoints',
+	'blend_joints' : 'chainBlendJoints',
+	'duplicate_controls' : 'chainDuplicateControls',
+	'goal_expressions' : 'chainGoalExpressions',
+	'goal_curve' : 'chainGoalCurve',
+	'drive_nodes' : 'chainDriveNodes',
+	'driven_controls' : 'chainDrivenControls',
+	'soft_curve' : 'chainSoftCurve',
+	'ik_handle' : 'chainIkHandle',
+}
+# Comma joined name attributes of chains built before the registry
+LEGACY_MEMBER_ATTRS = {
+	'controls' : 'allControls',
+	'dyn_joints' : 'allDynJoints',
+	'blend_joints' : 'allBlendJoints',
+	'duplicate_controls' : 'duplicateControls',
+	'goal_expressions' : 'goalExpressions',
+	'goal_curve' : 'nameOfGoalCurve',
+}
+
+# Script node posing the scrubbed and analytic chains whenever the time
+# changes.  It is saved with the scene and does nothing until the tool is loaded
+LIVE_SCRIPT_NODE = 'overlapLiveChains'
+LIVE_SCRIPT = (
+	'try:\n'
+	'\tfrom overlap_tool import scene\n'
+	'except ImportError:\n'
+	'\tpass\n'
+	'else:\n'
+	'\tscene.update_live_chains()\n'
+)
+# Checkpoints of the chains being scrubbed, keyed by chain controller
+SCRUB_CACHE = cache.StateCache()
+SCRUB_CHAINS = {}
+# Scrubbed controllers whose solver attributes were set, keyed or connected
+# since update_live_chains last read them, and the attributeChanged callbacks
+# watching each controller and its anim curves
+SCRUB_DIRTY = set()
+SCRUB_CALLBACKS = {}
+# Depth of live_updates_suspended blocks, the samplers step the time themselves
+LIVE_SUSPENDED = 0
+
+# Channels keyframe reduction works on.  Visibility keys are stepped and left alone
+REDUCED_CHANNELS = [
+	'translateX', 'translateY', 'translateZ',
+	'rotateX', 'rotateY', 'rotateZ',
+	'scaleX', 'scaleY', 'scaleZ',
+]
+
+# Scene commands counted while profiling
+SCENE_COMMANDS = [
+	'addAttr', 'cluster', 'connectAttr', 'copyKey', 'createNode', 'cutKey',
+	'delete', 'duplicate', 'expression', 'getAttr', 'group', 'ikHandle', 'joint',
+	'listAttr', 'listRelatives', 'ls', 'objExists', 'parent', 'parentConstraint',
+	'pasteKey', 'pointConstraint', 'rename', 'scaleConstraint', 'scriptNode', 'select', 'setAttr',
+	'mc', 'mel', 'mm',
+]
+#---------------------------------------------------------------------------------#
+# Helper Functions 
+#---------------------------------------------------------------------------------#
+def count_scene_nodes():
+	return len(mc.ls())
+
+def scene_run(function):
+	""" Decorator timing a scene entry point as a profiling run.  The scene
+	commands it makes and the nodes it adds are counted.
+	"""
+	return profiling.profiled(
+	        function.__name__,
+	        globals(),
+	        SCENE_COMMANDS,
+	        {'nodesAdded' : count_scene_nodes}
+	)(function)
+
+@contextlib.contextmanager
+def keep_selection():
+	""" Restore the selection after a block of commands that select what they
+	create.  Selected nodes deleted by the block are dropped.
+	"""
+	selection = mc.ls(selection=True)
+	try:
+		yield
+	finally:
+		selection = mc.ls(selection) if selection else []
+		if selection:
+			mc.select(selection, replace=True)
+		else:
+			mc.select(clear=True)
+
+@contextlib.contextmanager
+def live_updates_suspended():
+	""" Keep the live script node from posing chains while a block steps the
+	time, see update_live_chains.
+	"""
+	global LIVE_SUSPENDED
+	LIVE_SUSPENDED += 1
+	try:
+		yield
+	finally:
+		LIVE_SUSPENDED -= 1
+
+def get_anim_curves(nodes):
+	""" Anim curves driving the attributes of nodes, from one listConnections.
+	Args:
+		nodes : (list)
+			Nodes to look up
+	Returns:
+		curves : (dict)
+			Node name to a list of (attr, curve) pairs
+	"""
+	curves = {}
+	nodes = [str(node) for node in nodes]
+	if not nodes:
+		return curves
+	connections = mc.listConnections(
+	        nodes,
+	        source=True,
+	        destination=False,
+	        connections=True,
+	        plugs=True,
+	        type='animCurve'
+	) or []
+	for plug, curve_plug in pairwise(connections):
+		node, attr = plug.split('.', 1)
+		curves.setdefault(node, []).append((attr, curve_plug.split('.', 1)[0]))
+	return curves
+
+@profiling.timed()
+def transfer_anim_curves(pairs, move=False):
+	""" Give each destination the animation of its source by connecting anim
+	curves to it, rather than going through the keyframe clipboard a node at a
+	time.  A destination's own curves are deleted first, where its source has
+	any to give.
+	Args:
+		pairs : (list)
+			(source, destination) node pairs
+		move : (bool)
+			Reconnect the source's curves instead of duplicating them, leaving
+			the source unanimated
+	Returns:
+		transferred : (int)
+			Number of curves connected
+	"""
+	pairs = [(str(source), str(destination)) for source, destination in pairs]
+	if not pairs:
+		return 0
+	source_curves = get_anim_curves([source for source, _ in pairs])
+	plugs = [
+	        (source, destination, attr, curve)
+	        for source, destination in pairs
+	        for attr, curve in source_curves.get(source, [])
+	]
+	if not plugs:
+		return 0
+	destination_curves = get_anim_curves(set(destination for _, destination, _, _ in plugs))
+	stale = [curve for curves in destination_curves.values() for _, curve in curves]
+	if stale:
+		mc.delete(stale)
+	curves = [curve for _, _, _, curve in plugs]
+	if not move:
+		curves = mc.duplicate(curves)
+	commands = []
+	for (source, destination, attr, _), curve in izip(plugs, curves):
+		if move:
+			commands.append('disconnectAttr "{0}.output" "{1}.{2}";'.format(curve, source, attr))
+		commands.append('connectAttr -f "{0}.output" "{1}.{2}";'.format(curve, destination, attr))
+	mm.eval('\n'.join(commands))
+	return len(plugs)
+
+@profiling.timed()
+def add_duplicate_blend_controls(jointCtrlObj, controls, blend_joints, all_controls=False):
+	# Duplicate controls and attach to blend joints
+	all_nodes = []
+	new_control = ''
+	#new_ctrl_group = group(name='{0}_BlendCtrlGroup'.format(str(jointCtrlObj)))
+	# If select all controls is checked, then we need every control.  Whereas if it is,
+	# not checked, we can assume that the controls are in a hierarchy structure.  Thus,
+	# getting the first control will grab the hierarchy for the entire control set
+	# Built once and shared by every duplicate
+	blend_map = get_blend_joint_map(blend_joints)
+	if all_controls: 
+		duplicate_controls = [duplicate(str(control)) for control in controls]
+		new_control = duplicate_controls[0][0]
+		for control, dup_ctrl in izip(controls, duplicate_controls):
+			all_nodes = replace_joint_nodes(dup_ctrl[0], all_nodes, blend_joints, control, blend_map)
+			#parent(dup_ctrl, new_ctrl_group)
+	else:	
+		first_control = str(controls[0])
+		new_control = duplicate(first_control, renameChildren=True)[0]
+		all_nodes = replace_joint_nodes(new_control, all_nodes, blend_joints, controls[0], blend_map)
+		#parent(new_control, new_ctrl_group)
+	# Add this to keep track in case of deletion
+	#add_name_to_attr(jointCtrlObj, {'blendControl' : new_control})
+	#parent(new_control, world=True)
+	
+	# Turn off visibility on new controls
+	#addAttr(jointCtrlObj, ln="blendCtrlVis", at='bool', keyable=True)
+	#connectAttr('{0}.blendCtrlVis'.format(jointCtrlObj),'{0}.visibility'.format(new_ctrl_group)) 
+	#try:
+		#setAttr("{0}.visibility".format(new_control), 0)
+	#except RuntimeError as e:
+		#displayInfo("Cannot set visibility for {0}".format(new_control))
+	return all_nodes
+
+@profiling.timed()
+def add_dynamic_attributes(jointCtrlObj, lag=None):
+	""" Add all the attributes to the controller.
+	Args:
+		jointCtrlObj - (str)
+			Name of the controller object.
+		lag - (float)
+			Default lag, DYN_SMOOTHNESS if not given
+	"""
+	if lag is None:
+		lag = DYN_SMOOTHNESS
+	addAttr(jointCtrlObj,
+                min=0,ln="controllerSize",max=500,keyable=True,at='double',dv=DYN_CONTROLLER_SIZE)
+	addAttr(jointCtrlObj,
+	        min=0, ln="attraction", max=1, keyable=True, at='double', dv=MAGNETISM)
+	addAttr(jointCtrlObj,
+	        min=0, ln='lag', max=10, keyable=True, at='double', dv=lag)
+	addAttr(jointCtrlObj,
+	        min=0, ln='easeIn', max=1, keyable=True, at='double', dv=1.0)
+
+@profiling.timed()
+def add_name_to_attr(jointCtrlObj, obj_names):
+	""" Add specified names to the attributes.
+	Args:
+		jointCtrlObj - (str)
+	        	Name of the controller object
+	        obj_names - (dict)
+	        	Dict with obj as keys and names as values
+	"""
+	for name, obj in obj_names.items():
+		addAttr(jointCtrlObj, ln=name, dt="string", keyable=True)
+		setAttr('{ctrl}.{name}'.format(ctrl=jointCtrlObj, name=name), obj, lock=True, type="string")
+
+@profiling.timed()
+def build_clusters_from_curve(nameOfCurve, numJoints):
+	""" Build a cluster on each of the first numJoints CVs of the curve.
+	Returns:
+		clusters : (list)
+			Cluster handles, one per CV
+	"""
+	clusters = [
+	        str(cluster('{0}.cv[{1}]'.format(nameOfCurve, i))[1])
+	        for i in range(numJoints)
+	]
+	# Hide all the clusters
+	change_visibility(clusters, 0)
+	return clusters
+
+def set_skin_weights(skin, weights):
+	""" Set every CV's weights of a skinCluster with a single MEL evaluation.
+	Args:
+		skin : (str)
+			skinCluster
+		weights : (numpy.ndarray)
+			Weight of every influence per CV shaped (cvs, influences), in
+			the order the influences were bound
+	"""
+	weights = numpy.asarray(weights, dtype=numpy.float64)
+	if not weights.size:
+		return
+	mm.eval('\n'.join([
+	        'setAttr "{0}.weightList[{1}].weights[0:{2}]" {3};'.format(
+	                skin, i, weights.shape[1] - 1, ' '.join([repr(float(value)) for value in row]))
+	        for i, row in enumerate(weights)
+	]))
+
+@profiling.timed()
+def bind_goal_curve(nameOfCurve, blend_joints, weights=None):
+	""" Bind the goal curve to the blend joints with a single skinCluster, in
+	place of a cluster and two constraints per CV.  The weights are set
+	explicitly rather than left to the closest distance bind, which can hand
+	a CV to a joint that is near it in space but not along the chain.
+	Args:
+		weights : (numpy.ndarray)
+			Weight of every blend joint per CV shaped (cvs, joints).  By
+			default the curve has a CV on every joint, fully weighted to the
+			blend joint it sits on
+	Returns:
+		skin : (str)
+			The skinCluster
+	"""
+	if weights is None:
+		weights = numpy.identity(len(blend_joints))
+	weights = numpy.asarray(weights, dtype=numpy.float64)
+	if weights.shape[1] != len(blend_joints):
+		raise ValueError("Expected weights for each of the {0} blend joints, got {1}.".format(
+		        len(blend_joints), weights.shape[1]))
+	skin = mc.skinCluster(
+	        blend_joints,
+	        nameOfCurve,
+	        toSelectedBones=True,
+	        bindMethod=0,
+	        maximumInfluences=max(1, int(numpy.count_nonzero(weights, axis=1).max())),
+	        obeyMaxInfluences=True,
+	        name='{0}_goalSkin'.format(nameOfCurve)
+	)[0]
+	set_skin_weights(skin, weights)
+	return skin
+
+@profiling.timed()
+def build_curve_from_joint(jointPos):
+	""" Build the curve from the joint positions.
+	Args:
+		jointPos - (list)
+	        	List of joint positions containing [x,y,z]
+	        counter - (int)
+	        	Number of joint positions
+
+	"""
+	counter = len(jointPos)
+	#This string will house the command to create our curve.
+	buildCurve="curve -d 1 "
+	#Another counter integer for the for loop
+	cvCounter=0
+	#Loops over and adds the position of each joint to the buildCurve string.
+	for i in range(cvCounter, counter):
+		buildCurve = "{curve} -p {jpos}".format(
+	                curve = buildCurve,
+	                jpos = " ".join([str(pos) for pos in jointPos[i]])
+	        )
+	buildCurve = buildCurve + ";"
+	#Adds the end terminator to the build curve command
+	#Evaluates the $buildCurve string as a Maya command. (creates the curve running through the joints)
+	return str(mel.eval(buildCurve))
+
+def change_visibility(items, visibility):
+	""" Change the visiblity of all the items.
+	Args:
+		items - (list)
+			Items to change the visiblity
+		visibility - (bool)
+			Whether the item should be visible
+
+	"""
+	set_attrs_bulk([("{0}.lodVisibility".format(item), visibility) for item in items])
+
+def connect_controller_to_system(ctrl, system, attrs):
+	""" Connect the system attributes to the controllers.
+	Args:
+		ctrl - (str)
+			Name of the controller
+		system - (str)
+			Name of the system to connect
+		attrs - (dict)
+			attributes to connect.  The key represents
+			the controllers attr and the value represents
+			the systems attr.
+
+	"""
+	for c_attr, s_attr in attrs.items():
+		connectAttr(
+		        '{ctrl}.{attr}'.format(ctrl=ctrl, attr=c_attr), 
+		        '{system}.{attr}'.format(system=system, attr=s_attr), 
+		        f=True
+		)
+
+def get_constrained_controls(joint_names, joint_list, joints_per_control):
+	""" The original control each dynamic joint drives.  When there are fewer
+	controls than joints a control is repeated for every joint under it.
+	Returns:
+		constrainer : (list)
+			A control per dynamic joint
+	"""
+	# In the instance that there are more controls than joints, use the same controller
+	constrainer = []
+	if len(joint_names) < len(joint_list):
+		for i, num_joints in enumerate(joints_per_control):
+			for joint_instance in range(num_joints):
+				constrainer.append(joint_names[i])
+	else:
+		constrainer = joint_names
+		
+	if len(joint_names) < len(joint_list):
+		constrainer.append(joint_names[-1])
+	return constrainer
+
+@profiling.timed()
+def constrain_joints(joint_names, joint_list, blend_joints, joints_per_control):
+	""" Constrains the original joints to the dynamic joints and
+	the blended joints.  Does a parent and scale constrain to the original joints
+	Args:
+		joint_names : (list)
+			List of joint names
+	        joint_list : (list)
+			List of dynamic joints
+	        blend_joints : (list)
+			List of blend joints
+	        
+	"""
+	constraint_weights = []
+	constrainer = get_constrained_controls(joint_names, joint_list, joints_per_control)
+	#constrainer.append(joint_names[-1])
+	for i, cur_joint in enumerate(joint_list):
+		try:
+			scaleConstraint(cur_joint, constrainer[i])
+		except RuntimeError as e:
+			displayInfo("Unable to perform scale constrain on {0}".format(constrainer[i]))
+		try:
+			constraint_weights.append(
+		                parentConstraint(
+		                        cur_joint, 
+		                        constrainer[i], 
+		                        tl=True, 
+		                        mo=True, 
+		                        wal=True
+		                )
+		        )
+		except RuntimeError as e:
+			displayInfo("Dynamic joints could not constrain to original joints.\n" )
+
+	# Create constraints from original joints to the duplicate blend joints	
+	#for i, cur_joint in enumerate(blend_joints):
+		#try:
+			#scaleConstraint(cur_joint, constrainer[i])
+		#except RuntimeError as e:
+			#displayInfo("Unable to perform scale constrain on {0}".format(constrainer[i]))
+		#try:
+			#parentConstraint(cur_joint, constrainer[i], mo=True)
+		#except RuntimeError as e:
+			#displayInfo("Blended joints could not constrain to original joints.\n")
+	return constraint_weights
+
+def get_matrix(plug):
+	""" A matrix attribute as a 4x4 array. """
+	return numpy.array(mc.getAttr(plug), dtype=numpy.float64).reshape(4, 4)
+
+@profiling.timed()
+def drive_controls_by_matrix(joint_names, joint_list, joints_per_control):
+	""" Drive the original controls from the dynamic joints through their
+	offsetParentMatrix, with no constraint nodes.  The offset a maintain offset
+	constraint would hold is worked out once here and kept as a constant input
+	of one multMatrix per control:
+
+	    inverseMatrix * bindWorld * inverse(bindDynamic) * dynamic * parentInverseMatrix
+
+	The control's own channels are cancelled out, so its world matrix follows
+	the dynamic joint as it would under the constraints.  A control over
+	several joints follows the first of them.
+	Args:
+		joint_names : (list)
+			Original controls
+		joint_list : (list)
+			Dynamic joints
+		joints_per_control : (list)
+			Joints under each control
+	Returns:
+		drivers, driven : (list, list)
+			The multMatrix nodes and the control each one drives
+
+	"""
+	drivers = []
+	driven = []
+	matrices = []
+	commands = []
+	for dyn_joint, control in izip(joint_list, get_constrained_controls(joint_names, joint_list, joints_per_control)):
+		control = str(control)
+		if control in driven:
+			continue
+		offset = numpy.dot(
+		        get_matrix('{0}.worldMatrix[0]'.format(control)),
+		        get_matrix('{0}.worldInverseMatrix[0]'.format(dyn_joint))
+		)
+		driver = mc.createNode('multMatrix', name='{0}_driveMatrix'.format(get_leaf_name(control)), skipSelect=True)
+		# Put back on the control when the chain is deleted
+		mc.addAttr(driver, ln='restMatrix', at='matrix')
+		matrices.append(('{0}.restMatrix'.format(driver), get_matrix('{0}.offsetParentMatrix'.format(control))))
+		matrices.append(('{0}.matrixIn[1]'.format(driver), offset))
+		commands.extend([
+		        'connectAttr "{0}.inverseMatrix" "{1}.matrixIn[0]";'.format(control, driver),
+		        'connectAttr "{0}.worldMatrix[0]" "{1}.matrixIn[2]";'.format(dyn_joint, driver),
+		        'connectAttr "{0}.parentInverseMatrix[0]" "{1}.matrixIn[3]";'.format(control, driver),
+		        'connectAttr -f "{0}.matrixSum" "{1}.offsetParentMatrix";'.format(driver, control),
+		])
+		drivers.append(driver)
+		driven.append(control)
+	set_matrices_bulk(matrices)
+	if commands:
+		mm.eval('\n'.join(commands))
+	return drivers, driven
+
+@profiling.timed()
+def create_joints(joint_names, jointPos, joint_list, blend_joints, names=None):
+	""" Create both the dynamic joint chain and the blend joint chain.  The dynamic joint chain
+	will attach to the hair system while the blend joint chain will control the keyed animation.
+	
+	Args:
+		joint_names : (list)
+			list of all the joint names
+	        jointPos : (list)
+			list of x,y,z coordinates of the joints
+	        joint_list : (list)
+			list to append all the dynamic joints
+	        blend_joints : (list)
+			list to append all the blend joints
+		names : (naming.NameAllocator)
+			Allocator to take the joint names from.  Indexes the scene if not given
+	                
+	"""                
+	if names is None:
+		names = get_name_allocator()
+	joint_list.extend(create_joint_chain(
+	        [names.name("{0}_".format(joint_name), DYN_SUFFIX) for joint_name in joint_names],
+	        jointPos
+	))
+	# Create the blend joints
+	blend_joints.extend(create_joint_chain(
+	        [names.name("{0}_".format(joint_name), BLND_SUFFIX) for joint_name in joint_names],
+	        jointPos
+	))
+
+def create_joint_chain(joint_names, jointPos):
+	""" Create a chain of joints at world positions, each parented under the one
+	before, without going through the selection.
+	Args:
+		joint_names : (list)
+			Name of each joint
+		jointPos : (list)
+			World x,y,z of each joint
+	Returns:
+		joints : (list)
+			The new joints, root first
+
+	"""
+	joints = []
+	parent_pos = (0.0, 0.0, 0.0)
+	for joint_name, pos in izip(joint_names, jointPos):
+		flags = {'name' : joint_name, 'skipSelect' : True}
+		if joints:
+			flags['parent'] = joints[-1]
+		new_joint = createNode('joint', **flags)
+		# The chain has no rotations, so local translates are the world offsets
+		setAttr(
+		        '{0}.translate'.format(new_joint),
+		        pos[0] - parent_pos[0],
+		        pos[1] - parent_pos[1],
+		        pos[2] - parent_pos[2]
+		)
+		joints.append(new_joint)
+		parent_pos = pos
+	return joints
+
+def lock_and_hide_attr(jointCtrlObj):
+	""" Lock the attribute and hide it from the menu.
+	Args:
+		jointCtrlObj - (str)
+			Name of the controller object
+	"""
+	attrs = ['tx', 'ty', 'tz',
+	         'rx', 'ry', 'rz',
+	         'sx', 'sy', 'sz',]
+	for attr in attrs:
+		setAttr('{obj}.{attr}'.format(obj = jointCtrlObj, attr = attr), 
+	        	lock=True, 
+	                keyable=False
+		)
+
+def get_leaf_name(node):
+	""" Name of a node without its DAG path. """
+	return str(node).rsplit('|', 1)[-1]
+
+def get_blend_joint_map(blend_joints):
+	""" Key each blend joint by the name of the joint it was created from.  Blend
+	joints are named <joint>_<instance><BLND_SUFFIX> by create_joints.
+	Args:
+		blend_joints : (list)
+			List of blend joints
+	Returns:
+		blend_map : (dict)
+			Base joint name to blend joint
+
+	"""
+	blend_map = {}
+	for blend_joint in blend_joints:
+		name = get_leaf_name(blend_joint)
+		if name.endswith(BLND_SUFFIX):
+			name = name[:-len(BLND_SUFFIX)].rsplit('_', 1)[0]
+		blend_map[name] = blend_joint
+	return blend_map
+
+def replace_joint_nodes(base_node, all_nodes, blend_joints, original_node=None, blend_map=None):
+	""" This function will match new controls to the blended joints.  Take a parent
+	base node, traverse through its entire tree, and parent the relative blended joint
+	under each duplicated joint's parent.  Also, hides the blended joints visibility.
+
+	The original hierarchy is walked alongside the duplicate so joints renamed by the
+	duplicate are still matched by the name of the joint they were copied from.
+	Args:
+		base_node : (PyNode)
+			Duplicated control to traverse
+		all_nodes : (list)
+			List to append every traversed node to
+		blend_joints : (list)
+			List of blend joints
+		original_node : (PyNode)
+			Control base_node was duplicated from
+		blend_map : (dict)
+			Base joint name to blend joint, see get_blend_joint_map
+
+	"""
+	if blend_map is None:
+		blend_map = get_blend_joint_map(blend_joints)
+	# Iterative preorder walk so long chains don't hit the recursion limit
+	stack = [(base_node, original_node)]
+	while stack:
+		node, original = stack.pop()
+		all_nodes.append(node)
+		children = node.getChildren()
+		original_children = original.getChildren() if original is not None else []
+		if len(original_children) != len(children):
+			original_children = [None] * len(children)
+		for child, original_child in izip(children, original_children):
+			if isinstance(child, Joint):
+				key = get_leaf_name(original_child if original_child is not None else child)
+				blend_joint = blend_map.get(key)
+				if blend_joint is not None:
+					parent(blend_joint, node)
+					setAttr('{0}.visibility'.format(blend_joint), False)
+		stack.extend(reversed(list(izip(children, original_children))))
+	return all_nodes
+	
+@profiling.timed()
+def build_topology(root):
+	""" Index the hierarchy under root in a single traversal.
+	Args:
+		root : (PyNode)
+			Top of the hierarchy, usually the selected base control
+	Returns:
+		rig : (topology.RigTopology)
+
+	"""
+	return topology.RigTopology(
+	        root,
+	        lambda node: node.getChildren(),
+	        lambda node: isinstance(node, Joint),
+	        NODE_SUFFIX
+	)
+
+def get_rig(node, rig=None):
+	""" Use the given index if it covers node, otherwise index from node. """
+	if rig is None or node not in rig:
+		rig = build_topology(node)
+	return rig
+
+@profiling.timed()
+def get_joints_under_controls(control, joint_names, jointPos, rig=None):
+	""" Collect the joints hanging off a control's transforms and their world
+	positions.  The walk does not continue below a joint.
+
+	"""
+	for child in get_rig(control, rig).joints_under(control):
+		joint_names.append(child)
+		jointPos.append(joint(child, q=1,p=1,a=1))
+	return
+
+def find_end_joint(start_control, end_joint= '', to_next_control=False, rig=None):
+	""" Find an end joint given a start controller position. This will
+	continue down the chain to find the last joint.  If to_next_control
+	is set to True,  it will stop at the next available controller.
+	
+	"""
+	return get_rig(start_control, rig).end_joint(start_control, to_next_control) or end_joint
+
+def get_name_allocator():
+	""" Index the dynamic chain names already in the scene, in every
+	namespace, with a single ls.
+	"""
+	suffixes = [DYN_SUFFIX, BLND_SUFFIX, CTRL_SUFFIX]
+	return naming.NameAllocator(suffixes, mc.ls(['*{0}'.format(suffix) for suffix in suffixes], recursive=True))
+
+def get_instance_number(prefix='', instance=0, suffix=''):
+	while objExists("{0}{1}{2}".format(prefix, instance, suffix)):
+		instance += 1
+	return instance
+
+def pairwise(iterable):
+	a = iter(iterable)
+	return izip(a, a)
+
+@profiling.timed()
+def get_joints_per_control(controls, joint_names, rig=None):
+	return get_rig(controls[0], rig).joints_per_control(controls, len(joint_names))
+
+def get_joint_count(base_ctrl, end_ctrl, rig=None):
+	""" Get the number of joints in between two controls
+	"""
+	return get_rig(base_ctrl, rig).joint_count(base_ctrl, end_ctrl)
+
+@profiling.timed()
+def get_all_controllers(cur_ctrl, end_ctrl, rig=None):
+	""" Get all the controllers through the chain.
+	"""
+	return get_rig(cur_ctrl, rig).all_controllers(cur_ctrl, end_ctrl)
+
+@profiling.timed()
+def get_joint_information(cur_joint, end_joint, rig=None):
+	""" Gets all the joint information running down a chain
+	from the current joint to the end joint.
+	
+	Args:
+		cur_joint : (Joint)
+			The first joint to start from
+	        end_joint : (Joint)
+			The end joint to stop at
+		rig : (topology.RigTopology)
+			Index of the hierarchy containing the chain
+	Returns:
+		joint_names, joint_pos : (list, list)
+			Return a tuple that contains both the list
+	                of joint names and the x,y,z positions
+	                of each joint respectively
+	                
+	"""
+	joint_names = get_rig(cur_joint, rig).chain_joints(cur_joint, end_joint)
+	joint_pos = [joint(joint_name, q=1, p=1, a=1) for joint_name in joint_names]
+	return joint_names, joint_pos
+		
+
+def is_solver_attr(attr):
+	return attr in SOLVER_ATTRS or attr.startswith(SOLVER_ATTR_PREFIXES)
+
+def get_chain_attrs(chainCtrl, sampled=None):
+	""" Read the solver attributes from a dynamic chain controller.
+	Args:
+		chainCtrl : (str)
+			Dynamic chain controller
+		sampled : (dict)
+			Attributes already sampled per frame, see get_animated_attrs.
+			They are kept and the others are read at the current time
+	Returns:
+		attrs : (dict)
+			attraction, lag, easeIn and every jointStiffness{i} and
+			pinWeight{i} value
+
+	"""
+	attrs = dict(sampled or {})
+	names = list(SOLVER_ATTRS)
+	for prefix in SOLVER_ATTR_PREFIXES:
+		names.extend(mc.listAttr(chainCtrl, string=prefix + '*') or [])
+	for attr in names:
+		if attr not in attrs:
+			attrs[attr] = mc.getAttr('{0}.{1}'.format(chainCtrl, attr))
+	return attrs
+
+def get_animated_attrs(chainCtrls):
+	""" Solver attributes of each controller driven by an anim curve, which
+	have to be sampled per frame rather than read once.
+	Args:
+		chainCtrls : (list)
+			Dynamic chain controllers
+	Returns:
+		animated : (dict)
+			Controller to a list of (attr, curve) pairs
+	"""
+	curves = get_anim_curves(chainCtrls)
+	return dict(
+	        (str(chainCtrl), [(attr, curve) for attr, curve in curves.get(str(chainCtrl), []) if is_solver_attr(attr)])
+	        for chainCtrl in chainCtrls
+	)
+
+def get_solver_parameters(chain, num_points, pins=None, attrs=None):
+	""" Solver parameters of a chain read from its controller.  Points with a
+	pin weight but no pin target are not pinned.
+	Args:
+		chain : (DynamicChain)
+			Chain handle or controller name
+		num_points : (int)
+			Points the chain is solved on
+		pins : (dict)
+			The chain's pins when they have been read already, see
+			DynamicChain.pins
+		attrs : (dict)
+			The controller's attributes when they have been read already,
+			see get_chain_attrs
+	Returns:
+		params : (dict)
+			See solver.chain_parameters.  The pin targets are not included
+
+	"""
+	chain = get_chain(chain)
+	if attrs is None:
+		attrs = get_chain_attrs(chain.controller)
+	params = solver.chain_parameters(
+	        attrs,
+	        num_points,
+	        iterations=ITERATIONS,
+	        stretch=MAX_CHAIN_STRETCH if ALLOW_CHAIN_STRETCH else 0.0
+	)
+	if pins is None:
+		pins = chain.pins
+	pinned = numpy.zeros(num_points, dtype=bool)
+	pinned[[index for index in pins if index < num_points]] = True
+	params['pin_weights'] = numpy.where(pinned, params['pin_weights'], 0.0)
+	return params
+
+def get_driver_joints(chainCtrl):
+	""" Get the blend joints that drive the goals of a dynamic chain. """
+	return get_chain(chainCtrl).blend_joints
+
+@profiling.timed()
+def sample_world_positions(nodes, startFrame, endFrame, matrix_plugs=(), value_plugs=()):
+	""" Sample the world space positions of every node in a single pass over
+	the frame range.  The current time is restored afterwards.
+	Args:
+		nodes : (list)
+			Nodes to sample
+		startFrame, endFrame : (int)
+			Inclusive frame range
+		matrix_plugs : (list)
+			Matrix attributes sampled in the same pass
+		value_plugs : (list)
+			Numeric attributes sampled in the same pass
+	Returns:
+		positions, matrices, values : (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+			Positions shaped (frames, nodes, 3), matrices shaped
+			(frames, plugs, 4, 4) and values shaped (frames, plugs)
+
+	"""
+	frames = range(int(startFrame), int(endFrame) + 1)
+	positions = numpy.empty((len(frames), len(nodes), 3))
+	matrices = numpy.empty((len(frames), len(matrix_plugs), 16))
+	values = numpy.empty((len(frames), len(value_plugs)))
+	current_time = mc.currentTime(query=True)
+	try:
+		with live_updates_suspended():
+			for f, frame in enumerate(frames):
+				mc.currentTime(frame, update=True)
+				for n, node in enumerate(nodes):
+					positions[f, n] = mc.xform(node, query=True, worldSpace=True, translation=True)
+				for m, plug in enumerate(matrix_plugs):
+					matrices[f, m] = mc.getAttr(plug)
+				for v, plug in enumerate(value_plugs):
+					values[f, v] = mc.getAttr(plug)
+	finally:
+		mc.currentTime(current_time, update=True)
+	return positions, matrices.reshape(len(frames), len(matrix_plugs), 4, 4), values
+
+@profiling.timed()
+def sample_curve_points(curves, counts, startFrame, endFrame, matrix_plugs=()):
+	""" Sample the world space CV positions of curves in a single pass over the
+	frame range, one query per curve and frame.  The current time is restored
+	afterwards.
+	Args:
+		curves : (list)
+			Curves to sample
+		counts : (list)
+			CVs to sample from the start of each curve
+		startFrame, endFrame : (int)
+			Inclusive frame range
+		matrix_plugs : (list)
+			Matrix attributes sampled in the same pass
+	Returns:
+		positions, matrices : (numpy.ndarray, numpy.ndarray)
+			Positions of every curve's CVs in order shaped (frames, points, 3)
+			and matrices shaped (frames, plugs, 4, 4)
+
+	"""
+	frames = range(int(startFrame), int(endFrame) + 1)
+	ranges = ['{0}.cv[0:{1}]'.format(curve, count - 1) for curve, count in izip(curves, counts)]
+	positions = numpy.empty((len(frames), sum(counts) * 3))
+	matrices = numpy.empty((len(frames), len(matrix_plugs), 16))
+	current_time = mc.currentTime(query=True)
+	try:
+		with live_updates_suspended():
+			for f, frame in enumerate(frames):
+				mc.currentTime(frame, update=True)
+				offset = 0
+				for cv_range, count in izip(ranges, counts):
+					positions[f, offset:offset + count * 3] = mc.xform(cv_range, query=True, worldSpace=True, translation=True)
+					offset += count * 3
+				for m, plug in enumerate(matrix_plugs):
+					matrices[f, m] = mc.getAttr(plug)
+	finally:
+		mc.currentTime(current_time, update=True)
+	return positions.reshape(len(frames), -1, 3), matrices.reshape(len(frames), len(matrix_plugs), 4, 4)
+
+def get_space_plug(chain):
+	""" Matrix taking world space into the space the dynamic joints are keyed
+	in, the world inverse of the base joint's parent.
+	"""
+	return '{0}.parentInverseMatrix[0]'.format(get_chain(chain).dyn_joints[0])
+
+@profiling.timed()
+def get_solved_channels(chainCtrl, trajectory, spaces):
+	""" Convert a solved trajectory to rotate channels on the dynamic joints and
+	translate channels on the base dynamic joint.  Every frame is moved into
+	the space of the base joint's parent at that frame first, so the chain
+	keeps whatever the character above it does.
+	Args:
+		chainCtrl : (str)
+			Dynamic chain controller
+		trajectory : (numpy.ndarray)
+			Solved world positions (frames, joints, 3), or (frames, points, 3)
+			at the chain's resolution
+		spaces : (numpy.ndarray)
+			The matrix of get_space_plug at every frame (frames, 4, 4)
+	Returns:
+		channels : (dict)
+			node.attr names mapped to a value per frame
+
+	"""
+	dyn_joints = get_chain(chainCtrl).dyn_joints
+	# The dynamic joints have no rotation at rest, so their translates accumulate
+	# to the rest positions.  Only the segments are used, the base may be keyed
+	translates = numpy.array([mc.getAttr('{0}.translate'.format(joint))[0] for joint in dyn_joints])
+	rest_positions = numpy.cumsum(translates, axis=0)
+	trajectory = orient.transform_points(trajectory, spaces)
+	if trajectory.shape[1] != len(dyn_joints):
+		# Solved at a lower resolution, lay it back onto every joint
+		trajectory = resample.map_to_joints(trajectory, resample.arc_parameters(rest_positions))
+	# Unwrapped so the keys don't spin the long way round between frames
+	rotations = orient.euler_filter(orient.chain_rotations(trajectory, rest_positions))
+	channels = {}
+	for i, joint in enumerate(dyn_joints):
+		for axis, attr in enumerate(['rotateX', 'rotateY', 'rotateZ']):
+			channels['{0}.{1}'.format(joint, attr)] = rotations[:, i, axis]
+	for axis, attr in enumerate(['translateX', 'translateY', 'translateZ']):
+		channels['{0}.{1}'.format(dyn_joints[0], attr)] = trajectory[:, 0, axis]
+	return channels
+
+def get_first_joint(node, rig=None):
+	""" Find the first joint below a node in hierarchy order.
+	Args:
+		node : (str)
+	        	Node which to start searching.
+		rig : (topology.RigTopology)
+			Index of the hierarchy containing node
+	                
+	"""
+	return get_rig(node, rig).first_joint(node)
+
+def get_first_control(node, rig=None):
+	""" Find the first control below a node in hierarchy order.
+	Args:
+		node : (str)
+	        	Node which to start searching.
+		rig : (topology.RigTopology)
+			Index of the hierarchy containing node
+	
+	"""
+	return get_rig(node, rig).first_control(node)
+
+def get_stiffness_coords(count):
+	""" V coordinate of every particle on its chain's stiffness ramp, the middle
+	of the ramp entry it reads.
+	"""
+	return [(i + 0.5) / count for i in range(count)]
+
+@profiling.timed()
+def add_goal_attrs(jointCtrlObj, particle_system, goalPPs):
+	""" Get all particle goals and add them as attributes to the dynamic controller.
+	goalPP is driven from them through connections: every jointStiffness{i}
+	feeds one entry of a stepped ramp, and an arrayMapper looks the ramp up at
+	each particle's coordinate and writes the whole goalPP array at once.  No
+	expression runs, so a stiffness edit or key reaches the particles on the
+	next evaluation without the MEL interpreter.
+	Args:
+		jointCtrlObj : (str)
+			Dynamic joint controller
+		particle_system : (str)
+			Particle shape attached to the curve
+		goalPPs : (list)
+			List of all goalPP values retrieved.
+	Returns:
+		goal_attrs : (list)
+			The ramp and arrayMapper for the goalExpressions attribute
+
+	"""
+	count = len(goalPPs)
+	for i, goalPP in enumerate(goalPPs):
+		addAttr(jointCtrlObj,
+			min=0,ln='jointStiffness{0}'.format(str(i)),max=1,keyable=True,at='float',dv=goalPP)
+	# Per particle coordinate, and its initial state so it survives a rewind
+	coords = ' '.join([repr(coord) for coord in get_stiffness_coords(count)])
+	for attr in (STIFFNESS_COORD_ATTR, STIFFNESS_COORD_ATTR + '0'):
+		addAttr(particle_system, ln=attr, dt='doubleArray')
+	mm.eval('\n'.join([
+	        'setAttr "{0}.{1}" -type doubleArray {2} {3};'.format(particle_system, attr, count, coords)
+	        for attr in (STIFFNESS_COORD_ATTR, STIFFNESS_COORD_ATTR + '0')
+	]))
+	ramp = str(createNode('ramp', name='{0}_stiffnessRamp'.format(jointCtrlObj), skipSelect=True))
+	# Stepped, so each particle reads its own entry unblended.  Any of the
+	# ramp's default entries left past count sit at 0.5 or 1, beyond every
+	# coordinate of a chain of two or more particles
+	values = [('{0}.interpolation'.format(ramp), 0)]
+	values.extend([('{0}.colorEntryList[{1}].position'.format(ramp, i), float(i) / count) for i in range(count)])
+	set_attrs_bulk(values)
+	mm.eval('\n'.join([
+	        'connectAttr -f "{0}.jointStiffness{1}" "{2}.colorEntryList[{1}].color{3}";'.format(jointCtrlObj, i, ramp, channel)
+	        for i in range(count)
+	        for channel in 'RGB'
+	]))
+	mapper = mc.arrayMapper(
+	        target=str(particle_system),
+	        destAttr='goalPP',
+	        inputV=STIFFNESS_COORD_ATTR,
+	        mapTo=ramp
+	)[0]
+	return [ramp, mapper]
+
+#---------------------------------------------------------------------------------#
+# Dynamic Chain
+#---------------------------------------------------------------------------------#
+class DynamicChain(object):
+	""" Handle on a dynamic chain.  Everything is read back from the nodes
+	connected to the chain controller, so a handle can be made for any existing
+	chain and keeps working when the chain's nodes are renamed.  Chains built
+	before the registry are read from the names stored on the controller.
+	Args:
+		controller : (str)
+			Dynamic chain controller
+		validate : (bool)
+			Check the controller is a chain.  Off for controllers taken from
+			the registry
+	"""
+	def __init__(self, controller, validate=True):
+		if validate:
+			if not is_dynamic_chain(controller):
+				raise ValueError("{0} is not a dynamic chain controller.".format(controller))
+			self.legacy = not mel.attributeExists(CHAIN_MEMBER_ATTRS['dyn_joints'], str(controller))
+		else:
+			self.legacy = False
+		self.controller = str(controller)
+
+	def __str__(self):
+		return self.controller
+
+	def __repr__(self):
+		return "DynamicChain('{0}')".format(self.controller)
+
+	def __eq__(self, other):
+		return isinstance(other, DynamicChain) and other.controller == self.controller
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __hash__(self):
+		return hash(self.controller)
+
+	def _get(self, attr):
+		return mc.getAttr('{0}.{1}'.format(self.controller, attr))
+
+	def members(self, name):
+		""" Nodes of the chain in order.
+		Args:
+			name : (str)
+				Key of CHAIN_MEMBER_ATTRS
+		Returns:
+			nodes : (list)
+
+		"""
+		if not self.legacy:
+			return mc.listConnections(
+			        '{0}.{1}'.format(self.controller, CHAIN_MEMBER_ATTRS[name]),
+			        source=True,
+			        destination=False
+			) or []
+		if name == 'joints':
+			return [self._get('linkedBaseJoint'), self._get('linkedEndJoint')]
+		if name == 'blend_joints' and not mel.attributeExists('allBlendJoints', self.controller):
+			# Chains created before allBlendJoints was stored
+			return [joint.replace(DYN_SUFFIX, BLND_SUFFIX) for joint in self.dyn_joints]
+		if name not in LEGACY_MEMBER_ATTRS:
+			return []
+		return [item for item in (self._get(LEGACY_MEMBER_ATTRS[name]) or '').split(',') if item]
+
+	@property
+	def controls(self):
+		""" The original controls driving the chain. """
+		return self.members('controls')
+
+	@property
+	def uses_all_controls(self):
+		return bool(self._get('usesAllControls'))
+
+	@property
+	def character(self):
+		""" Character the chain was registered under. """
+		if self.legacy:
+			return get_character(self.controls[0])
+		return self._get('character')
+
+	@property
+	def joints(self):
+		""" The original joints, first and last. """
+		return self.members('joints')
+
+	@property
+	def dyn_joints(self):
+		return self.members('dyn_joints')
+
+	@property
+	def blend_joints(self):
+		return self.members('blend_joints')
+
+	@property
+	def duplicate_controls(self):
+		return self.members('duplicate_controls')
+
+	@property
+	def goal_expressions(self):
+		return self.members('goal_expressions')
+
+	@property
+	def goal_curve(self):
+		curves = self.members('goal_curve')
+		return curves[0] if curves else None
+
+	@property
+	def ik_handle(self):
+		""" Spline IK handle orienting the dynamic joints, None for analytic chains. """
+		handles = self.members('ik_handle')
+		return handles[0] if handles else None
+
+	@property
+	def analytic_orient(self):
+		""" The chain has no IK handle, its joints are oriented along its curve live and when baked. """
+		return bool(mel.attributeExists('analyticOrient', self.controller) and self._get('analyticOrient'))
+
+	@property
+	def resolution(self):
+		""" Points the chain is simulated on, 0 when it is simulated on every joint. """
+		if not mel.attributeExists('simResolution', self.controller):
+			return 0
+		return int(self._get('simResolution'))
+
+	@property
+	def soft_curve(self):
+		""" The simulated curve the dynamic joints follow. """
+		curves = self.members('soft_curve')
+		return curves[0] if curves else None
+
+	@property
+	def num_points(self):
+		""" Points the chain is simulated on. """
+		return self.resolution or len(self.dyn_joints)
+
+	@property
+	def pins(self):
+		""" Pin target of every pinned point, see pin_chain_point.
+		Returns:
+			pins : (dict)
+				Point index mapped to its target
+		"""
+		pins = {}
+		for attr in mc.listAttr(self.controller, string='pinTarget*') or []:
+			targets = mc.listConnections('{0}.{1}'.format(self.controller, attr), source=True, destination=False)
+			if targets:
+				pins[int(attr[len('pinTarget'):])] = targets[0]
+		return pins
+
+	@property
+	def drive_nodes(self):
+		""" multMatrix nodes driving the original controls, see drive_controls_by_matrix. """
+		return self.members('drive_nodes')
+
+	@property
+	def driven_controls(self):
+		return self.members('driven_controls')
+
+	@property
+	def group(self):
+		""" Group holding the dynamic joints, curves and clusters. """
+		parents = mc.listRelatives(self.controller, parent=True)
+		return parents[0] if parents else None
+
+def is_dynamic_chain(node):
+	if not node or not mc.objExists(str(node)):
+		return False
+	return bool(
+	        mel.attributeExists(CHAIN_MEMBER_ATTRS['dyn_joints'], str(node))
+	        or mel.attributeExists(LEGACY_MEMBER_ATTRS['dyn_joints'], str(node))
+	)
+
+def get_chain(chain):
+	""" A DynamicChain for a handle or a controller name. """
+	if isinstance(chain, DynamicChain):
+		return chain
+	return DynamicChain(chain)
+
+#---------------------------------------------------------------------------------#
+# Chain Registry
+#---------------------------------------------------------------------------------#
+def get_registry(create=False):
+	""" The chain registry node.
+	Args:
+		create : (bool)
+			Create the node if the scene doesn't have one
+	Returns:
+		registry : (str)
+			None if there is no registry and create is off
+	"""
+	if mc.objExists(REGISTRY_NODE):
+		return REGISTRY_NODE
+	if not create:
+		return None
+	registry = mc.createNode('network', name=REGISTRY_NODE, skipSelect=True)
+	mc.addAttr(registry, ln='chains', at='message', multi=True, indexMatters=False)
+	return registry
+
+def get_character(control):
+	""" Character a chain built on a control belongs to, the control's namespace. """
+	return str(control).rpartition('|')[2].rpartition(':')[0]
+
+def add_chain_members(chainCtrl, members):
+	""" Connect the nodes of a chain to its controller with one MEL evaluation.
+	Args:
+		chainCtrl : (str)
+			Dynamic chain controller
+		members : (dict)
+			Key of CHAIN_MEMBER_ATTRS to the nodes in order
+	"""
+	commands = []
+	for name, nodes in sorted(members.items()):
+		attr = CHAIN_MEMBER_ATTRS[name]
+		mc.addAttr(chainCtrl, ln=attr, at='message', multi=True)
+		for i, node in enumerate(nodes):
+			commands.append('connectAttr "{0}.message" "{1}.{2}[{3}]";'.format(node, chainCtrl, attr, i))
+	if commands:
+		mm.eval('\n'.join(commands))
+
+def register_chain(chainCtrl, character=''):
+	""" Add a chain controller to the registry.
+	Args:
+		chainCtrl : (str)
+			Dynamic chain controller
+		character : (str)
+			Character the chain belongs to
+	"""
+	registry = get_registry(create=True)
+	mc.addAttr(chainCtrl, ln='character', dt='string')
+	mc.setAttr('{0}.character'.format(chainCtrl), character, type='string', lock=True)
+	mc.connectAttr('{0}.message'.format(chainCtrl), '{0}.chains'.format(registry), nextAvailable=True)
+
+def list_chains(character=None):
+	""" Every registered chain in the scene, read from the registry's
+	connections rather than found by checking nodes for chain attributes.
+	Deleted chains drop out on their own.
+	Args:
+		character : (str)
+			Only list the chains of this character
+	Returns:
+		chains : (list)
+			DynamicChain handles in the order they were built
+	"""
+	registry = get_registry()
+	if registry is None:
+		return []
+	controllers = mc.listConnections('{0}.chains'.format(registry), source=True, destination=False) or []
+	chains = [DynamicChain(controller, validate=False) for controller in controllers]
+	if character is not None:
+		chains = [chain for chain in chains if chain.character == character]
+	return chains
+
+def get_selected_chains():
+	""" The chains among the selected nodes, in selection order.  Only selected
+	nodes the registry doesn't know are checked for chain attributes, in case
+	they are chains built before it.
+	"""
+	selection = mc.ls(selection=True)
+	if not selection:
+		return []
+	registered = dict((chain.controller, chain) for chain in list_chains())
+	chains = []
+	for node in selection:
+		if node in registered:
+			chains.append(registered[node])
+		elif is_dynamic_chain(node):
+			chains.append(DynamicChain(node))
+	return chains
+
+@scene_run
+def register_legacy_chains():
+	""" Register the chains built before the registry and connect their nodes
+	to the controller in place of the stored names, which are left as they are.
+	Returns:
+		chains : (list)
+			The newly registered chains
+	"""
+	registered = set(chain.controller for chain in list_chains())
+	chains = []
+	# Referenced characters keep their chains in a namespace
+	for controller in mc.ls('*' + CTRL_SUFFIX, recursive=True) or []:
+		if controller in registered or not is_dynamic_chain(controller):
+			continue
+		chain = DynamicChain(controller)
+		if not chain.legacy:
+			continue
+		members = dict((name, chain.members(name)) for name in CHAIN_MEMBER_ATTRS)
+		add_chain_members(controller, members)
+		register_chain(controller, get_character(members['controls'][0]))
+		chains.append(DynamicChain(controller, validate=False))
+	return chains
+
+#---------------------------------------------------------------------------------#
+# Pins
+#---------------------------------------------------------------------------------#
+def add_pin(chainCtrl, index, target, weight=1.0):
+	""" Pin a point of a chain to a target in the offline solver.  The target
+	is only connected to the controller, nothing in the scene evaluates it.
+	Args:
+		chainCtrl : (str)
+			Dynamic chain controller
+		index : (int)
+			Point to pin
+		target : (str)
+			Transform the point is pulled onto
+		weight : (float)
+			How far the point is pulled onto the target, stored as a keyable
+			pinWeight{index} attribute
+	"""
+	target_attr = 'pinTarget{0}'.format(index)
+	weight_attr = solver.PIN_WEIGHT_ATTR.format(index)
+	if not mel.attributeExists(target_attr, chainCtrl):
+		mc.addAttr(chainCtrl, ln=target_attr, at='message')
+	if not mel.attributeExists(weight_attr, chainCtrl):
+		mc.addAttr(chainCtrl, ln=weight_attr, min=0, max=1, keyable=True, at='double', dv=weight)
+	mc.setAttr('{0}.{1}'.format(chainCtrl, weight_attr), weight)
+	mc.connectAttr('{0}.message'.format(target), '{0}.{1}'.format(chainCtrl, target_attr), force=True)
+
+def get_point_index(chain, index):
+	""" Point index of a chain counted from the base, negative indices count
+	back from the tip.
+	Raises:
+		IndexError : The chain has no such point
+	"""
+	num_points = chain.num_points
+	if not -num_points <= index < num_points:
+		raise IndexError("{0} has no point {1}, it is simulated on {2} points.".format(chain, index, num_points))
+	return index % num_points
+
+@scene_run
+def pin_chain_point(chain, target, index=-1, weight=1.0):
+	""" Pin a point of a chain to a target transform when the chain is solved
+	offline, without adding any constraint to the scene.
+	Args:
+		chain : (DynamicChain or str)
+			Chain handle or controller name
+		target : (str)
+			Transform the point is pulled onto
+		index : (int)
+			Point to pin, the tip by default.  Points are the joints, or the
+			resampled points of a chain with a resolution
+		weight : (float)
+			0 to 1, how far the point is pulled onto the target
+	Returns:
+		index : (int)
+			The pinned point counted from the base
+
+	"""
+	chain = get_chain(chain)
+	index = get_point_index(chain, index)
+	add_pin(chain.controller, index, target, weight)
+	return index
+
+@scene_run
+def unpin_chain_point(chain, index=-1):
+	""" Remove the pin of a point of a chain, see pin_chain_point. """
+	chain = get_chain(chain)
+	index = get_point_index(chain, index)
+	for attr in ['pinTarget{0}'.format(index), solver.PIN_WEIGHT_ATTR.format(index)]:
+		if mel.attributeExists(attr, chain.controller):
+			mc.deleteAttr(chain.controller, attribute=attr)
+
+@profiling.timed()
+def get_chain_layout(controls, all_controls=False):
+	""" Work out the controls and joints a chain is built from.
+	Args:
+		controls : (list)
+			Base and end control or joint, a single control with its joints, or
+			every control when all_controls is set
+		all_controls : (bool)
+			Every control is given, each driving the joints under it.  Always
+			the case for more than two controls
+	Returns:
+		controls, joint_names, jointPos, joints_per_control : (list, list, list, list)
+	Raises:
+		ValueError : The controls don't describe a chain
+
+	"""
+	controls = ls(controls) if controls else []
+	if not controls:
+		raise ValueError("No controllers given.  Please give controllers to create a chain.")
+	if all_controls or len(controls) > 2:
+		joint_names = []
+		jointPos = []
+		for control in controls:
+			get_joints_under_controls(control, joint_names, jointPos)
+		return controls, joint_names, jointPos, [1 for control in controls]
+	# Index the hierarchy once, every lookup below answers from it
+	base_ctrl = controls[0]
+	end_ctrl = controls[-1]
+	rig = build_topology(base_ctrl)
+	if len(controls) == 1:
+		# A single control needs two joints under it to make a chain
+		if isinstance(base_ctrl, Joint):
+			raise ValueError("Only a single joint given.  Need a base joint and end joint.")
+		baseJoint = get_first_joint(base_ctrl, rig)
+		endJoint = find_end_joint(base_ctrl, to_next_control=True, rig=rig)
+		if endJoint == '':
+			raise ValueError("Only one controller given with one joint attached.")
+	else:
+		# Check if joints or controllers are given
+		if not isinstance(base_ctrl, Joint):
+			baseJoint = get_first_joint(base_ctrl, rig)
+		else:
+			baseJoint = base_ctrl
+		if not isinstance(end_ctrl, Joint):
+			endJoint = find_end_joint(end_ctrl, to_next_control=True, rig=rig)
+		else:
+			endJoint = end_ctrl
+	controls = get_all_controllers(base_ctrl, end_ctrl, rig)
+	joint_names, jointPos = get_joint_information(baseJoint, endJoint, rig)
+	joints_per_control = get_joints_per_control(controls, joint_names, rig)
+	return controls, joint_names, jointPos, joints_per_control
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+@scene_run
+def create_chain(controls, all_controls=False, lag=None, attrs=None, names=None, character=None, goal_binding=None,
+                 drive_mode=None, orient_mode=None, resolution=None, tip_constraint=None):
+	""" Create a dynamic joint chain from explicit controls.  The selection and
+	the UI are left as they were.
+	Args:
+		controls : (list)
+			Base and end control or joint, a single control with its joints, or
+			every control when all_controls is set
+		all_controls : (bool)
+			The controls are not in one hierarchy, each drives the joints under
+			it.  Always the case for more than two controls
+		lag : (float)
+			Lag of the new chain, DYN_SMOOTHNESS if not given
+		attrs : (dict)
+			Controller attribute values to set once the chain is built
+		names : (naming.NameAllocator)
+			Allocator shared by every chain in a batch.  Indexes the scene if not given
+		character : (str)
+			Character to register the chain under, the namespace of the
+			controls if not given
+		goal_binding : (str)
+			One of GOAL_BINDINGS, GOAL_BINDING if not given
+		drive_mode : (str)
+			One of DRIVE_MODES, DRIVE_MODE if not given
+		orient_mode : (str)
+			One of ORIENT_MODES, ORIENT_MODE if not given
+		resolution : (int)
+			Points to simulate on, SIM_RESOLUTION if not given.  Chains with
+			no more joints than this are simulated on every joint, and
+			resampled chains always bind their goal curve with a skinCluster
+		tip_constraint : (bool)
+			Pin the tip to its blend joint in the offline solver,
+			HAS_TIP_CONSTRAINT if not given.  See pin_chain_point
+	Returns:
+		chain : (DynamicChain)
+	Raises:
+		ValueError : The controls don't describe a chain, the goal binding,
+		             drive mode or orient mode is unknown or the resolution
+		             is too low
+
+	"""
+	goal_binding = GOAL_BINDING if goal_binding is None else goal_binding
+	if goal_binding not in GOAL_BINDINGS:
+		raise ValueError("Unknown goal binding {0}, expected one of {1}.".format(goal_binding, ', '.join(GOAL_BINDINGS)))
+	drive_mode = DRIVE_MODE if drive_mode is None else drive_mode
+	if drive_mode not in DRIVE_MODES:
+		raise ValueError("Unknown drive mode {0}, expected one of {1}.".format(drive_mode, ', '.join(DRIVE_MODES)))
+	orient_mode = ORIENT_MODE if orient_mode is None else orient_mode
+	if orient_mode not in ORIENT_MODES:
+		raise ValueError("Unknown orient mode {0}, expected one of {1}.".format(orient_mode, ', '.join(ORIENT_MODES)))
+	tip_constraint = HAS_TIP_CONSTRAINT if tip_constraint is None else bool(tip_constraint)
+	resolution = SIM_RESOLUTION if resolution is None else int(resolution)
+	if resolution and resolution < resample.MIN_RESOLUTION:
+		raise ValueError("Cannot simulate a chain on fewer than {0} points.".format(resample.MIN_RESOLUTION))
+	# ls of an empty list would list the whole scene
+	controls = ls(controls) if controls else []
+	all_controls = all_controls or len(controls) > 2
+	controls, joint_names, jointPos, joints_per_control = get_chain_layout(controls, all_controls)
+	if resolution >= len(jointPos):
+		resolution = 0
+	with keep_selection():
+		jointCtrlObj = build_chain(
+		        controls,
+		        joint_names,
+		        jointPos,
+		        joints_per_control,
+		        all_controls,
+		        lag,
+		        names,
+		        character,
+		        goal_binding,
+		        drive_mode,
+		        orient_mode,
+		        resolution,
+		        tip_constraint
+		)
+		if attrs:
+			set_attrs_bulk(get_stored_attr_values([{'attrs' : attrs}], [jointCtrlObj]))
+	return DynamicChain(jointCtrlObj)
+
+def build_chain(controls, joint_names, jointPos, joints_per_control, all_controls, lag=None, names=None, character=None,
+                goal_binding=CLUSTER_BINDING, drive_mode=CONSTRAINT_DRIVE, orient_mode=IK_ORIENT, resolution=0,
+                tip_constraint=False):
+	""" Build the dynamic system for a chain laid out by get_chain_layout.
+	Returns:
+		jointCtrlObj : (str)
+			The dynamic chain controller
+
+	"""
+	# Create the list of joints to be parent constrained to the FK joints
+	joint_list = []
+	blend_joints = []
+	create_joints(joint_names, jointPos, joint_list, blend_joints, names)
+	#reset base joint and end joint
+	baseJoint = joint_list[0]
+	endJoint = joint_list[-1]
+	#Now that $jointPos[] holds the world space coords of our joints, 
+	#we need to build a cv curve with points at each XYZ coord.
+	if resolution:
+		# Simulate on evenly spaced points instead of the joints
+		curve = build_curve_from_joint(resample.resample_chain(jointPos, resolution).tolist())
+	else:
+		curve = build_curve_from_joint(jointPos)
+	#Make curve dynamic.
+	ik_handle = None
+	if orient_mode == IK_ORIENT:
+		with profiling.span('ikHandle'):
+			ik_info = ikHandle(
+			        sj=joint_list[0],
+			        ee=joint_list[-1],
+			        c=curve,
+			        ccv=False,
+			        sol='ikSplineSolver',
+			        simplifyCurve=True
+			)
+			ik_handle = ik_info[0]
+			# Hide the ik handles visibility
+			change_visibility([ik_handle], 0)
+	soft_curve = ls(curve)[0]
+	with profiling.span('dynCreateSoft'):
+		# dynCreateSoft only works on the selection
+		select(curve, replace=True)
+		mm.eval('dynCreateSoft 0 0 1 1 0')
+	goal_curve = "copyOf{0}".format(str(curve))
+	particle_system = [item for item in soft_curve.getChildren() if str(item).endswith('Particle')][0]
+	goalPPs = getAttr('{0}.goalPP'.format(particle_system))
+	#Create Joint Chain Controller Object
+	jointCtrlObj = createNode('implicitSphere', skipSelect=True).getParent()
+	# Add dynamic attribute
+	add_dynamic_attributes(jointCtrlObj, lag)
+	#Point Constrain Control Object to the end joint
+	pointConstraint(endJoint,jointCtrlObj)
+
+	#Rename Ctrl Obj
+	jointCtrlObj=str(rename(jointCtrlObj, (baseJoint + CTRL_SUFFIX)))
+
+	if drive_mode == MATRIX_DRIVE:
+		drive_nodes, driven_controls = drive_controls_by_matrix(controls, joint_list, joints_per_control)
+	else:
+		drive_nodes, driven_controls = [], []
+		constraint_weights = constrain_joints(
+		        controls, 
+		        joint_list, 
+		        blend_joints, 
+		        joints_per_control
+		)
+	dupe_nodes = add_duplicate_blend_controls(jointCtrlObj, controls, blend_joints, all_controls)
+	dupe_controls = []
+	with profiling.span('rename_duplicates'):
+		for node in dupe_nodes:
+			# Duplicate appends a number to the copied names
+			if len(dupe_controls) < len(controls) and str(node).rstrip('0123456789').endswith(NODE_SUFFIX):
+				dupe_control = str(rename(node, 'OVR_{0}'.format(node)))
+				dupe_controls.append(dupe_control)
+	
+	if resolution:
+		# The CVs don't sit on the joints, so there is no cluster per control.
+		# Each CV is weighted between the two joints either side of it, the
+		# way resample_chain places it
+		bind_goal_curve(
+		        goal_curve,
+		        blend_joints,
+		        resample.sample_weights(resample.arc_parameters(jointPos), resolution)
+		)
+		clusters = []
+	elif goal_binding == SKIN_BINDING:
+		bind_goal_curve(goal_curve, blend_joints)
+		clusters = []
+	else:
+		# Build Clusters from curve
+		clusters = build_clusters_from_curve(goal_curve, len(jointPos))
+		
+		# Constrain the clusters to the duplicate controls
+		with profiling.span('constrain_clusters'):
+			for i, dupe_control in enumerate(dupe_controls):
+				scaleConstraint(dupe_control, clusters[i])
+				parentConstraint(dupe_control, clusters[i])
+	# Copy the animation over from the controls
+	transfer_anim_curves(izip(controls, dupe_controls))
+	
+	# Connect attributes on the controller sphere to the follicle node
+	particle_to_ctrl_attrs = {
+	        'attraction' : 'goalWeight[0]',
+	        'lag' : 'goalSmoothness',
+	        'easeIn' : 'conserve',
+        }
+	connect_controller_to_system(jointCtrlObj, particle_system, particle_to_ctrl_attrs)
+	#Connect scale of controller to the size attr
+	connectAttr((jointCtrlObj + ".controllerSize"),
+                    (jointCtrlObj + ".scaleX"), f=True)
+	connectAttr((jointCtrlObj + ".controllerSize"), 
+                    (jointCtrlObj + ".scaleY"), f=True)
+	connectAttr((jointCtrlObj + ".controllerSize"), 
+                    (jointCtrlObj + ".scaleZ"), f=True)
+	
+	#Lock And Hide Attributes on Control Object.
+	lock_and_hide_attr(jointCtrlObj)
+	
+	# Create all the expressions for each goal
+	particle_shape = particle_system.getChildren()[0]
+	goal_expressions = add_goal_attrs(jointCtrlObj, particle_shape, goalPPs)	
+		
+	# Create a new group
+	with profiling.span('group_chain'):
+		dynamic_group = group(empty=True, name='{0}_DynamicChainGroup'.format(baseJoint))
+		# Parent all the controls to new group
+		parent(joint_list[0], dynamic_group)
+		parent(jointCtrlObj, dynamic_group)
+		if ik_handle is not None:
+			parent(ik_handle, dynamic_group)
+		#parent(spring_system[0], dynamic_group)
+		if clusters:
+			parent(clusters, dynamic_group)
+		parent(soft_curve, dynamic_group)
+		parent(goal_curve, dynamic_group)
+		parent(dynamic_group, controls[0].getParent())
+	# Record how the controls were picked so the prefs can rebuild the chain
+	addAttr(jointCtrlObj, ln='usesAllControls', at='bool')
+	setAttr('{0}.usesAllControls'.format(jointCtrlObj), bool(all_controls), lock=True)
+	addAttr(jointCtrlObj, ln='simResolution', at='long')
+	setAttr('{0}.simResolution'.format(jointCtrlObj), resolution, lock=True)
+	addAttr(jointCtrlObj, ln='analyticOrient', at='bool')
+	setAttr('{0}.analyticOrient'.format(jointCtrlObj), orient_mode == ANALYTIC_ORIENT, lock=True)
+	if orient_mode == ANALYTIC_ORIENT:
+		# Nothing in the graph orients the joints, they follow the curve live
+		ensure_live_script_node()
+	# Connect the chain's nodes to the controller and register it
+	add_chain_members(jointCtrlObj, {
+	        'controls' : controls,
+	        'joints' : [joint_names[0], joint_names[-1]],
+	        'dyn_joints' : joint_list,
+	        'blend_joints' : blend_joints,
+	        'duplicate_controls' : dupe_controls,
+	        'goal_expressions' : goal_expressions,
+	        'goal_curve' : [goal_curve],
+	        'drive_nodes' : drive_nodes,
+	        'driven_controls' : driven_controls,
+	        'soft_curve' : [soft_curve],
+	        'ik_handle' : [ik_handle] if ik_handle is not None else [],
+	})
+	register_chain(jointCtrlObj, get_character(controls[0]) if character is None else character)
+	if tip_constraint:
+		# The tip follows its blend joint in the offline solver, no constraint is made
+		add_pin(jointCtrlObj, (resolution or len(joint_list)) - 1, blend_joints[-1])
+	
+	# Change the visibility for the controls
+	change_visibility(controls, 0)
+	return jointCtrlObj
+
+@scene_run
+def delete_chains(chains):
+	""" Remove the dynamics from chains and hand the animation on the
+	duplicated controls back to the original controls.  Every chain is torn
+	down with a handful of commands however many there are.
+	Args:
+		chains : (list)
+			Chain handles or controller names
+	"""
+	chains = [get_chain(chain) for chain in chains]
+	if not chains:
+		return
+	controls = []
+	dup_controls = []
+	chain_nodes = []
+	rest_matrices = []
+	for chain in chains:
+		controls.extend(chain.controls)
+		dup_controls.extend(chain.duplicate_controls)
+		chain_nodes.extend(chain.goal_expressions)
+		chain_nodes.append(chain.group)
+		for driver, control in izip(chain.drive_nodes, chain.driven_controls):
+			chain_nodes.append(driver)
+			rest_matrices.append(('{0}.offsetParentMatrix'.format(control), get_matrix('{0}.restMatrix'.format(driver))))
+	with keep_selection():
+		with profiling.span('delete_chain_nodes'):
+			# Remove all the goal expressions, matrix drivers and chain groups
+			delete([node for node in chain_nodes if node])
+			# Controls driven by matrix go back to their own offset
+			set_matrices_bulk(rest_matrices)
+		# Move the curves from the duplicated controls back to the originals,
+		# replacing whatever the originals had
+		with profiling.span('transfer_keys'):
+			transfer_anim_curves(izip(dup_controls, controls), move=True)
+		with profiling.span('delete_duplicates'):
+			dup_controls = mc.ls(dup_controls) if dup_controls else []
+			if dup_controls:
+				delete(dup_controls)
+	# Change the visiblity back for the original controllers	
+	change_visibility(controls, 1)
+
+def delete_chain(chain):
+	""" Remove the dynamics from a chain, see delete_chains.
+	Args:
+		chain : (DynamicChain)
+			Chain handle or controller name
+	"""
+	delete_chains([chain])
+
+@scene_run
+def bake_chains(chains, startFrame, endFrame, progress=None):
+	""" Bake the simulation onto the dynamic joints of every chain with
+	bakeResults.  Chains with no IK handle are baked together afterwards by
+	bake_curve_chains.
+	Args:
+		chains : (list)
+			Chain handles or controller names
+		startFrame, endFrame : (float)
+			Inclusive frame range
+		progress : (callable)
+			Called with the chain index and count before each chain.  Returning
+			False stops the bake
+	Returns:
+		baked : (list)
+			The chains that were baked
+	"""
+	chains = [get_chain(chain) for chain in chains]
+	frameRangeToBake = '"{sf}:{ef}"'.format(sf = str(float(startFrame)), ef = str(float(endFrame)))
+	baked = []
+	analytic = []
+	for i, chain in enumerate(chains):
+		if progress is not None and progress(i, len(chains)) is False:
+			break
+		if chain.analytic_orient:
+			analytic.append(chain)
+			continue
+		bakingJoints = '{' + ', '.join(['"{0}"'.format(joint) for joint in chain.dyn_joints]) + '}'
+		#Concatenate the bake simulation command with the necessary joint names.
+		bakingJoints=(
+		        "bakeResults -simulation true -t " + frameRangeToBake + \
+		        " -sampleBy 1 -disableImplicitControl true -preserveOutsideKeys true"\
+		        " -sparseAnimCurveBake false -controlPoints false -shape true" + bakingJoints
+		)
+		#Evaluate the $bakingJoints string to bake the simulation.
+		with live_updates_suspended(), profiling.span('bakeResults'):
+			mel.eval(bakingJoints)
+		baked.append(chain)
+	if analytic:
+		bake_curve_chains(analytic, startFrame, endFrame)
+		baked.extend(analytic)
+	return baked
+
+@profiling.timed()
+def bake_curve_chains(chains, startFrame, endFrame):
+	""" Bake chains that have no IK handle.  The points of every chain's
+	simulated curve are sampled in one pass over the frame range and the
+	dynamic joints are oriented along them with orient.chain_rotations, then
+	keyed one key array per animation curve.
+	Args:
+		chains : (list)
+			Chain handles or controller names
+		startFrame, endFrame : (float)
+			Inclusive frame range
+	Returns:
+		stats : (dict)
+			Key writing stats, see keys.write_channel_keys
+
+	"""
+	chains = [get_chain(chain) for chain in chains]
+	# The curve has a CV on every dynamic joint, or one per point of its resolution
+	counts = [chain.resolution or len(chain.dyn_joints) for chain in chains]
+	positions, spaces = sample_curve_points(
+	        [chain.soft_curve for chain in chains],
+	        counts,
+	        startFrame,
+	        endFrame,
+	        [get_space_plug(chain) for chain in chains]
+	)
+	channels = {}
+	offset = 0
+	for c, (chain, count) in enumerate(izip(chains, counts)):
+		channels.update(get_solved_channels(chain.controller, positions[:, offset:offset + count], spaces[:, c]))
+		offset += count
+	frames = range(int(startFrame), int(endFrame) + 1)
+	with profiling.span('write_channel_keys'):
+		return keys.write_channel_keys(channels, frames, keep_existing=True)
+
+@scene_run
+def reduce_chain_keys(chains, startFrame=None, endFrame=None, tolerance=reduction.TOLERANCE):
+	""" Thin out the baked keys on the dynamic joints of every chain, keeping the
+	fewest keys that stay within tolerance when joined by linear tangents.
+	Every channel of every chain is reduced in one batch.
+	Args:
+		chains : (list)
+			Chain handles or controller names
+		startFrame, endFrame : (float)
+			Inclusive frame range to reduce.  Keys outside it are kept as they
+			are.  None reduces the whole curve
+		tolerance : (float)
+			Largest allowed error, degrees on rotations and scene units on
+			translations and scales
+	Returns:
+		stats : (dict)
+			curves, keysBefore, keysAfter, maxError and seconds
+
+	"""
+	start = timeit.default_timer()
+	chains = [get_chain(chain) for chain in chains]
+	plug_names = [
+	        '{0}.{1}'.format(joint, attr)
+	        for chain in chains
+	        for joint in chain.dyn_joints
+	        for attr in REDUCED_CHANNELS
+	]
+	with profiling.span('read_keys'):
+		curves = keys.read_channel_keys(plug_names)
+	# Channels keyed on the same frames are reduced together
+	groups = {}
+	for plug_name, (frames, values) in curves.items():
+		frames = numpy.asarray(frames, dtype=numpy.float64)
+		inside = numpy.ones(len(frames), dtype=bool)
+		if startFrame is not None:
+			inside &= frames >= startFrame
+		if endFrame is not None:
+			inside &= frames <= endFrame
+		groups.setdefault(tuple(frames[inside]), []).append((plug_name, frames, numpy.asarray(values), inside))
+	reduced = {}
+	keys_after = 0
+	max_error = 0.0
+	with profiling.span('simplify'):
+		for times, channels in groups.items():
+			values = numpy.array([channel_values[inside] for plug_name, frames, channel_values, inside in channels])
+			keep = reduction.simplify(values, tolerance, times)
+			if len(times):
+				max_error = max(max_error, float(reduction.max_errors(values, keep, times).max()))
+			for (plug_name, frames, channel_values, inside), channel_keep in izip(channels, keep):
+				keep_all = ~inside
+				keep_all[inside] = channel_keep
+				keys_after += int(keep_all.sum())
+				if not keep_all.all():
+					reduced[plug_name] = (frames[keep_all], channel_values[keep_all])
+	with profiling.span('write_keys'):
+		keys.replace_channel_keys(reduced)
+	stats = {
+		'curves' : len(curves),
+		'keysBefore' : sum(len(frames) for frames, values in curves.values()),
+		'keysAfter' : keys_after,
+		'maxError' : max_error,
+		'seconds' : timeit.default_timer() - start,
+	}
+	displayInfo(reduction.format_stats(stats))
+	return stats
+
+@profiling.timed()
+def sample_joint_channels(joints, startFrame, endFrame):
+	""" Sample the local translate and rotate of every joint in a single pass
+	over the frame range.  The current time is restored afterwards.
+	Args:
+		joints : (list)
+			Joints to sample
+		startFrame, endFrame : (int)
+			Inclusive frame range
+	Returns:
+		values : (numpy.ndarray)
+			float32 values (frames, joints, channels) in jointcache.CHANNELS order
+
+	"""
+	frames = range(int(startFrame), int(endFrame) + 1)
+	values = numpy.empty((len(frames), len(joints), len(jointcache.CHANNELS)), dtype=numpy.float32)
+	current_time = mc.currentTime(query=True)
+	try:
+		with live_updates_suspended():
+			for f, frame in enumerate(frames):
+				mc.currentTime(frame, update=True)
+				for n, joint in enumerate(joints):
+					values[f, n, :3] = mc.getAttr('{0}.translate'.format(joint))[0]
+					values[f, n, 3:] = mc.getAttr('{0}.rotate'.format(joint))[0]
+	finally:
+		mc.currentTime(current_time, update=True)
+	return values
+
+def get_cache_path(directory, chain):
+	""" Cache file of a chain in a directory. """
+	name = str(chain).replace('|', '_').replace(':', '_')
+	return os.path.join(directory, name + jointcache.CACHE_EXTENSION)
+
+@scene_run
+def cache_chains(chains, startFrame, endFrame, directory, solve=False, workers=1):
+	""" Write the motion of every chain's dynamic joints to a joint cache file
+	per chain instead of baking keys.
+	Args:
+		chains : (list)
+			Chain handles or controller names
+		startFrame, endFrame : (int)
+			Inclusive frame range
+		directory : (str)
+			Directory the <controller>.ovrcache files are written to
+		solve : (bool)
+			Cache the offline solver's motion instead of stepping the scene
+		workers : (int)
+			Worker processes for the offline solver, see solve_character_chains
+	Returns:
+		paths : (list)
+			Cache file per chain
+
+	"""
+	chains = [get_chain(chain) for chain in chains]
+	if not os.path.isdir(directory):
+		os.makedirs(directory)
+	chain_joints = [chain.dyn_joints for chain in chains]
+	chain_values = []
+	if solve:
+		controllers = [chain.controller for chain in chains]
+		goals, params, spaces = sample_character_goals(controllers, startFrame, endFrame)
+		trajectories = solve_goals(goals, params, workers)
+		for controller, joints, trajectory, space in izip(controllers, chain_joints, trajectories, spaces):
+			channels = get_solved_channels(controller, trajectory, space)
+			values = numpy.empty((len(trajectory), len(joints), len(jointcache.CHANNELS)), dtype=numpy.float32)
+			for n, joint in enumerate(joints):
+				for c, channel in enumerate(jointcache.CHANNELS):
+					plug = '{0}.{1}'.format(joint, channel)
+					# The solver only moves the rotations and the base translation
+					values[:, n, c] = channels[plug] if plug in channels else mc.getAttr(plug)
+			chain_values.append(values)
+	else:
+		# Every chain is sampled in the same pass over the frame range
+		values = sample_joint_channels([joint for joints in chain_joints for joint in joints], startFrame, endFrame)
+		offset = 0
+		for joints in chain_joints:
+			chain_values.append(values[:, offset:offset + len(joints)])
+			offset += len(joints)
+	paths = []
+	with profiling.span('write_caches'):
+		for chain, joints, values in izip(chains, chain_joints, chain_values):
+			paths.append(jointcache.write_cache(
+			        get_cache_path(directory, chain),
+			        values,
+			        joints,
+			        startFrame,
+			        chain=chain.controller
+			))
+	return paths
+
+def apply_cached_frame(cache, frame):
+	""" Pose the joints of a joint cache at a frame.
+	Args:
+		cache : (jointcache.JointCache)
+			Open cache, or the path of one
+		frame : (float)
+			Frame to read, must be in the cached range.  A cache opened from a
+			path is closed again, so it doesn't stay mapped and locked
+	"""
+	opened = not isinstance(cache, jointcache.JointCache)
+	if opened:
+		cache = jointcache.open_cache(cache)
+	try:
+		# Copied out of the map, a view would keep it open
+		values = numpy.array(cache.frame(frame))
+	finally:
+		if opened:
+			cache.close()
+	set_attrs_bulk([
+	        ('{0}.{1}'.format(joint, channel), values[n, c])
+	        for n, joint in enumerate(cache.joints)
+	        for c, channel in enumerate(cache.channels)
+	])
+
+#---------------------------------------------------------------------------------#
+# Live Evaluation
+#---------------------------------------------------------------------------------#
+def ensure_live_script_node():
+	""" The script node running update_live_chains whenever the time changes,
+	made the first time it is needed.
+	"""
+	if not mc.objExists(LIVE_SCRIPT_NODE):
+		mc.scriptNode(name=LIVE_SCRIPT_NODE, scriptType=7, sourceType='python', beforeScript=LIVE_SCRIPT)
+	return LIVE_SCRIPT_NODE
+
+def on_chain_attr_changed(message, plug, other_plug, client_data):
+	""" attributeChanged callback of a scrubbed controller and of the anim
+	curves on its solver attributes.  Marks the chain for update_live_chains
+	to read its parameters again.
+	"""
+	chainCtrl, controller = client_data
+	if not message & (om.MNodeMessage.kAttributeSet | om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken):
+		return
+	if controller and not is_solver_attr(plug.partialName(useLongNames=True)):
+		return
+	SCRUB_DIRTY.add(chainCtrl)
+
+def watch_chain_attrs(chainCtrl, curves):
+	""" Watch a scrubbed controller for edits to its solver attributes, see
+	on_chain_attr_changed.  Replaces the callbacks it had.
+	Args:
+		chainCtrl : (str)
+			Dynamic chain controller
+		curves : (list)
+			Anim curves on its solver attributes, so editing a key counts too
+	"""
+	unwatch_chain_attrs(chainCtrl)
+	sel = om.MSelectionList()
+	for node in [chainCtrl] + list(curves):
+		sel.add(node)
+	SCRUB_CALLBACKS[chainCtrl] = [
+	        om.MNodeMessage.addAttributeChangedCallback(sel.getDependNode(i), on_chain_attr_changed, (chainCtrl, i == 0))
+	        for i in range(len(curves) + 1)
+	]
+
+def unwatch_chain_attrs(chainCtrl):
+	for callback in SCRUB_CALLBACKS.pop(chainCtrl, []):
+		om.MMessage.removeCallback(callback)
+	SCRUB_DIRTY.discard(chainCtrl)
+
+def read_scrubbed_parameters(chain, scrubbed):
+	""" Solver parameters of a scrubbed chain over its frame range.  Keyed
+	attributes are read at each frame with getAttr rather than by stepping
+	the time.
+	Args:
+		chain : (DynamicChain)
+			Chain handle
+		scrubbed : (CachedChain)
+			The chain's entry in SCRUB_CHAINS
+	Returns:
+		params, curves : (dict, list)
+			See solver.chain_parameters, with the pin targets the chain was
+			scrubbed with, and the anim curves on its solver attributes
+	"""
+	animated = get_animated_attrs([chain.controller])[chain.controller]
+	frames = range(scrubbed.start_frame, scrubbed.end_frame + 1)
+	sampled = {}
+	for attr, _ in animated:
+		plug = '{0}.{1}'.format(chain.controller, attr)
+		sampled[attr] = numpy.array([mc.getAttr(plug, time=frame) for frame in frames], dtype=numpy.float64)
+	params = get_solver_parameters(chain, scrubbed.goals.shape[1], attrs=get_chain_attrs(chain.controller, sampled))
+	if params['pin_weights'].any() and 'pin_targets' in scrubbed.params:
+		params['pin_targets'] = scrubbed.params['pin_targets']
+	return params, [curve for _, curve in animated]
+
+@scene_run
+def scrub_chains(chains, startFrame, endFrame):
+	""" Pose chains from the offline solver while the time changes, instead of
+	stepping the simulation.  The goals are sampled once, and every frame is
+	solved on demand through SCRUB_CACHE, resuming from the nearest
+	checkpoint.  The spline IK of each chain is blended off meanwhile.
+	Scrubbing the same chains again only re-solves from the first frame whose
+	goals or parameters changed.  Each controller is watched for edits
+	meanwhile, see watch_chain_attrs.
+	Args:
+		chains : (list)
+			Chain handles or controller names
+		startFrame, endFrame : (int)
+			Inclusive frame range.  Frames outside it show its first or last frame
+	Returns:
+		chains : (list)
+			Controllers of the scrubbed chains
+
+	"""
+	chainCtrls = [get_chain(chain).controller for chain in chains]
+	goals, params, _ = sample_character_goals(chainCtrls, startFrame, endFrame)
+	animated = get_animated_attrs(chainCtrls)
+	ik_blends = []
+	for chainCtrl, chain_goals, chain_params in izip(chainCtrls, goals, params):
+		scrubbed = SCRUB_CHAINS.get(chainCtrl)
+		if scrubbed is None or scrubbed.start_frame != int(startFrame) or scrubbed.goals.shape != chain_goals.shape:
+			SCRUB_CHAINS[chainCtrl] = cache.CachedChain(SCRUB_CACHE, chainCtrl, chain_goals, chain_params, startFrame)
+		else:
+			scrubbed.set_goals(chain_goals)
+			scrubbed.set_parameters(chain_params)
+		watch_chain_attrs(chainCtrl, [curve for _, curve in animated[chainCtrl]])
+		ik_handle = get_chain(chainCtrl).ik_handle
+		if ik_handle is not None:
+			ik_blends.append(('{0}.ikBlend'.format(ik_handle), 0.0))
+	set_attrs_bulk(ik_blends)
+	ensure_live_script_node()
+	update_live_chains()
+	return chainCtrls
+
+@scene_run
+def stop_scrubbing_chains(chains=None):
+	""" Hand chains back to their simulation, see scrub_chains.
+	Args:
+		chains : (list)
+			Chain handles or controller names.  Defaults to every scrubbed chain
+	"""
+	if chains is None:
+		chainCtrls = list(SCRUB_CHAINS)
+	else:
+		chainCtrls = [str(chain) for chain in chains]
+	ik_blends = []
+	for chainCtrl in chainCtrls:
+		if SCRUB_CHAINS.pop(chainCtrl, None) is None:
+			continue
+		SCRUB_CACHE.invalidate(chainCtrl)
+		unwatch_chain_attrs(chainCtrl)
+		if not mc.objExists(chainCtrl):
+			continue
+		ik_handle = get_chain(chainCtrl).ik_handle
+		if ik_handle is not None:
+			ik_blends.append(('{0}.ikBlend'.format(ik_handle), 1.0))
+	set_attrs_bulk(ik_blends)
+
+def get_live_analytic_chains():
+	""" Chains with no IK handle that are not baked or scrubbed, whose
+	dynamic joints only follow their curve through update_live_chains.
+	"""
+	chains = [chain for chain in list_chains() if chain.controller not in SCRUB_CHAINS and chain.analytic_orient]
+	if not chains:
+		return []
+	base_joints = dict((chain.controller, chain.dyn_joints[0]) for chain in chains)
+	baked = get_anim_curves(base_joints.values())
+	return [chain for chain in chains if base_joints[chain.controller] not in baked]
+
+def update_live_chains(frame=None):
+	""" Pose the chains nothing in the scene graph poses, run by the live
+	script node when the time changes.  Scrubbed chains are solved at the
+	frame through their CachedChain.  Their parameters are read again when
+	the controller or the keys on its solver attributes were edited since,
+	so an edit shows on the next frame and only re-solves from where it
+	changes the motion.  Chains deleted since they were scrubbed are dropped.  Chains with no IK handle are oriented along the current
+	points of their simulated curve until they are baked.
+	Args:
+		frame : (float)
+			Frame to pose the scrubbed chains at.  Defaults to the current time
+	"""
+	if LIVE_SUSPENDED:
+		return
+	analytic = get_live_analytic_chains()
+	if not SCRUB_CHAINS and not analytic:
+		return
+	if frame is None:
+		frame = mc.currentTime(query=True)
+	values = []
+	for chain in analytic:
+		count = chain.num_points
+		points = mc.xform('{0}.cv[0:{1}]'.format(chain.soft_curve, count - 1), query=True, worldSpace=True, translation=True)
+		space = numpy.reshape(mc.getAttr(get_space_plug(chain)), (1, 4, 4))
+		channels = get_solved_channels(chain, numpy.reshape(points, (1, count, 3)), space)
+		values.extend([(plug, channel[0]) for plug, channel in sorted(channels.items())])
+	for chainCtrl, scrubbed in sorted(SCRUB_CHAINS.items()):
+		if not mc.objExists(chainCtrl):
+			del SCRUB_CHAINS[chainCtrl]
+			SCRUB_CACHE.invalidate(chainCtrl)
+			unwatch_chain_attrs(chainCtrl)
+			continue
+		chain = get_chain(chainCtrl)
+		if chainCtrl in SCRUB_DIRTY:
+			params, curves = read_scrubbed_parameters(chain, scrubbed)
+			scrubbed.set_parameters(params)
+			# Attributes keyed by the edit are watched from now on
+			watch_chain_attrs(chainCtrl, curves)
+		points = scrubbed.evaluate(frame)
+		space = numpy.reshape(mc.getAttr(get_space_plug(chain)), (1, 4, 4))
+		channels = get_solved_channels(chain, points[None], space)
+		values.extend([(plug, channel[0]) for plug, channel in sorted(channels.items())])
+	set_attrs_bulk(values)
+
+#---------------------------------------------------------------------------------#
+# Interactive Functions
+#---------------------------------------------------------------------------------#
+def get_ui_lag():
+	""" Lag set in the tool window, DYN_SMOOTHNESS when the window isn't open. """
+	if floatSliderGrp('sliderLag', exists=True):
+		return float(floatSliderGrp('sliderLag', query = 1, value = 1))
+	return DYN_SMOOTHNESS
+
+def get_ui_tip_constraint():
+	""" Tip constraint picked in the tool window, HAS_TIP_CONSTRAINT when the window isn't open. """
+	if checkBox('tipConstraint', exists=True):
+		return bool(checkBox('tipConstraint', query=1, value=1))
+	return HAS_TIP_CONSTRAINT
+
+def get_ui_resolution():
+	""" Simulation resolution set in the tool window, SIM_RESOLUTION when the window isn't open. """
+	if intField('simResolution', exists=True):
+		return int(intField('simResolution', query=1, value=1))
+	return SIM_RESOLUTION
+
+def get_ui_orient_mode():
+	""" Orient mode picked in the tool window, ORIENT_MODE when the window isn't open. """
+	if checkBox('analyticOrient', exists=True):
+		return ANALYTIC_ORIENT if checkBox('analyticOrient', query=1, value=1) else IK_ORIENT
+	return ORIENT_MODE
+
+def get_ui_drive_mode():
+	""" Drive mode picked in the tool window, DRIVE_MODE when the window isn't open. """
+	if checkBox('matrixDrive', exists=True):
+		return MATRIX_DRIVE if checkBox('matrixDrive', query=1, value=1) else CONSTRAINT_DRIVE
+	return DRIVE_MODE
+
+def get_ui_goal_binding():
+	""" Goal binding picked in the tool window, GOAL_BINDING when the window isn't open. """
+	if checkBox('skinGoalCurve', exists=True):
+		return SKIN_BINDING if checkBox('skinGoalCurve', query=1, value=1) else CLUSTER_BINDING
+	return GOAL_BINDING
+
+def cache_dynamic_chain():
+	""" Cache the selected chain controllers over the frame range in the bake
+	fields to a directory picked by the user.
+	"""
+	chainCtrls = get_selected_chains()
+	if not chainCtrls:
+		warning("Please select a chain controller to cache.")
+		return
+	item = fileDialog2(fileMode=3, caption="Joint Cache Directory")
+	if not item:
+		return
+	startFrame = intField('startFrame', query=1, value=1)
+	endFrame = intField('endFrame', query=1, value=1)
+	paths = cache_chains(chainCtrls, startFrame, endFrame, str(item[0]))
+	displayInfo("Cached {0} chains to {1}".format(len(paths), item[0]))
+	return paths
+
+def reduce_ui_keys(chains, startFrame, endFrame):
+	""" Reduce freshly baked keys when a key tolerance is set in the tool window. """
+	tolerance = floatField('bakeKeyTolerance', query=1, value=1)
+	if chains and tolerance:
+		reduce_chain_keys(chains, startFrame, endFrame, float(tolerance))
+
+@scene_run
+def create_dynamic_chain(names=None):
+	""" Create the dynamic joint chains.  Note:  You must have the base controller/joint 
+	selected and the end controller/effector shift selected.
+
+	Args:
+		names : (naming.NameAllocator)
+			Allocator shared by every chain in a batch.  Indexes the scene if not given
+	Returns:
+		jointCtrlObj : (str)
+			The dynamic chain controller, None if no chain was created
+	
+	"""
+	global USING_ALL_CONTROLS
+	# Get the selection of controls
+	sel = ls(selection=True)
+	# Non-hierarchy controls were selected.  Process each of them individually
+	if len(sel) > 2:
+		USING_ALL_CONTROLS = True
+	try:
+		chain = create_chain(sel, USING_ALL_CONTROLS, lag=get_ui_lag(), names=names,
+		        goal_binding=get_ui_goal_binding(), drive_mode=get_ui_drive_mode(),
+		        orient_mode=get_ui_orient_mode(), resolution=get_ui_resolution(),
+		        tip_constraint=get_ui_tip_constraint())
+	except ValueError as e:
+		warning(str(e))
+		return
+	# Print feedback for user
+	select(chain.controller)
+	displayInfo("Dynamic joint chain successfully setup!\n")
+	return chain.controller
+
+#///////////////////////////////////////////////////////////////////////////////////////
+#								DELETE DYNAMICS PROCEDURE
+#///////////////////////////////////////////////////////////////////////////////////////
+@scene_run
+def delete_dynamic_chain():
+	""" Delete the dynamics from the selected chain controllers. """
+	chains = get_selected_chains()
+	#Check that controller is selected.
+	if not chains:
+		mel.warning("Please select a chain controller. No dynamics were deleted.")
+		return
+	delete_chains(chains)
+	#Print feedback to the user.
+	print("Dynamics have been deleted from {0} chain(s).\n".format(len(chains)))
+
+@contextlib.contextmanager
+def batch_build(chunk_name):
+	""" Run a block as a single undo chunk with viewport refresh and evaluation
+	suspended, so building many chains doesn't redraw or dirty the viewport
+	after every command.  The evaluation manager is switched off meanwhile so
+	its graph isn't invalidated and rebuilt by every node created, and is put
+	back to its previous mode afterwards.
+	Args:
+		chunk_name : (str)
+			Name of the undo chunk
+	"""
+	evaluation_mode = mc.evaluationManager(query=True, mode=True)[0]
+	mc.undoInfo(openChunk=True, chunkName=chunk_name)
+	mc.refresh(suspend=True)
+	try:
+		mc.evaluationManager(mode='off')
+		yield
+	finally:
+		mc.evaluationManager(mode=evaluation_mode)
+		mc.refresh(suspend=False)
+		mc.undoInfo(closeChunk=True)
+
+def get_stored_attr_values(chains, chain_ctrls):
+	""" Match the stored attributes of each prefs chain to the controller that
+	was built for it.  Attributes the new controller doesn't have are skipped.
+	Args:
+		chains : (list)
+			Prefs chains, see prefs.read_prefs
+		chain_ctrls : (list)
+			Controller built for each chain, None where no chain was built
+	Returns:
+		values : (list)
+			(node.attr, value) pairs
+	"""
+	values = []
+	for chain, chain_ctrl in izip(chains, chain_ctrls):
+		if not chain_ctrl:
+			continue
+		existing = set(mc.listAttr(chain_ctrl, userDefined=True) or [])
+		for setting, value in sorted(chain['attrs'].items()):
+			if setting in existing and setting not in BUILD_ATTRS:
+				values.append(('{0}.{1}'.format(chain_ctrl, setting), value))
+	return values
+
+def set_attrs_bulk(values):
+	""" Set numeric attributes with a single MEL evaluation instead of a
+	setAttr call each.
+	Args:
+		values : (list)
+			(node.attr, value) pairs
+	"""
+	if not values:
+		return
+	mm.eval('\n'.join(['setAttr "{0}" {1!r};'.format(plug, float(value)) for plug, value in values]))
+
+def set_matrices_bulk(values):
+	""" Set matrix attributes with a single MEL evaluation.
+	Args:
+		values : (list)
+			(node.attr, 4x4 matrix) pairs
+	"""
+	if not values:
+		return
+	mm.eval('\n'.join([
+	        'setAttr "{0}" -type "matrix" {1};'.format(plug, ' '.join([repr(float(value)) for value in numpy.ravel(matrix)]))
+	        for plug, matrix in values
+	]))
+
+@scene_run
+def build_character(chains, character=None):
+	""" Build every chain of a character prefs document in one undo chunk with
+	refresh suspended, then apply the stored attributes in one pass.
+	Args:
+		chains : (list)
+			Prefs chains, see prefs.read_prefs
+		character : (str)
+			Character to register the chains under, see create_chain
+	Returns:
+		chain_ctrls : (list)
+			Controller built for each chain, None where the chain failed
+	"""
+	start = timeit.default_timer()
+	# One name index for every chain of the character
+	names = get_name_allocator()
+	chain_ctrls = []
+	with batch_build('overlapBuildCharacter'):
+		for chain in chains:
+			all_controls = chain['allControls']
+			if all_controls:
+				controls = chain['controls']
+			else:
+				controls = [chain['base'], chain['end']]
+			try:
+				chain_ctrls.append(create_chain(
+				        controls,
+				        all_controls,
+				        names=names,
+				        character=character,
+				        resolution=chain['attrs'].get('simResolution')
+				).controller)
+			except ValueError as e:
+				warning("{0}: {1}".format(chain['name'], e))
+				chain_ctrls.append(None)
+		with profiling.span('apply_attrs'):
+			set_attrs_bulk(get_stored_attr_values(chains, chain_ctrls))
+		built = [ctrl for ctrl in chain_ctrls if ctrl]
+		if built:
+			select(built, replace=True)
+	displayInfo("Built {0} of {1} chains in {2:.2f}s.".format(
+	        len(built),
+	        len(chains),
+	        timeit.default_timer() - start
+	))
+	return chain_ctrls
+
+@scene_run
+def create_character_from_prefs():
+	# XXX Doesn't do any error checking for names in xml file
+	item = fileDialog()
+	if not item:
+		return
+	try:
+		chains = prefs.read_prefs(str(item))
+	except SyntaxError as se:
+		mel.warning("Unable to parse character prefs. Error: \n{0}".format(str(se)))
+		return
+	return build_character(chains)
+
+@scene_run
+def save_character_to_prefs():
+	item = fileDialog2()
+	if not item:
+		return
+	chains = []
+	for chain in get_selected_chains():
+		ctrl = chain.controller
+		attr_dict = {
+			'lag' : getAttr('{0}.lag'.format(ctrl)),
+			'easeIn' : getAttr('{0}.easeIn'.format(ctrl)),
+			'attraction' : getAttr('{0}.attraction'.format(ctrl)),
+			'controllerSize' : getAttr('{0}.controllerSize'.format(ctrl)),
+		}
+		attr_dict['simResolution'] = chain.resolution
+		# Add all the goals
+		for attr in listAttr(ctrl):
+			if str(attr).startswith('jointStiffness'):
+				attr_dict[str(attr)] = getAttr('{0}.{1}'.format(ctrl, attr))
+		controls = chain.controls
+		if chain.uses_all_controls:
+			chains.append(prefs.chain_entry(ctrl, controls=controls, attrs=attr_dict))
+		else:
+			chains.append(prefs.chain_entry(ctrl, controls[0], controls[-1], attrs=attr_dict))
+	prefs.write_prefs(str(item[0]), chains)
+	warning('{0} has been written.'.format(str(item[0])))
+
+#///////////////////////////////////////////////////////////////////////////////////////
+#								BAKING PROCEDURE
+#///////////////////////////////////////////////////////////////////////////////////////
+@scene_run
+def bake_dynamic_chain():
+	""" Bake the selected chain controllers over the frame range set in the
+	tool window, with a progress window.
+	"""
+	#Filter selection to contain only dynamic chain controllers.
+	allCtrls = get_selected_chains()
+	#Create a progress window
+	progressWindow(
+	        status="Baking Joint Chains:",
+		title="RFX Dynamic Joint Chain:",
+		maxValue=100,
+		minValue=0,
+		isInterruptable=True,
+		progress=0
+	)
+	def progress(index, total):
+		# Check if the dialog has been cancelled
+		if progressWindow(query=1, isCancelled=1):
+			return False
+		progressWindow(edit=1, progress=(100 / total) * (index + 1))
+		progressWindow(edit=1, status=("Baking chain " + str(index + 1) + " of " + str(total) + " :"))
+	#Construct frame range
+	startFrame=float(intField('startFrame',query=1,value=1))
+	endFrame=float(intField('endFrame',query=1,value=1))
+	try:
+		baked = bake_chains(allCtrls, startFrame, endFrame, progress)
+	finally:
+		progressWindow(endProgress = True)
+	for chain in baked:
+		#Print feedback to user
+		print("All joints controlled by " + str(chain) + " have now been baked!\n")
+	reduce_ui_keys(baked, startFrame, endFrame)
+	
+@profiling.timed()
+def sample_character_goals(chainCtrls, startFrame, endFrame):
+	""" Sample the driver joints of every chain in one pass over the frame range.
+	Args:
+		chainCtrls : (list)
+			Dynamic chain controllers
+		startFrame, endFrame : (int)
+			Inclusive frame range
+	Returns:
+		goals, params, spaces : (list, list, list)
+			Goal positions (frames, joints, 3), solver parameters and the
+			matrix of get_space_plug (frames, 4, 4) per chain.  Chains with a
+			resolution are resampled to (frames, points, 3).  Pinned chains
+			have their pin targets in the parameters.  Keyed controller
+			attributes give per frame parameters
+
+	"""
+	chains = [get_chain(ctrl) for ctrl in chainCtrls]
+	driver_joints = [chain.blend_joints for chain in chains]
+	chain_pins = [chain.pins for chain in chains]
+	all_joints = [joint for joints in driver_joints for joint in joints]
+	# Pin targets, the space the chains are keyed in and the keyed solver
+	# attributes are sampled in the same pass as the goals
+	pin_targets = [target for pins in chain_pins for _, target in sorted(pins.items())]
+	animated = get_animated_attrs([chain.controller for chain in chains])
+	value_plugs = [
+	        '{0}.{1}'.format(chain.controller, attr)
+	        for chain in chains
+	        for attr, _ in animated[chain.controller]
+	]
+	positions, spaces, values = sample_world_positions(
+	        all_joints + pin_targets,
+	        startFrame,
+	        endFrame,
+	        [get_space_plug(chain) for chain in chains],
+	        value_plugs
+	)
+	pin_positions = positions[:, len(all_joints):]
+	pin_offset = 0
+	value_offset = 0
+	goals = []
+	params = []
+	offset = 0
+	for chain, joints, pins in izip(chains, driver_joints, chain_pins):
+		chain_goals = positions[:, offset:offset + len(joints)]
+		if chain.resolution:
+			chain_goals = resample.resample_chain(chain_goals, chain.resolution)
+		goals.append(chain_goals)
+		sampled = {}
+		for attr, _ in animated[chain.controller]:
+			sampled[attr] = values[:, value_offset]
+			value_offset += 1
+		attrs = get_chain_attrs(chain.controller, sampled)
+		params.append(get_solver_parameters(chain, chain_goals.shape[1], pins, attrs))
+		targets = numpy.zeros_like(chain_goals)
+		for index in sorted(pins):
+			if index < len(targets[0]):
+				targets[:, index] = pin_positions[:, pin_offset]
+			pin_offset += 1
+		if params[-1]['pin_weights'].any():
+			params[-1]['pin_targets'] = targets
+		offset += len(joints)
+	return goals, params, [spaces[:, c] for c in range(len(chains))]
+
+@profiling.timed()
+def solve_goals(goals, params, workers=1, shard_frames=None, warmup=None,
+                crossfade=parallel.CROSSFADE_FRAMES, stats=None):
+	""" Solve sampled chains in a single batch, per chain on a pool, or by frame
+	range shards on a pool.  See solve_character_chains for the arguments.
+	stats is filled with the length constraint passes of every frame when the
+	chains are solved in a single batch, see solver.solve_chains, and with the
+	warm-up and seam deviation when they are sharded, see
+	parallel.solve_chains_sharded.
+	"""
+	if not goals:
+		return []
+	if shard_frames and shard_frames < len(goals[0]):
+		return parallel.solve_chains_sharded(goals, params, shard_frames, warmup, crossfade, workers=workers,
+		                                     stats=stats)
+	if workers == 1:
+		return solver.solve_chains(goals, params, stats=stats)
+	return parallel.solve_chains_parallel(goals, params, workers=workers)
+
+def solve_character_chains(chainCtrls, startFrame, endFrame, workers=1, shard_frames=None,
+                           warmup=None, crossfade=parallel.CROSSFADE_FRAMES):
+	""" Solve every chain of a character together.  The driver joints of all the
+	chains are sampled in one pass over the frame range and advanced as a single
+	batch, instead of replaying the timeline once per chain.
+	Args:
+		chainCtrls : (list)
+			Dynamic chain controllers
+		startFrame, endFrame : (int)
+			Inclusive frame range
+		workers : (int)
+			Worker processes to solve on.  1 solves in this process as a single
+			batch, None uses every core
+		shard_frames : (int)
+			Split the frame range into shards of this many frames solved
+			concurrently.  None solves the whole range at once
+		warmup, crossfade : (int)
+			Pre-roll and overlap frames of each shard, see parallel.get_shards.
+			A warmup of None is sized from the chains' parameters, see
+			parallel.get_warmup_frames
+	Returns:
+		trajectories : (dict)
+			Solved world positions (frames, joints, 3) per chain controller
+
+	"""
+	chainCtrls = [str(ctrl) for ctrl in chainCtrls]
+	goals, params, _ = sample_character_goals(chainCtrls, startFrame, endFrame)
+	trajectories = solve_goals(goals, params, workers, shard_frames, warmup, crossfade)
+	return dict(izip(chainCtrls, trajectories))
+
+@scene_run
+def bake_solved_chains(chainCtrls, startFrame, endFrame, workers=1, shard_frames=None,
+                       warmup=None, crossfade=parallel.CROSSFADE_FRAMES,
+                       check_deviation=False):
+	""" Solve the chains offline and write the result straight onto the dynamic
+	joints, one key array per animation curve.
+	Args:
+		chainCtrls : (list)
+			Dynamic chain controllers
+		startFrame, endFrame : (int)
+			Inclusive frame range
+		workers, shard_frames, warmup, crossfade :
+			How to solve, see solve_character_chains
+		check_deviation : (bool)
+			Also solve serially and report the largest distance of the baked
+			motion from the serial solve as maxDeviation
+	Returns:
+		stats : (dict)
+			Key writing stats, see keys.write_channel_keys.  A single batch
+			solve also reports the length constraint passes of every frame as
+			iterations, and their most and mean as maxIterations and
+			meanIterations.  A sharded solve reports the warm-up frames used
+			as warmup and the largest distance between neighbouring shards
+			where they are cross-faded as seamDeviation
+
+	"""
+	chainCtrls = [str(ctrl) for ctrl in chainCtrls]
+	goals, params, spaces = sample_character_goals(chainCtrls, startFrame, endFrame)
+	solve_stats = {}
+	trajectories = solve_goals(goals, params, workers, shard_frames, warmup, crossfade, stats=solve_stats)
+	deviation = None
+	if check_deviation:
+		with profiling.span('serial_reference'):
+			deviation = parallel.max_deviation(trajectories, solver.solve_chains(goals, params))
+	channels = {}
+	for chainCtrl, trajectory, space in izip(chainCtrls, trajectories, spaces):
+		channels.update(get_solved_channels(chainCtrl, trajectory, space))
+	frames = range(int(startFrame), int(endFrame) + 1)
+	with profiling.span('write_channel_keys'):
+		stats = keys.write_channel_keys(channels, frames, keep_existing=True)
+	message = keys.format_stats(stats)
+	if 'iterations' in solve_stats:
+		iterations = solve_stats['iterations']
+		stats['iterations'] = iterations.tolist()
+		stats['maxIterations'] = int(iterations.max()) if len(iterations) else 0
+		stats['meanIterations'] = float(iterations.mean()) if len(iterations) else 0.0
+		message += ", length constraints took up to {maxIterations} passes a frame, {meanIterations:.2f} on average".format(**stats)
+	if 'warmup' in solve_stats:
+		stats['warmup'] = solve_stats['warmup']
+		stats['seamDeviation'] = solve_stats['seam_deviation']
+		message += ", shards warmed up over {warmup} frames and met within {seamDeviation:.6f}".format(**stats)
+	if deviation is not None:
+		stats['maxDeviation'] = deviation
+		message += ", max deviation from a serial solve {0:.6f}".format(deviation)
+	displayInfo(message)
+	return stats
+
+def bake_dynamic_chain_offline():
+	""" Bake the selected chain controllers with the offline solver over the
+	frame range in the bake fields.
+	"""
+	chainCtrls = [chain.controller for chain in get_selected_chains()]
+	if not chainCtrls:
+		warning("Please select a chain controller to bake.")
+		return
+	startFrame = intField('startFrame', query=1, value=1)
+	endFrame = intField('endFrame', query=1, value=1)
+	workers = intField('bakeWorkers', query=1, value=1)
+	shard_frames = intField('bakeShardFrames', query=1, value=1)
+	bake_solved_chains(chainCtrls, startFrame, endFrame, workers=workers, shard_frames=shard_frames or None)
+	reduce_ui_keys(chainCtrls, startFrame, endFrame)
+
+def scrub_dynamic_chain():
+	""" Scrub the selected chain controllers with the offline solver over the
+	frame range in the bake fields, see scrub_chains.
+	"""
+	chainCtrls = [chain.controller for chain in get_selected_chains()]
+	if not chainCtrls:
+		warning("Please select a chain controller to scrub.")
+		return
+	startFrame = intField('startFrame', query=1, value=1)
+	endFrame = intField('endFrame', query=1, value=1)
+	scrub_chains(chainCtrls, startFrame, endFrame)
+	displayInfo("Scrubbing {0} chains with the offline solver".format(len(chainCtrls)))
+
+def stop_scrubbing_dynamic_chain():
+	""" Hand the selected chains back to their simulation, every scrubbed chain
+	when none are selected.
+	"""
+	chainCtrls = [chain.controller for chain in get_selected_chains()]
+	stop_scrubbing_chains(chainCtrls or None)
@@ -0,0 +1,694 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Maya independent secondary motion solver for the overlap tool.  Simulates
+    a chain of points chasing their goals (the driving joints) the same way the
+    soft body goal setup built by create_dynamic_chain does, but as NumPy arrays
+    so a shot can be solved without stepping Maya's particle engine.
+
+    The controller attributes map onto the solver as they map onto the particle
+    system:
+        attraction          -> goalWeight[0]
+        lag                 -> goalSmoothness
+        easeIn              -> conserve
+        jointStiffness{i}   -> goalPP[i]
+
+    After every frame's goal pull the chains' segments are projected back to
+    their rest lengths, or to within a stretch of them.  The projection is
+    Jacobi style: every segment's correction is worked out from the same
+    positions and applied at once, so a pass is a handful of array operations
+    over every chain of a batch.  Passes stop once every segment is within
+    tolerance or the iterations run out, and the passes each frame took are
+    kept on the LengthConstraint.
+
+    The controller attributes may be animated.  Sampled per frame, attraction,
+    lag and easeIn become arrays (frames,) and the stiffness (frames, joints),
+    and the goal blend and velocity conservation are then stepped per frame.
+
+    Points can be pinned to targets, the tip or any point along the chain.
+    A pin weight per point pulls the point that fraction of the way onto its
+    target after the goal pull, and the length constraint moves pinned points
+    that much less.  Targets are sampled up front like the goals and every
+    pinned point of a batch is pulled in one array operation.
+
+@applications:
+    - Maya
+    - Standalone
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# External
+import numpy
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+MAGNETISM = 1.0
+DYN_SMOOTHNESS = 1.0
+EASE_IN = 1.0
+STIFFNESS = 1.0
+
+STIFFNESS_ATTR = 'jointStiffness{0}'
+PIN_WEIGHT_ATTR = 'pinWeight{0}'
+
+# Length constraint passes per frame, 0 lets the segments stretch freely
+ITERATIONS = 10
+# Largest segment length error left, as a fraction of the rest length
+LENGTH_TOLERANCE = 1e-3
+# Over-relaxation of the averaged Jacobi corrections
+RELAXATION = 1.5
+EPSILON = 1e-9
+
+#---------------------------------------------------------------------------------#
+# Helper Functions
+#---------------------------------------------------------------------------------#
+def attr_value(value):
+	""" A controller attribute as a float, or as an array (frames,) when it was
+	sampled per frame.
+	"""
+	value = numpy.asarray(value, dtype=numpy.float64)
+	return float(value) if value.ndim == 0 else value
+
+def stiffness_from_attrs(attrs, num_joints, default=STIFFNESS):
+	""" Build the per joint stiffness array from the jointStiffness{i} attributes.
+	Args:
+		attrs : (dict)
+			Attribute names and values read from the chain controller.  Values
+			sampled per frame are arrays (frames,)
+		num_joints : (int)
+			Number of joints in the chain
+		default : (float)
+			Stiffness used for any joint without an attribute
+	Returns:
+		stiffness : (numpy.ndarray)
+			Array of shape (num_joints,), or (frames, num_joints) when any
+			attribute was sampled per frame
+
+	"""
+	values = {}
+	for i in range(num_joints):
+		name = STIFFNESS_ATTR.format(i)
+		if name in attrs:
+			values[i] = numpy.asarray(attrs[name], dtype=numpy.float64)
+	leading = max([value.shape for value in values.values()] or [()], key=len)
+	stiffness = numpy.full(leading + (num_joints,), default, dtype=numpy.float64)
+	for i, value in values.items():
+		stiffness[..., i] = value
+	return stiffness
+
+def pin_weights_from_attrs(attrs, num_joints):
+	""" Build the per joint pin weight array from the pinWeight{i} attributes.
+	Joints without an attribute are not pinned.  Pins are not animated, a
+	weight sampled per frame is taken from its first frame.
+	Returns:
+		weights : (numpy.ndarray)
+			Array of shape (num_joints,)
+	"""
+	weights = numpy.zeros(num_joints, dtype=numpy.float64)
+	for i in range(num_joints):
+		name = PIN_WEIGHT_ATTR.format(i)
+		if name in attrs:
+			weights[i] = numpy.ravel(attrs[name])[0]
+	return numpy.clip(weights, 0.0, 1.0)
+
+def chain_parameters(attrs, num_joints, iterations=ITERATIONS, stretch=0.0):
+	""" Convert the chain controller attributes to solver keyword arguments.
+	Args:
+		attrs : (dict)
+			Attribute names and values read from the chain controller.
+			Attributes sampled per frame are arrays (frames,) and stay
+			animated in the parameters
+		num_joints : (int)
+			Number of joints in the chain
+		iterations : (int)
+			Length constraint passes per frame, see LengthConstraint
+		stretch : (float)
+			Fraction a segment may stretch or shrink by
+	Returns:
+		params : (dict)
+			Keyword arguments for solve_chain
+
+	"""
+	return {
+		'stiffness' : stiffness_from_attrs(attrs, num_joints),
+		'attraction' : attr_value(attrs.get('attraction', MAGNETISM)),
+		'lag' : attr_value(attrs.get('lag', DYN_SMOOTHNESS)),
+		'ease_in' : attr_value(attrs.get('easeIn', EASE_IN)),
+		'iterations' : int(iterations),
+		'stretch' : float(stretch),
+		'pin_weights' : pin_weights_from_attrs(attrs, num_joints),
+	}
+
+def goal_blend(stiffness, attraction=MAGNETISM, lag=DYN_SMOOTHNESS):
+	""" Fraction of the distance to its goal each point covers per frame.  The
+	goal weight is goalWeight * goalPP like the particle system, and the lag
+	(goalSmoothness) slows how quickly the weight is applied.
+	Args:
+		stiffness : (numpy.ndarray)
+			Per joint stiffness
+		attraction : (float or numpy.ndarray)
+			Global goal weight.  Arrays broadcast against stiffness
+		lag : (float or numpy.ndarray)
+			Goal smoothness.  Arrays broadcast against stiffness
+
+	"""
+	weight = numpy.clip(numpy.asarray(attraction) * stiffness, 0.0, 1.0)
+	return weight / (1.0 + numpy.maximum(lag, 0.0))
+
+def chain_blend(stiffness=None, attraction=MAGNETISM, lag=DYN_SMOOTHNESS, ease_in=EASE_IN):
+	""" Goal blend and velocity conservation of a chain from its parameters,
+	animated or not.
+	Args:
+		stiffness : (array like)
+			Per joint stiffness (joints,) or per frame (frames, joints).
+			Defaults to STIFFNESS
+		attraction, lag, ease_in : (float or array like)
+			Controller attributes, or per frame (frames,)
+	Returns:
+		blend, conserve : (numpy.ndarray, numpy.ndarray)
+			Goal blend (joints,), or (frames, joints) when any parameter is
+			animated, and conserve shaped () or (frames,)
+
+	"""
+	if stiffness is None:
+		stiffness = STIFFNESS
+	# Per frame attributes line up with the frames axis of the stiffness
+	blend = goal_blend(
+	        numpy.asarray(stiffness, dtype=numpy.float64),
+	        numpy.asarray(attraction, dtype=numpy.float64)[..., None],
+	        numpy.asarray(lag, dtype=numpy.float64)[..., None]
+	)
+	return blend, numpy.asarray(ease_in, dtype=numpy.float64)
+
+def is_animated(params):
+	""" Whether any goal parameter of a chain was sampled per frame. """
+	return any(
+	        numpy.ndim(params.get(name, 0.0)) > 0 for name in ('attraction', 'lag', 'ease_in')
+	) or numpy.ndim(params.get('stiffness')) > 1
+
+def at_frame(values, frame, ndim):
+	""" One frame of values that may be animated.  values with more than ndim
+	dimensions have a leading frames axis, the rest hold for every frame.
+	"""
+	return values[frame] if numpy.ndim(values) > ndim else values
+
+def segment_lengths(positions):
+	""" Length of every segment of chains shaped (..., points, 3). """
+	return numpy.linalg.norm(numpy.diff(positions, axis=-2), axis=-1)
+
+class LengthConstraint(object):
+	""" Keeps the segments of chains within bounds of their rest lengths.  The
+	first point of each chain is pinned, so a chain is pulled in from its base
+	like the spline IK chain it stands in for.
+	Args:
+		rest_lengths : (numpy.ndarray)
+			Rest length of every segment (..., segments)
+		stretch : (float or numpy.ndarray)
+			Fraction a segment may stretch or shrink by.  Arrays broadcast
+			against rest_lengths[..., :1], one value per chain
+		iterations : (int)
+			Most passes per frame
+		active : (numpy.ndarray)
+			False for segments left free, e.g. padding (..., segments)
+		tolerance : (float)
+			Largest length error left, as a fraction of the rest length
+		relaxation : (float)
+			Over-relaxation of the averaged corrections
+		pin_weights : (numpy.ndarray)
+			Pin weight of every point (..., points).  A point moves less the
+			more it is pinned
+	Attributes:
+		passes : (int)
+			Passes the last projection took
+		counts : (numpy.ndarray)
+			Passes each frame of the last integrate took (frames,)
+
+	"""
+	def __init__(self, rest_lengths, stretch=0.0, iterations=ITERATIONS, active=None,
+	             tolerance=LENGTH_TOLERANCE, relaxation=RELAXATION, pin_weights=None):
+		rest_lengths = numpy.asarray(rest_lengths, dtype=numpy.float64)
+		stretch = numpy.maximum(numpy.asarray(stretch, dtype=numpy.float64), 0.0)
+		self.rest_lengths = rest_lengths
+		self.min_lengths = rest_lengths * numpy.maximum(1.0 - stretch, 0.0)
+		self.max_lengths = rest_lengths * (1.0 + stretch)
+		self.iterations = int(iterations)
+		self.tolerance = float(tolerance)
+		if active is None:
+			active = numpy.ones(rest_lengths.shape, dtype=bool)
+		self.active = active & (rest_lengths > EPSILON)
+		self.scale = numpy.where(self.active, 1.0 / numpy.maximum(rest_lengths, EPSILON), 0.0)
+		num_segments = rest_lengths.shape[-1]
+		# Share of a segment's correction its start and end point take, by how
+		# free each point is to move.  The first point is fixed
+		mobility = numpy.ones(rest_lengths.shape[:-1] + (num_segments + 1,))
+		if pin_weights is not None:
+			mobility = mobility - numpy.clip(pin_weights, 0.0, 1.0)
+		mobility[..., 0] = 0.0
+		total = mobility[..., :-1] + mobility[..., 1:]
+		self.start_share = numpy.where(total > 0.0, mobility[..., :-1] / numpy.maximum(total, EPSILON), 0.0)
+		self.end_share = numpy.where(total > 0.0, mobility[..., 1:] / numpy.maximum(total, EPSILON), 0.0)
+		# Every point averages the corrections of the segments either side of it
+		degree = numpy.zeros(rest_lengths.shape[:-1] + (num_segments + 1,))
+		degree[..., :-1] += self.active
+		degree[..., 1:] += self.active
+		self.step = (relaxation / numpy.maximum(degree, 1.0))[..., None]
+		self.passes = 0
+		self.counts = numpy.zeros(0, dtype=numpy.int64)
+
+	def residual(self, positions):
+		""" Largest length error of any segment as a fraction of its rest length. """
+		lengths = segment_lengths(positions)
+		error = lengths - numpy.clip(lengths, self.min_lengths, self.max_lengths)
+		return float(numpy.abs(error * self.scale).max()) if error.size else 0.0
+
+	def project(self, positions):
+		""" Move positions towards the segment lengths in place.
+		Returns:
+			passes : (int)
+				Passes taken, 0 when the positions were already within tolerance
+		"""
+		self.passes = self.iterations
+		for iteration in range(self.iterations):
+			segments = numpy.diff(positions, axis=-2)
+			lengths = numpy.linalg.norm(segments, axis=-1)
+			error = (lengths - numpy.clip(lengths, self.min_lengths, self.max_lengths)) * self.active
+			if not error.size or numpy.abs(error * self.scale).max() <= self.tolerance:
+				self.passes = iteration
+				break
+			corrections = segments * (error / numpy.maximum(lengths, EPSILON))[..., None]
+			delta = numpy.zeros_like(positions)
+			delta[..., :-1, :] += corrections * self.start_share[..., None]
+			delta[..., 1:, :] -= corrections * self.end_share[..., None]
+			positions += delta * self.step
+		return self.passes
+
+def apply_pins(positions, targets, weights):
+	""" Pull pinned points onto their targets in place.
+	Args:
+		positions : (numpy.ndarray)
+			Point positions (..., 3)
+		targets : (numpy.ndarray)
+			Pin target positions (..., 3)
+		weights : (numpy.ndarray)
+			Pin weight per point, 0 leaves a point where it is
+	"""
+	positions += (targets - positions) * weights[..., None]
+
+def advance(positions, velocities, goals, blend, conserve, constraint=None, pin_targets=None, pin_weights=None):
+	""" Advance the solver state a single frame.  Works on any number of leading
+	dimensions so a single chain (n, 3) and a batch of chains (c, n, 3) share it.
+	Args:
+		positions : (numpy.ndarray)
+			Current point positions (..., 3)
+		velocities : (numpy.ndarray)
+			Current point velocities (..., 3)
+		goals : (numpy.ndarray)
+			Goal positions for the new frame (..., 3)
+		blend : (numpy.ndarray)
+			Goal blend per point, see goal_blend
+		conserve : (float or numpy.ndarray)
+			Fraction of the velocity kept from the last frame
+		constraint : (LengthConstraint)
+			Projected after the goal pull, the velocity includes its correction
+		pin_targets, pin_weights : (numpy.ndarray, numpy.ndarray)
+			Pin targets for the new frame (..., 3) and pin weight per point,
+			applied after the goal pull
+	Returns:
+		positions, velocities : (numpy.ndarray, numpy.ndarray)
+
+	"""
+	predicted = positions + velocities * conserve
+	new_positions = predicted + (goals - predicted) * blend[..., None]
+	if pin_targets is not None:
+		apply_pins(new_positions, pin_targets, pin_weights)
+	if constraint is not None:
+		constraint.project(new_positions)
+	return new_positions, new_positions - positions
+
+def integrate(goals, blend, conserve, positions=None, velocities=None, constraint=None, pin_targets=None,
+              pin_weights=None):
+	""" Run the solver over every frame of the goal motion.
+	Args:
+		goals : (numpy.ndarray)
+			Goal positions per frame (frames, ..., 3)
+		blend : (numpy.ndarray)
+			Goal blend per point (...), see goal_blend.  Animated with a
+			leading frames axis (frames, ...)
+		conserve : (float or numpy.ndarray)
+			Fraction of the velocity kept from the last frame, broadcast
+			against the positions.  Animated with a leading frames axis and
+			as many dimensions as goals
+		positions : (numpy.ndarray)
+			Starting positions.  Defaults to the first frame of goals
+		velocities : (numpy.ndarray)
+			Starting velocities.  Defaults to zero
+		constraint : (LengthConstraint)
+			Length constraint applied every frame.  Its counts are set to the
+			passes each frame took
+		pin_targets : (numpy.ndarray)
+			Pin target positions per frame (frames, ..., 3).  The starting
+			positions are pinned too
+		pin_weights : (numpy.ndarray)
+			Pin weight per point
+	Returns:
+		trajectory, positions, velocities : (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+			The solved positions per frame and the state after the last frame
+
+	"""
+	goals = numpy.asarray(goals, dtype=numpy.float64)
+	trajectory = numpy.empty_like(goals)
+	if positions is None:
+		positions = goals[0].copy()
+	if velocities is None:
+		velocities = numpy.zeros_like(positions)
+	if pin_targets is not None:
+		positions = positions.copy()
+		apply_pins(positions, pin_targets[0], pin_weights)
+	trajectory[0] = positions
+	counts = numpy.zeros(len(goals), dtype=numpy.int64)
+	for frame in range(1, len(goals)):
+		positions, velocities = advance(
+		        positions,
+		        velocities,
+		        goals[frame],
+		        at_frame(blend, frame, goals.ndim - 2),
+		        at_frame(conserve, frame, goals.ndim - 1),
+		        constraint,
+		        None if pin_targets is None else pin_targets[frame],
+		        pin_weights
+		)
+		if constraint is not None:
+			counts[frame] = constraint.passes
+		trajectory[frame] = positions
+	if constraint is not None:
+		constraint.counts = counts
+	return trajectory, positions, velocities
+
+#---------------------------------------------------------------------------------#
+# Main Functions
+#---------------------------------------------------------------------------------#
+def solve_chain(goal_positions, stiffness=None, attraction=MAGNETISM, lag=DYN_SMOOTHNESS,
+                ease_in=EASE_IN, initial_positions=None, iterations=ITERATIONS, stretch=0.0, pin_weights=None,
+                pin_targets=None, rest_lengths=None, stats=None):
+	""" Solve the secondary motion of a single chain.
+	Args:
+		goal_positions : (array like)
+			World space positions of the driving joints per frame, shaped
+			(frames, joints, 3)
+		stiffness : (array like)
+			Per joint stiffness (jointStiffness{i}), or per frame and joint
+			(frames, joints).  Defaults to 1.0
+		attraction : (float or array like)
+			Controller attraction attribute, or per frame (frames,)
+		lag : (float or array like)
+			Controller lag attribute, or per frame (frames,)
+		ease_in : (float or array like)
+			Controller easeIn attribute, or per frame (frames,)
+		initial_positions : (list)
+			Joint positions at the first frame as collected by
+			get_joint_information.  Defaults to the first goal frame
+		iterations : (int)
+			Length constraint passes per frame.  0 lets the segments stretch
+			freely
+		stretch : (float)
+			Fraction a segment may stretch or shrink by
+		pin_weights : (array like)
+			Per joint pin weight (pinWeight{i}).  Defaults to no pins
+		pin_targets : (array like)
+			Pin target positions shaped (frames, joints, 3).  Only read for
+			joints with a pin weight
+		rest_lengths : (array like)
+			Length every segment is kept at (joints - 1,).  Defaults to the
+			segment lengths on the first goal frame
+		stats : (dict)
+			Filled with iterations, the length constraint passes each frame
+			took (frames,)
+	Returns:
+		trajectory : (numpy.ndarray)
+			Solved joint positions shaped (frames, joints, 3)
+
+	"""
+	goals = numpy.asarray(goal_positions, dtype=numpy.float64)
+	if goals.ndim != 3 or goals.shape[-1] != 3:
+		raise ValueError("Goal positions must be shaped (frames, joints, 3).")
+	num_frames, num_joints = goals.shape[:2]
+	if stiffness is None:
+		stiffness = numpy.full(num_joints, STIFFNESS)
+	stiffness = numpy.asarray(stiffness, dtype=numpy.float64)
+	if stiffness.shape not in ((num_joints,), (num_frames, num_joints)):
+		raise ValueError("Expected {0} stiffness values, got {1}.".format(num_joints, stiffness.size))
+	if initial_positions is not None:
+		initial_positions = numpy.array(initial_positions, dtype=numpy.float64)
+	blend, conserve = chain_blend(stiffness, attraction, lag, ease_in)
+	if blend.ndim > 1:
+		blend = numpy.broadcast_to(blend, (num_frames, num_joints))
+	if conserve.ndim:
+		# One per frame, broadcast against the positions
+		conserve = numpy.broadcast_to(conserve, (num_frames,))[:, None, None]
+	if pin_targets is None or pin_weights is None or not numpy.any(pin_weights):
+		pin_targets = pin_weights = None
+	else:
+		pin_weights = numpy.clip(numpy.asarray(pin_weights, dtype=numpy.float64), 0.0, 1.0)
+		pin_targets = numpy.asarray(pin_targets, dtype=numpy.float64)
+		if pin_targets.shape != goals.shape:
+			raise ValueError("Pin targets must be shaped like the goal positions {0}.".format(goals.shape))
+	constraint = None
+	if iterations > 0:
+		if rest_lengths is None:
+			rest_lengths = segment_lengths(goals[0])
+		constraint = LengthConstraint(rest_lengths, stretch, iterations, pin_weights=pin_weights)
+	trajectory = integrate(
+	        goals,
+	        blend,
+	        conserve,
+	        positions=initial_positions,
+	        constraint=constraint,
+	        pin_targets=pin_targets,
+	        pin_weights=pin_weights
+	)[0]
+	if stats is not None:
+		stats['iterations'] = constraint.counts if constraint is not None else numpy.zeros(len(goals), dtype=numpy.int64)
+	return trajectory
+
+#---------------------------------------------------------------------------------#
+# Batch Solver
+#---------------------------------------------------------------------------------#
+class ChainBatch(object):
+	""" Struct of arrays state for several chains solved together.  Every chain
+	is padded to the longest chain, lengths and mask record which points are real.
+	Padded points have no goal pull and stay at the origin.
+
+	Attributes:
+		goals : (numpy.ndarray)
+			Goal positions (frames, chains, points, 3)
+		blend : (numpy.ndarray)
+			Goal blend per point (chains, points), or (frames, chains,
+			points) when any chain's parameters are animated
+		conserve : (numpy.ndarray)
+			Velocity conservation per chain (chains, 1, 1), or (frames,
+			chains, 1, 1) when animated
+		lengths : (numpy.ndarray)
+			Number of real points per chain (chains,)
+		mask : (numpy.ndarray)
+			True for real points (chains, points)
+		positions : (numpy.ndarray)
+			Current positions (chains, points, 3)
+		velocities : (numpy.ndarray)
+			Current velocities (chains, points, 3)
+		constraint : (LengthConstraint)
+			Segment lengths of every chain, None to let them stretch
+		pin_targets : (numpy.ndarray)
+			Pin target positions (frames, chains, points, 3), None when no
+			point is pinned
+		pin_weights : (numpy.ndarray)
+			Pin weight per point (chains, points)
+
+	"""
+	def __init__(self, goals, blend, conserve, lengths, positions=None, velocities=None, constraint=None,
+	             pin_targets=None, pin_weights=None):
+		self.goals = goals
+		self.blend = blend
+		self.conserve = conserve
+		self.lengths = lengths
+		self.constraint = constraint
+		self.pin_targets = pin_targets
+		self.pin_weights = pin_weights
+		self.mask = numpy.arange(goals.shape[2])[None, :] < lengths[:, None]
+		self.positions = goals[0].copy() if positions is None else positions
+		self.velocities = numpy.zeros_like(self.positions) if velocities is None else velocities
+
+	@property
+	def num_chains(self):
+		return self.goals.shape[1]
+
+	@property
+	def num_frames(self):
+		return self.goals.shape[0]
+
+	@property
+	def iterations(self):
+		""" Length constraint passes each frame of the last solve took (frames,). """
+		if self.constraint is None:
+			return numpy.zeros(self.num_frames, dtype=numpy.int64)
+		return self.constraint.counts
+
+	def step(self, frame):
+		""" Advance every chain to the given frame in one vectorized update. """
+		self.positions, self.velocities = advance(
+		        self.positions,
+		        self.velocities,
+		        self.goals[frame],
+		        at_frame(self.blend, frame, 2),
+		        at_frame(self.conserve, frame, 3),
+		        self.constraint,
+		        None if self.pin_targets is None else self.pin_targets[frame],
+		        self.pin_weights
+		)
+		return self.positions
+
+	def solve(self):
+		""" Solve every frame for every chain.
+		Returns:
+			trajectory : (numpy.ndarray)
+				Solved positions (frames, chains, points, 3)
+		"""
+		trajectory, self.positions, self.velocities = integrate(
+		        self.goals,
+		        self.blend,
+		        self.conserve,
+		        positions=self.positions,
+		        velocities=self.velocities,
+		        constraint=self.constraint,
+		        pin_targets=self.pin_targets,
+		        pin_weights=self.pin_weights
+		)
+		return trajectory
+
+	def unpack(self, trajectory):
+		""" Split a padded batch trajectory back into a list of per chain arrays. """
+		return [trajectory[:, i, :length] for i, length in enumerate(self.lengths)]
+
+def pack_chains(goal_positions, params, initial_positions=None):
+	""" Pack several chains into a ChainBatch.
+	Args:
+		goal_positions : (list)
+			Goal positions per chain, each shaped (frames, joints, 3).  All
+			chains must share the same frame range
+		params : (list)
+			Solver parameters per chain as returned by chain_parameters,
+			optionally with the rest_lengths of solve_chain
+		initial_positions : (list)
+			Optional starting positions per chain, see solve_chain
+	Returns:
+		batch : (ChainBatch)
+
+	"""
+	if len(goal_positions) != len(params):
+		raise ValueError("Expected parameters for each of the {0} chains.".format(len(goal_positions)))
+	if not goal_positions:
+		raise ValueError("Expected at least one chain to pack.")
+	chain_goals = [numpy.asarray(goals, dtype=numpy.float64) for goals in goal_positions]
+	num_frames = set(goals.shape[0] for goals in chain_goals)
+	if len(num_frames) != 1:
+		raise ValueError("All chains must be sampled over the same frame range.")
+	num_chains = len(chain_goals)
+	lengths = numpy.array([goals.shape[1] for goals in chain_goals], dtype=numpy.int64)
+	max_length = lengths.max()
+	goals = numpy.zeros((num_frames.pop(), num_chains, max_length, 3))
+	# Animated parameters on any chain step the whole batch per frame
+	leading = (len(goals),) if any(is_animated(param) for param in params) else ()
+	blend = numpy.zeros(leading + (num_chains, max_length))
+	conserve = numpy.empty(leading + (num_chains, 1, 1))
+	iterations = numpy.zeros(num_chains, dtype=numpy.int64)
+	stretch = numpy.zeros((num_chains, 1))
+	rest_lengths = numpy.zeros((num_chains, max_length - 1))
+	pin_weights = numpy.zeros((num_chains, max_length))
+	pin_targets = None
+	for i, (chain, param) in enumerate(zip(chain_goals, params)):
+		length = lengths[i]
+		goals[:, i, :length] = chain
+		stiffness = param.get('stiffness')
+		if stiffness is None:
+			stiffness = numpy.full(length, STIFFNESS)
+		point_blend, chain_conserve = chain_blend(
+		        stiffness,
+		        param.get('attraction', MAGNETISM),
+		        param.get('lag', DYN_SMOOTHNESS),
+		        param.get('ease_in', EASE_IN)
+		)
+		blend[..., i, :length] = point_blend
+		conserve[..., i, 0, 0] = chain_conserve
+		iterations[i] = param.get('iterations', ITERATIONS)
+		stretch[i] = param.get('stretch', 0.0)
+		rest_lengths[i, :length - 1] = (
+		        segment_lengths(chain[0]) if param.get('rest_lengths') is None else param['rest_lengths']
+		)
+		if param.get('pin_targets') is not None and param.get('pin_weights') is not None:
+			if pin_targets is None:
+				pin_targets = numpy.zeros_like(goals)
+			pin_targets[:, i, :length] = param['pin_targets']
+			pin_weights[i, :length] = numpy.clip(param['pin_weights'], 0.0, 1.0)
+	if not pin_weights.any():
+		pin_targets = None
+	# The batch runs the most passes any chain asks for, chains asking for none
+	# and the padding are left free
+	constraint = None
+	if num_chains and iterations.max() > 0:
+		active = numpy.arange(max_length - 1)[None, :] < (lengths - 1)[:, None]
+		active &= (iterations > 0)[:, None]
+		constraint = LengthConstraint(
+		        rest_lengths,
+		        stretch,
+		        iterations.max(),
+		        active,
+		        pin_weights=pin_weights
+		)
+	positions = None
+	if initial_positions is not None:
+		positions = goals[0].copy()
+		for i, start in enumerate(initial_positions):
+			if start is not None:
+				positions[i, :lengths[i]] = start
+	return ChainBatch(
+	        goals,
+	        blend,
+	        conserve,
+	        lengths,
+	        positions=positions,
+	        constraint=constraint,
+	        pin_targets=pin_targets,
+	        pin_weights=pin_weights if pin_targets is not None else None
+	)
+
+def solve_chains(goal_positions, params, initial_positions=None, stats=None):
+	""" Solve several chains together in a single pass over the frames.
+	Args:
+		goal_positions : (list)
+			Goal positions per chain, each shaped (frames, joints, 3)
+		params : (list)
+			Solver parameters per chain as returned by chain_parameters
+		initial_positions : (list)
+			Optional starting positions per chain
+		stats : (dict)
+			Filled with iterations, the length constraint passes each frame
+			of the whole batch took (frames,)
+	Returns:
+		trajectories : (list)
+			Solved positions per chain, each shaped (frames, joints, 3).
+			Empty when no chains are given
+
+	"""
+	if not goal_positions:
+		if stats is not None:
+			stats['iterations'] = numpy.zeros(0, dtype=numpy.int64)
+		return []
+	batch = pack_chains(goal_positions, params, initial_positions)
+	trajectories = batch.unpack(batch.solve())
+	if stats is not None:
+		stats['iterations'] = batch.iterations
+	return trajectories
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Rig topology index for the overlap tool.  The control hierarchy under the
+    selected root is walked once and kept as flat parent/child arrays in
+    preorder, with every node classified as a joint, a control (NODE_SUFFIX)
+    or an end joint ('END' in the name).  The hierarchy helpers used while
+    setting up a chain answer from the index instead of re-walking the scene.
+
+@applications:
+    - Maya
+    - Standalone
+
+"""
+
+#---------------------------------------------------------------------------------#
+# Globals
+#---------------------------------------------------------------------------------#
+NODE_SUFFIX = 'CON'
+END_TOKEN = 'END'
+
+#---------------------------------------------------------------------------------#
+# Rig Topology
+#---------------------------------------------------------------------------------#
+class RigTopology(object):
+	""" Flat index of a hierarchy built in a single traversal.
+	Args:
+		root : (object)
+			Node the index starts from
+		get_children : (callable)
+			Returns the children of a node in hierarchy order
+		is_joint : (callable)
+			Returns whether a node is a joint
+		node_suffix : (str)
+			Name suffix identifying controls
+
+	Attributes:
+		nodes : (list)
+			Every node in preorder, the root first
+		parents : (list)
+			Index of each node's parent, -1 for the root
+		children : (list)
+			Child indices of each node in hierarchy order
+		subtree_end : (list)
+			One past the last descendant index of each node
+		joints, controls, ends : (list)
+			Classification of each node
+
+	"""
+	def __init__(self, root, get_children, is_joint, node_suffix=NODE_SUFFIX):
+		self.node_suffix = node_suffix
+		self.nodes = []
+		self.parents = []
+		self.children = []
+		self.joints = []
+		self.controls = []
+		self.ends = []
+		self.index = {}
+		# Iterative preorder walk so long chains don't hit the recursion limit
+		stack = [(root, -1)]
+		while stack:
+			node, parent = stack.pop()
+			i = len(self.nodes)
+			name = str(node)
+			self.index[node] = i
+			self.nodes.append(node)
+			self.parents.append(parent)
+			self.children.append([])
+			self.joints.append(bool(is_joint(node)))
+			self.controls.append(name.endswith(node_suffix))
+			self.ends.append(END_TOKEN in name)
+			if parent >= 0:
+				self.children[parent].append(i)
+			for child in reversed(list(get_children(node) or [])):
+				stack.append((child, i))
+		count = len(self.nodes)
+		self.subtree_end = list(range(1, count + 1))
+		for i in range(count - 1, 0, -1):
+			parent = self.parents[i]
+			self.subtree_end[parent] = max(self.subtree_end[parent], self.subtree_end[i])
+		# Next joint and control at or after each preorder position
+		self._next_joint = [count] * (count + 1)
+		self._next_control = [count] * (count + 1)
+		for i in range(count - 1, -1, -1):
+			self._next_joint[i] = i if self.joints[i] else self._next_joint[i + 1]
+			self._next_control[i] = i if self.controls[i] else self._next_control[i + 1]
+		self._joint_counts = {}
+
+	def __contains__(self, node):
+		return node in self.index
+
+	def _first(self, node, next_array):
+		i = self.index[node]
+		found = next_array[i + 1]
+		if found < self.subtree_end[i]:
+			return self.nodes[found]
+		return None
+
+	def first_joint(self, node):
+		""" First joint below a node in hierarchy order. """
+		return self._first(node, self._next_joint)
+
+	def first_control(self, node):
+		""" First control below a node in hierarchy order. """
+		return self._first(node, self._next_control)
+
+	def end_joint(self, start_control, to_next_control=False):
+		""" Last joint down the chain from a control, skipping 'END' joints.  If
+		to_next_control is set the search stops at the next control.
+		"""
+		end_joint = ''
+		# Each entry is a node's children and the position reached in them
+		stack = [[self.children[self.index[start_control]], 0]]
+		while stack:
+			entry = stack[-1]
+			children, position = entry
+			if position >= len(children):
+				stack.pop()
+				continue
+			child = children[position]
+			entry[1] += 1
+			if to_next_control and self.controls[child]:
+				# The next control ends the search of this level
+				stack.pop()
+				continue
+			if self.joints[child] and not self.ends[child]:
+				end_joint = self.nodes[child]
+			stack.append([self.children[child], 0])
+		return end_joint
+
+	def joint_count(self, base_ctrl, end_ctrl):
+		""" Number of joints between two controls.  Joints are counted where they
+		hang off the control's transforms, the walk does not continue below them
+		or past the end control.
+		"""
+		key = (self.index[base_ctrl], self.index.get(end_ctrl, -1))
+		if key in self._joint_counts:
+			return self._joint_counts[key]
+		base, end = key
+		count = 0
+		if base != end:
+			stack = list(self.children[base])
+			while stack:
+				child = stack.pop()
+				if self.joints[child]:
+					count += 1
+				elif child != end:
+					stack.extend(self.children[child])
+		self._joint_counts[key] = count
+		return count
+
+	def joints_per_control(self, controls, num_joints):
+		""" How many joints each control drives.  The last control takes whatever
+		is left of num_joints.
+		"""
+		counts = [self.joint_count(base, end) for base, end in zip(controls, controls[1:])]
+		counts.append(num_joints - sum(counts))
+		return counts
+
+	def all_controllers(self, cur_ctrl, end_ctrl):
+		""" Every control from cur_ctrl down to end_ctrl. """
+		controls = [cur_ctrl]
+		while cur_ctrl != end_ctrl:
+			cur_ctrl = self.first_control(cur_ctrl)
+			if cur_ctrl is None:
+				raise ValueError("{0} is not below {1}.".format(end_ctrl, controls[0]))
+			controls.append(cur_ctrl)
+		return controls
+
+	def chain_joints(self, cur_joint, end_joint):
+		""" Every joint from cur_joint down to end_joint following the first joint
+		below each one.
+		"""
+		joints = [cur_joint]
+		while cur_joint != end_joint:
+			cur_joint = self.first_joint(cur_joint)
+			if cur_joint is None:
+				raise ValueError("{0} is not below {1}.".format(end_joint, joints[0]))
+			joints.append(cur_joint)
+		return joints
+
+	def joints_under(self, control):
+		""" Joints hanging off a control's transforms, not descending below them. """
+		joints = []
+		stack = list(reversed(self.children[self.index[control]]))
+		while stack:
+			child = stack.pop()
+			if self.joints[child]:
+				joints.append(self.nodes[child])
+			else:
+				stack.extend(reversed(self.children[child]))
+		return joints
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+"""
+
+@description:
+    Window for the overlap tool.  Only loaded when the window is opened, so
+    the core modules and batch jobs never pay for the UI imports.
+
+@departments:
+    - Animation
+
+@applications:
+    - Maya
+
+"""
+
+#----------------------------------------------------------------------------#
+#----------------------------------------------------------------- IMPORTS --#
+
+# External
+from pymel.core import (
+        button,
+        checkBox,
+        columnLayout,
+        deleteUI,
+        floatField,
+        floatSliderGrp,
+        frameLayout,
+        intField,
+        rowColumnLayout,
+        scrollLayout,
+        separator,
+        setParent,
+        showWindow,
+        text,
+        window,
+)
+
+# Internal
+from overlap_tool import scene
+
+#///////////////////////////////////////////////////////////////////////////////////////
+#								MAIN WINDOW
+#///////////////////////////////////////////////////////////////////////////////////////
+def main():
+	#XXX TODO: Switch from using MELs gui system to ui_lib
+	if window('dynChainWindow',q=1,ex=1):
+		deleteUI('dynChainWindow')
+		#Main Window
+		
+	window('dynChainWindow',h=200,w=360,title="RFX Overlapping Tool")
+	scrollLayout(hst=0)
+	columnLayout('dynChainColumn')
+	#Dynamic Chain Creation Options Layout
+	frameLayout('creationOptions',h=100,
+		borderStyle='etchedOut',
+		collapsable=False,
+		w=350,
+		label="Dynamic Chain Creation Options:")
+	frameLayout('creationOptions',e=1,cl=True)
+	columnLayout(cw=350)
+	#Stiffness
+	floatSliderGrp('sliderLag',min=0,max=10,
+		cw3=(60, 60, 60),
+		precision=3,
+		value=3,
+		label="Lag:",
+		field=True,
+		cal=[(1, 'left'), (2, 'left'), (3, 'left')])
+	checkBox('skinGoalCurve',
+		value=False,
+		label="Bind goal curve with one skinCluster")
+	checkBox('matrixDrive',
+		value=False,
+		label="Drive controls by matrix (Maya 2020+)")
+	checkBox('analyticOrient',
+		value=False,
+		label="Orient joints without spline IK")
+	rowColumnLayout(nc=3,cw=[(1, 100), (2, 60)])
+	text("Sim Points:")
+	intField('simResolution',value=0,min=0)
+	text("0 simulates every joint")
+	setParent('..')
+	#Tip Constraint Checkbox
+	checkBox('tipConstraint',
+		value=False,
+		label="Pin the tip when solving offline")
+	separator(h=20,w=330)
+	setParent('..')
+	setParent('..')
+	#Button Layouts
+	text("Note: If controls are in a non-hierarchy, select all controls: ")
+	rowColumnLayout(nc=2,cw=[(1, 175), (2, 150)])
+	text("Select base joint, shift select tip: \n")
+	button(c=lambda *args: scene.create_dynamic_chain(),label="Make Dynamic")
+	text("Select control: ")
+	button(c=lambda *args: scene.delete_dynamic_chain(),label="Delete Dynamics")
+	setParent('..')
+	#Bake Animation Layouts
+	separator(h=20,w=330)
+	text("                               -Bake Joint Animation-")
+	rowColumnLayout('bakeRowColumn',nc=3,cw=[(1, 100), (2, 100)])
+	text("Start Frame: ")
+	text("End Frame:")
+	text("Select Control:")
+	intField('startFrame')
+	intField('endFrame',value=400)
+	button(c=lambda *args: scene.bake_dynamic_chain(),label="Bake Dynamics")
+	text("Workers:")
+	intField('bakeWorkers',value=1,min=1)
+	button(c=lambda *args: scene.bake_dynamic_chain_offline(),label="Bake Solver")
+	text("Shard Frames:")
+	intField('bakeShardFrames',value=0,min=0)
+	text("0 solves in one pass")
+	text("Key Tolerance:")
+	floatField('bakeKeyTolerance',value=0,min=0,precision=3)
+	text("0 keeps every key")
+	text("Joint Cache:")
+	text("")
+	button(c=lambda *args: scene.cache_dynamic_chain(),label="Cache Joints")
+	text("Scrub Solver:")
+	button(c=lambda *args: scene.stop_scrubbing_dynamic_chain(),label="Stop Scrubbing")
+	button(c=lambda *args: scene.scrub_dynamic_chain(),label="Scrub")
+	setParent('..')
+	separator(h=20, w=330)
+	text("                               -Character Prefs-")
+	rowColumnLayout('prefsRowColumn',nc=2, cw=[(1, 175), (2, 150)])
+	text("Open Character Prefs: ")
+	button(c=lambda *args: scene.create_character_from_prefs(), label="Open Character Prefs")
+	text("Select joints by base->end")
+	button(c=lambda *args: scene.save_character_to_prefs(), label="Save Character Prefs")
+	#Show Main Window Command
+	showWindow('dynChainWindow')
+
+if __name__ == "__main__":
+	main()
\ No newline at end of file